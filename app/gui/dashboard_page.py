@@ -1,23 +1,26 @@
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLineEdit,
-    QTableView, QTextEdit, QSplitter
+    QTableView, QTextEdit, QSplitter, QPushButton,
+    QFileDialog, QProgressDialog, QMessageBox
 )
-from PySide6.QtCore import Qt, Signal
+from PySide6.QtCore import Qt, QTimer, Signal, Slot, QThreadPool
 from PySide6.QtCharts import QChart, QChartView, QPieSeries
 from PySide6.QtGui import QColor
-from collections import Counter
-from PySide6.QtCore import QSortFilterProxyModel, Qt
 from gui.widgets.card import *
 from utils.db_crud import *
-from gui.widgets.log_table import LogTableModel
+from gui.widgets.log_table import LogTableModel, SEARCH_DEBOUNCE_MS
+from gui.widgets.timeline_chart import TimelineChart
+from utils.export_worker import ExportWorker
+
+EXPORT_FILTERS = "JSON Lines (*.jsonl);;JSON Lines, zstd (*.jsonl.zst);;CSV (*.csv);;CSV, zstd (*.csv.zst)"
 
 class Dashboard(QWidget):
     refresh_database = Signal()
-    def __init__(self, event_logs):
+    def __init__(self):
         super().__init__()
         self.setAutoFillBackground(True)
-        self.event_logs = event_logs
-        self.filtered_logs = event_logs
+        # filled by load_data() once the startup worker has read them
+        self.event_stats = None
 
         self.setWindowTitle("Dashboard")
         self.main_layout = QVBoxLayout(self) 
@@ -31,31 +34,20 @@ class Dashboard(QWidget):
         container = QHBoxLayout()
 
         # Pie Chart
-        pie = QPieSeries()
-        levels = {}
-        if self.event_logs:
-            for l in self.event_logs:
-                levels[l["level"]] = levels.get(l["level"], 0) + 1
-            for k, v in levels.items():
-                pie.append(k, v)
+        self.pie = QPieSeries()
 
         chart = QChart()
-        chart.addSeries(pie)
+        chart.addSeries(self.pie)
         chart.setBackgroundBrush(QColor("#07102a"))
         chart.legend().setAlignment(Qt.AlignBottom)
         chart_view = QChartView(chart)
         chart_view.setFixedHeight(200)
         chart_view.setFixedWidth(500)
 
-        stats = Counter(l["level"] for l in (self.event_logs or []))
-        self.info_event_count = str(stats.get("info", 0))
-        self.warn_event_count = str(stats.get("warn", 0))
-        self.error_event_count = str(stats.get("error", 0))
-        self.critical_event_count = str(stats.get("critical", 0))
-
-        self.total_event_count = str(len(self.event_logs or []))
-        self.event_category_count = str(len(set(l["category"] for l in (self.event_logs or []))))
-        self.start_date, self.end_date = select_date_interval() if self.event_logs else ("", "")
+        # the cards show LOADING_TEXT until refresh_ui() gets the stats
+        self.info_event_count = self.warn_event_count = self.error_event_count = self.critical_event_count = LOADING_TEXT
+        self.total_event_count = self.event_category_count = LOADING_TEXT
+        self.start_date = self.end_date = LOADING_TEXT
 
 
         # Log Level Card
@@ -81,27 +73,54 @@ class Dashboard(QWidget):
         container.addStretch(1)
         self.main_layout.addLayout(container)
 
+        # events over time, zoomable
+        self.timeline = TimelineChart()
+        self.timeline.setFixedHeight(180)
+        self.main_layout.addWidget(self.timeline)
+
+    def fill_pie(self, levels):
+        self.pie.clear()
+        for k, v in levels.items():
+            self.pie.append(k or "unknown", v)
+
     # table & pane
-    def filter_logs(self, text):
-        self.proxy.setFilterCaseSensitivity(Qt.CaseInsensitive)
-        self.proxy.setFilterFixedString(text)
+    def filter_logs(self):
+        self.model.set_search(self.search_box.text())
+        header = self.table.horizontalHeader()
+        header.blockSignals(True)
+        if self.model.sort_field is None:
+            header.setSortIndicator(-1, Qt.AscendingOrder)
+        else:
+            order = Qt.DescendingOrder if self.model.descending else Qt.AscendingOrder
+            header.setSortIndicator(self.model.FIELDS.index(self.model.sort_field), order)
+        header.blockSignals(False)
 
     def table_and_detail_ui(self):
         splitter = QSplitter(Qt.Horizontal)
         
         self.search_box = QLineEdit()
         self.search_box.setPlaceholderText("Search logs...")
-        self.search_box.textChanged.connect(self.filter_logs)
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.filter_logs)
+        self.search_box.textChanged.connect(lambda _: self.search_timer.start())
+
+        # exports what the table shows: current search and sort
+        self.export_btn = QPushButton("Export")
+        self.export_btn.clicked.connect(self.export_logs)
+        self.threadpool = QThreadPool.globalInstance()
+        self.export_worker = None
 
         self.table = QTableView()
-        self.model = LogTableModel(self.filtered_logs)
-        
-        self.proxy = QSortFilterProxyModel(self)
-        self.proxy.setSourceModel(self.model)
-        self.proxy.setFilterCaseSensitivity(Qt.CaseInsensitive)
-        self.proxy.setFilterKeyColumn(-1)
-        
-        self.table.setModel(self.proxy)
+        self.model = LogTableModel()
+        self.table.setModel(self.model)
+        # header clicks re-query the source model with an indexed ORDER BY
+        header = self.table.horizontalHeader()
+        header.setSectionsClickable(True)
+        header.setSortIndicatorShown(True)
+        header.setSortIndicator(self.model.FIELDS.index("timestamp"), Qt.AscendingOrder)
+        header.sortIndicatorChanged.connect(self.model.sort)
         self.table.clicked.connect(self.inspect_log)
 
         self.detail = QTextEdit()
@@ -111,33 +130,93 @@ class Dashboard(QWidget):
         splitter.addWidget(self.detail)
         splitter.setSizes([700, 300])
 
+        search_bar = QHBoxLayout()
+        search_bar.addWidget(self.search_box)
+        search_bar.addWidget(self.export_btn)
+
         self.layout().addWidget(splitter)
-        self.layout().addWidget(self.search_box)
+        self.layout().addLayout(search_bar)
 
     def inspect_log(self, selected_log):
-        source_index = self.proxy.mapToSource(selected_log)
-        log = self.filtered_logs[source_index.row()]
-        log_dict = dict(log)
+        log_dict = self.model.record_at(selected_log.row())
         formatted = "\n\n".join(f">> {k}: {v if v is not None else ''}" for k, v in log_dict.items())
         self.detail.setText(formatted)
 
-    def update_data(self, new_logs):
-        self.event_logs = new_logs
-        self.filtered_logs = new_logs
-        self.model.refresh_event_log_ui(self.filtered_logs)
-        self.refresh_ui(self.event_logs)
+    # export
+    def export_logs(self):
+        file_path, selected = QFileDialog.getSaveFileName(self, "Export Logs", "", EXPORT_FILTERS)
+        if not file_path: return
+        # add the extension of the chosen filter when the name has none of ours
+        if not file_path.lower().endswith((".jsonl", ".csv", ".jsonl.zst", ".csv.zst")) and "*" in selected:
+            file_path += selected[selected.index("*") + 1:-1]
+
+        self.export_btn.setEnabled(False)
+        self.export_progress = QProgressDialog("Exporting logs...", "Cancel", 0, 100, self)
+        self.export_progress.setWindowTitle("Export")
+        self.export_progress.setMinimumDuration(0)
+        self.export_progress.setAutoClose(False)
+        self.export_progress.setAutoReset(False)
+        self.export_progress.show()
+
+        self.export_worker = ExportWorker(file_path, self.model.TABLE, self.model.sort_field or "timestamp", self.model.descending, self.model.match)
+        self.export_worker.signals.progress.connect(self.on_export_progress)
+        self.export_worker.signals.finished.connect(self.on_export_finished)
+        self.export_worker.signals.error.connect(self.on_export_error)
+        self.export_progress.canceled.connect(self.export_worker.cancel)
+
+        self.threadpool.start(self.export_worker)
+
+    @Slot(dict)
+    def on_export_progress(self, info):
+        if info["percent"] < 0:
+            self.export_progress.setRange(0, 0)
+        else:
+            self.export_progress.setValue(info["percent"])
+        self.export_progress.setLabelText(
+            f"{info['records']} of {info['total']} records  |  {info['records_per_sec']:.0f} records/sec\n"
+            f"{info['bytes_written'] / 1048576:.1f} MB written ({info['bytes_per_sec'] / 1048576:.1f} MB/sec), "
+            f"{info['file_bytes'] / 1048576:.1f} MB on disk  |  ETA {info['eta']:.0f}s"
+        )
+
+    @Slot(dict)
+    def on_export_finished(self, summary):
+        self.export_worker = None
+        self.export_progress.close()
+        self.export_btn.setEnabled(True)
+        if summary["cancelled"]:
+            QMessageBox.information(self, "Cancelled", "Export cancelled.")
+        else:
+            QMessageBox.information(self, "Success", f"Exported {summary['records']} records ({summary['bytes'] / 1048576:.1f} MB).")
+
+    @Slot(str)
+    def on_export_error(self, message):
+        self.export_worker = None
+        self.export_progress.close()
+        self.export_btn.setEnabled(True)
+        QMessageBox.critical(self, "Error", f"Export failed: {message}")
+
+    def load_data(self, new_stats, first_page):
+        """Fills the page with the stats and first table page read at startup."""
+        self.model.show_first_page(first_page)
+        self.refresh_ui(new_stats)
+
+    def update_data(self, new_stats, change=None):
+        self.model.refresh_event_log_ui(change)
+        self.refresh_ui(new_stats)
     
-    def refresh_ui(self, new_event_logs=None):
-        self.event_logs = new_event_logs if new_event_logs is not None else []
-        stats = Counter(l["level"] for l in (self.event_logs or []))
+    def refresh_ui(self, new_event_stats):
+        self.event_stats = new_event_stats
+        stats = self.event_stats["levels"]
+        self.fill_pie(stats)
         self.info_card.update_smallsummarycard_value(stats.get("info", 0))
         self.warn_card.update_smallsummarycard_value(stats.get("warn", 0))
         self.error_card.update_smallsummarycard_value(stats.get("error", 0))
         self.critical_card.update_smallsummarycard_value(stats.get("critical", 0))
-        self.total_card.update_summarycard_value(len(self.event_logs or []))
-        self.category_card.update_summarycard_value(len(set(l["category"] for l in (self.event_logs or []))))
-        self.start_date, self.end_date = select_date_interval() if self.event_logs else ("", "")
+        self.total_card.update_summarycard_value(self.event_stats["total"])
+        self.category_card.update_summarycard_value(self.event_stats["categories"])
+        self.start_date, self.end_date = self.event_stats["start_date"], self.event_stats["end_date"]
         self.date_range_card.update_summarycard_value(f"{self.start_date}\n          -\n{self.end_date}")
+        self.timeline.refresh()
 
 
     # style
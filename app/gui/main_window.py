@@ -0,0 +1,197 @@
+import os
+import sys
+import time
+from PySide6.QtCore import Qt, QTimer, QThreadPool, Slot
+from PySide6.QtGui import QFont, QIcon, QPixmap, QPalette, QBrush
+from PySide6.QtWidgets import (
+    QApplication, QMainWindow, QPushButton,
+    QVBoxLayout, QHBoxLayout, QWidget,
+    QStackedWidget, QMessageBox
+)
+from gui.dashboard_page import Dashboard
+from gui.about_page import About
+from gui.notifications_page import Notifications
+from gui.preference_page import Preferences
+from utils.db_crud import *
+from utils.startup_worker import StartupWorker
+
+basedir = os.path.dirname(os.path.dirname(__file__))
+icon_path = os.path.join(basedir, "assets", "icons", "logo.png")
+bg_img_path = os.path.join(basedir, "assets", "themes", "background.png")
+# past this, the first paint is logged as a warning
+FIRST_PAINT_TARGET_MS = 1000
+
+def load_event_stats():
+    data = fetch_log_stats()
+    return data
+
+def load_alert_stats():
+    data = fetch_alert_stats()
+    return data
+
+def load_prefs_settings():
+    data = fetch_prefs_settings()
+    return data
+
+class MainWindow(QMainWindow):
+    """Main window; it paints before the database is opened.
+
+    The pages start with placeholders. The first paint starts a
+    StartupWorker, which opens the database and reads the stats and first
+    table pages; they are handed to the pages when they arrive.
+    """
+    def __init__(self, started):
+        super().__init__()
+        # perf_counter() at process start, for the time to first paint
+        self.started = started
+        self.first_paint_ms = None
+        self.loaded = False
+        self.event_stats = self.alert_stats = self.prefs_sets = None
+
+        self.setStyleSheet("""
+            QStackedWidget, .Dashboard, .Notifications, .Preferences, .About {
+                background-color: #07102a; /* Use your specific theme color here */
+            }
+            QPushButton {
+                background-color: #2b5797;
+                color: white;
+                border-radius: 5px;
+                padding: 8px;
+                font-size: 14px;
+                min-width: 200px;
+                max-width: 200px;
+            }
+            QPushButton:hover {
+                background-color: #3e79db;
+            }
+            QPushButton:pressed {
+                background-color: #1e3a63;
+            }
+        """)
+
+        container = QWidget()
+        layout = QVBoxLayout()
+        btn_container = QHBoxLayout()
+
+        self.stacked_widget = QStackedWidget()
+        self.stacked_widget.currentChanged.connect(self.on_page_changed)
+
+        self.dashboard = Dashboard()
+        self.notifications = Notifications()
+        self.preferences = Preferences()
+        self.about = About()
+
+        self.stacked_widget.addWidget(self.dashboard)
+        self.stacked_widget.addWidget(self.notifications)
+        self.stacked_widget.addWidget(self.preferences)
+        self.stacked_widget.addWidget(self.about)
+
+        dashboard_button = QPushButton("Dashboard")
+        dashboard_button.clicked.connect(lambda: self.stacked_widget.setCurrentWidget(self.dashboard))
+        btn_container.addWidget(dashboard_button)
+
+        alert_button = QPushButton("Alerts")
+        alert_button.clicked.connect(lambda: self.stacked_widget.setCurrentWidget(self.notifications))
+        btn_container.addWidget(alert_button)
+
+        prefs_button = QPushButton("Prefereces")
+        prefs_button.clicked.connect(lambda: self.stacked_widget.setCurrentWidget(self.preferences))
+        btn_container.addWidget(prefs_button)
+        
+        about_button = QPushButton("About")
+        about_button.clicked.connect(lambda: self.stacked_widget.setCurrentWidget(self.about))
+        btn_container.addWidget(about_button)
+
+        layout.addLayout(btn_container)
+        layout.addWidget(self.stacked_widget)
+
+        container.setLayout(layout)
+        self.setCentralWidget(container)
+        self.set_background()
+        self.dashboard.refresh_database.connect(self.refresh_all_data)
+        self.notifications.refresh_database.connect(self.refresh_all_data)
+        self.preferences.refresh_database.connect(self.refresh_all_data)
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self.first_paint_ms is None:
+            self.first_paint_ms = (time.perf_counter() - self.started) * 1000
+            # after this paint has been flushed to the screen
+            QTimer.singleShot(0, self.load_data)
+
+    def load_data(self):
+        self.startup_worker = StartupWorker()
+        self.startup_worker.signals.loaded.connect(self.on_data_loaded)
+        self.startup_worker.signals.error.connect(self.on_load_error)
+        QThreadPool.globalInstance().start(self.startup_worker)
+
+    @Slot(dict)
+    def on_data_loaded(self, data):
+        self.event_stats = data["event_stats"]
+        self.alert_stats = data["alert_stats"]
+        self.prefs_sets = data["prefs_sets"]
+        self.dashboard.load_data(self.event_stats, data["event_page"])
+        self.notifications.load_data(self.alert_stats, data["alert_page"])
+        self.preferences.load_data(self.prefs_sets, data["rules"])
+        self.loaded = True
+        # what was written while the data loaded (an import started early)
+        self.refresh_all_data()
+
+        level = "info" if self.first_paint_ms <= FIRST_PAINT_TARGET_MS else "warn"
+        log_activity(level, "startup", source_dir, f"First paint after {self.first_paint_ms:.0f} ms (target {FIRST_PAINT_TARGET_MS} ms), database opened and data loaded in {data['seconds'] * 1000:.0f} ms", "", "MainWindow on_data_loaded")
+        if data["warning"]:
+            QMessageBox.critical(self, "Error", data["warning"])
+
+    @Slot(str)
+    def on_load_error(self, message):
+        QMessageBox.critical(self, "Error", f"Could not load the database: {message}")
+
+    def refresh_all_data(self):
+        # the pages are filled by on_data_loaded first; changes wait for it
+        if not self.loaded:
+            return
+        # only the tables written since the last refresh are re-read
+        changes = take_changes()
+        try:
+            if "event_logs" in changes:
+                self.event_stats = load_event_stats()
+                self.dashboard.update_data(self.event_stats, changes["event_logs"])
+            if "alert_logs" in changes:
+                self.alert_stats = load_alert_stats()
+                self.notifications.update_data(self.alert_stats, changes["alert_logs"])
+            if "preference_settings" in changes:
+                self.prefs_sets = load_prefs_settings()
+                self.preferences.update_prefs(self.prefs_sets)
+            if "alert_rules" in changes:
+                self.preferences.load_rules()
+        except Exception as e:
+            log_activity("error", type(e).__name__, source_dir, f" File: {str(e)}", traceback.format_exc(), "refresh_all_data func")
+            QMessageBox.critical(self, "Error", f"Erorr: {str(e)}")
+            return
+        
+    #! override by QStackedWidget css
+    def set_background(self):
+        img = QPixmap(bg_img_path)
+        scaled_img = img.scaled(self.size(), Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+        palette = QPalette()
+        palette.setBrush(QPalette.Window, QBrush(scaled_img))
+        self.setPalette(palette)
+        self.setAutoFillBackground(True)
+
+    def on_page_changed(self, index):
+        for i in range(self.stacked_widget.count()):
+            widget = self.stacked_widget.widget(i)
+            widget.setVisible(i == index)
+        self.stacked_widget.update()
+
+def run(started):
+    app = QApplication(sys.argv)
+    app.setFont(QFont("Segoe UI", 10))
+    app.aboutToQuit.connect(close_db)
+    win = MainWindow(started)
+    win.setWindowIcon(QIcon(icon_path))
+    win.setWindowTitle("ShieldEye (log analyzer) Desktop")
+    win.resize(1280, 720)
+    win.showMaximized()
+    win.show()
+    sys.exit(app.exec())
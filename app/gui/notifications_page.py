@@ -1,22 +1,22 @@
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLineEdit,
     QTableView, QPushButton, QTextEdit,
-    QSplitter, QMessageBox
+    QSplitter, QMessageBox, QAbstractItemView
 )
-from collections import Counter
-from PySide6.QtCore import QSortFilterProxyModel, Qt, Signal
+from PySide6.QtCore import Qt, QTimer, Signal
 from gui.widgets.card import *
 from utils.db_crud import *
-from gui.widgets.log_table import AlertTableModel
+from gui.widgets.log_table import AlertTableModel, SEARCH_DEBOUNCE_MS
 from utils.dialog_win import *
 
 class Notifications(QWidget):
     refresh_database = Signal()
-    def __init__(self, alert_logs):
+    def __init__(self):
         super().__init__()
         self.setAutoFillBackground(True)
-        self.alert_logs = alert_logs
-        self.filtered_alerts = alert_logs
+        # no alerts to act on until load_data() brings the real stats
+        self.alert_stats = {"total": 0, "levels": {}, "status": {}}
+        self.alert_id = None
 
         self.setWindowTitle("Notifications")
         self.main_layout = QVBoxLayout(self) 
@@ -29,14 +29,9 @@ class Notifications(QWidget):
     def summary_ui(self):
         container = QHBoxLayout()
 
-        stats = Counter(x for l in (self.alert_logs or []) for x in (l["level"], l["status"]))
-        self.info_alert_count = str(stats.get("info", 0))
-        self.warn_alert_count = str(stats.get("warn", 0))
-        self.error_alert_count = str(stats.get("error", 0))
-        self.critical_alert_count = str(stats.get("critical", 0))
-        self.total_alert_count = str(len(self.alert_logs or []))
-        self.read_alert_count = str(stats.get("read", 0))
-        self.unread_alert_count = str(stats.get("unread", 0))
+        # the cards show LOADING_TEXT until refresh_ui() gets the stats
+        self.info_alert_count = self.warn_alert_count = self.error_alert_count = self.critical_alert_count = LOADING_TEXT
+        self.total_alert_count = self.read_alert_count = self.unread_alert_count = LOADING_TEXT
 
         # Log Level Card
         log_level_container = QVBoxLayout()
@@ -58,6 +53,11 @@ class Notifications(QWidget):
         self.read_alert_btn.clicked.connect(self.read_alert_btn_clicked)
         btn_container.addWidget(self.read_alert_btn)
 
+        self.unread_alert_btn = QPushButton("Mark as unread")
+        self.unread_alert_btn.setObjectName("unreadAlertBtn")
+        self.unread_alert_btn.clicked.connect(self.unread_alert_btn_clicked)
+        btn_container.addWidget(self.unread_alert_btn)
+
         self.read_all_alert_btn = QPushButton("Read all")
         self.read_all_alert_btn.setObjectName("readAllAlertBtn")
         self.read_all_alert_btn.clicked.connect(self.read_all_btn_clicked)
@@ -87,27 +87,41 @@ class Notifications(QWidget):
         self.main_layout.addLayout(container)
 
     # table & pane
-    def filter_alerts(self, text):
-        self.proxy.setFilterCaseSensitivity(Qt.CaseInsensitive)
-        self.proxy.setFilterFixedString(text)
+    def filter_alerts(self):
+        self.model.set_search(self.search_box.text())
+        header = self.table.horizontalHeader()
+        header.blockSignals(True)
+        if self.model.sort_field is None:
+            header.setSortIndicator(-1, Qt.AscendingOrder)
+        else:
+            order = Qt.DescendingOrder if self.model.descending else Qt.AscendingOrder
+            header.setSortIndicator(self.model.FIELDS.index(self.model.sort_field), order)
+        header.blockSignals(False)
 
     def table_and_detail_ui(self):
         splitter = QSplitter(Qt.Horizontal)
         
         self.search_box = QLineEdit()
         self.search_box.setPlaceholderText("Search alerts...")
-        self.search_box.textChanged.connect(self.filter_alerts)
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.filter_alerts)
+        self.search_box.textChanged.connect(lambda _: self.search_timer.start())
 
         self.table = QTableView()
-        self.model = AlertTableModel(self.filtered_alerts)
-        
-        self.proxy = QSortFilterProxyModel(self)
-        self.proxy.setSourceModel(self.model)
-        self.proxy.setFilterCaseSensitivity(Qt.CaseInsensitive)
-        self.proxy.setFilterKeyColumn(-1)
-        
-        self.table.setModel(self.proxy)
+        self.model = AlertTableModel()
+        self.table.setModel(self.model)
+        # header clicks re-query the source model with an indexed ORDER BY
+        header = self.table.horizontalHeader()
+        header.setSectionsClickable(True)
+        header.setSortIndicatorShown(True)
+        header.setSortIndicator(self.model.FIELDS.index("timestamp"), Qt.AscendingOrder)
+        header.sortIndicatorChanged.connect(self.model.sort)
         self.table.clicked.connect(self.inspect_alerts)
+        # ctrl/shift-click selects several alerts for the bulk buttons
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.ExtendedSelection)
 
         self.detail = QTextEdit()
         self.detail.setReadOnly(True)
@@ -120,25 +134,34 @@ class Notifications(QWidget):
         self.layout().addWidget(self.search_box)
 
     def inspect_alerts(self, selected_alerts):
-        source_index = self.proxy.mapToSource(selected_alerts)
-        alert = self.filtered_alerts[source_index.row()]
-        alert_dict = dict(alert)
+        alert_dict = self.model.record_at(selected_alerts.row())
         formatted = "\n\n".join(f">> {k}: {v if v is not None else ''}" for k, v in alert_dict.items())
         self.detail.setText(formatted)
         self.alert_id = alert_dict["id"]
 
+    def selected_alert_ids(self):
+        rows = sorted(index.row() for index in self.table.selectionModel().selectedRows())
+        return self.model.ids_at(rows)
+
     def read_alert_btn_clicked(self):
-        if self.alert_logs:
-            id = self.alert_id
-            result = mark_alert_as_read(id)
-            if result:
+        self.mark_selected_alerts("read")
+
+    def unread_alert_btn_clicked(self):
+        self.mark_selected_alerts("unread")
+
+    def mark_selected_alerts(self, status):
+        ids = self.selected_alert_ids()
+        if self.alert_stats["total"] and ids:
+            result = mark_alerts(ids, status)
+            if result is not None:
                 self.refresh_database.emit()
-                QMessageBox.information(self, "Successful", "Alert marked as read")
+                unchanged = f" ({len(ids) - result} already {status})" if result < len(ids) else ""
+                QMessageBox.information(self, "Successful", f"{result} alert(s) marked as {status}{unchanged}")
             return
         QMessageBox.warning(self, "Error", "No alert selected")
 
     def read_all_btn_clicked(self):
-        if self.alert_logs:
+        if self.alert_stats["total"]:
             result = mark_all_alert()
             if result:
                 self.refresh_database.emit()
@@ -147,21 +170,21 @@ class Notifications(QWidget):
         QMessageBox.warning(self, "Error", "No alert detected")
 
     def delete_alert_btn_clicked(self):
-        if self.alert_logs:
-            id = self.alert_id
+        ids = self.selected_alert_ids()
+        if self.alert_stats["total"] and ids:
             title = "Delete Alert"
-            message = f"Are you sure you want to delete alert {id}"
+            message = f"Are you sure you want to delete alert {ids[0]}" if len(ids) == 1 else f"Are you sure you want to delete {len(ids)} alerts"
             dialog = ConfirmDialog(title, message, self)
             if dialog.exec() == QDialog.Accepted:
-                result = delete_alert(id)
-                if result:
+                result = delete_alerts(ids)
+                if result is not None:
                     self.refresh_database.emit()
-                    QMessageBox.information(self, "Successful", f"Alert {id} deleted")
+                    QMessageBox.information(self, "Successful", f"{result} alert(s) deleted")
             return
         QMessageBox.warning(self, "Error", "No alert selected")
         
     def delete_all_alert_btn_clicked(self):
-        if self.alert_logs:
+        if self.alert_stats["total"]:
             title = "Delete All Alert"
             message = f"Are you sure you want to delete all alerts"
             dialog = ConfirmDialog(title, message, self)
@@ -173,22 +196,28 @@ class Notifications(QWidget):
             return
         QMessageBox.warning(self, "Error", "No alert detected")
     
-    def update_data(self, new_alerts):
-        self.alert_logs = new_alerts
-        self.filtered_alerts = new_alerts
-        self.model.refresh_alerts_ui(self.filtered_alerts)
-        self.refresh_ui(self.alert_logs)
+    def load_data(self, new_stats, first_page):
+        """Fills the page with the stats and first table page read at startup."""
+        self.model.show_first_page(first_page)
+        self.refresh_ui(new_stats)
+
+    def update_data(self, new_stats, change=None):
+        if change is None or change["all"] or self.alert_id in change["deleted"]:
+            self.alert_id = None
+        self.model.refresh_alerts_ui(change)
+        self.refresh_ui(new_stats)
     
-    def refresh_ui(self, new_alert_logs=None):
-        self.new_alert_logs = new_alert_logs if new_alert_logs is not None else []
-        stats = Counter(x for l in (self.new_alert_logs or []) for x in (l["level"], l["status"]))
-        self.info_card.update_smallsummarycard_value(stats.get("info", 0))
-        self.warn_card.update_smallsummarycard_value(stats.get("warn", 0))
-        self.error_card.update_smallsummarycard_value(stats.get("info", 0))
-        self.critical_card.update_smallsummarycard_value(stats.get("info", 0))
-        self.total_card.update_summarycard_value(len(self.new_alert_logs or []))
-        self.read_card.update_summarycard_value(stats.get("read", 0))
-        self.unread_card.update_summarycard_value(stats.get("unread", 0))
+    def refresh_ui(self, new_alert_stats):
+        self.alert_stats = new_alert_stats
+        levels = self.alert_stats["levels"]
+        status = self.alert_stats["status"]
+        self.info_card.update_smallsummarycard_value(levels.get("info", 0))
+        self.warn_card.update_smallsummarycard_value(levels.get("warn", 0))
+        self.error_card.update_smallsummarycard_value(levels.get("error", 0))
+        self.critical_card.update_smallsummarycard_value(levels.get("critical", 0))
+        self.total_card.update_summarycard_value(self.alert_stats["total"])
+        self.read_card.update_summarycard_value(status.get("read", 0))
+        self.unread_card.update_summarycard_value(status.get("unread", 0))
     
     # style
     def css_styles(self):
@@ -1,25 +1,32 @@
+import os
 import traceback
 import json
 from datetime import datetime
-from PySide6.QtCore import Signal
+from PySide6.QtCore import Qt, QThreadPool, Signal, Slot
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout,
     QPushButton, QFileDialog, QLabel,
-    QMessageBox, QCheckBox
+    QMessageBox, QCheckBox, QProgressDialog,
+    QDialog, QListWidget, QListWidgetItem
 )
 from utils.db_crud import *
 from utils.check_update import *
+from utils.dialog_win import ConfirmDialog, RuleDialog
+from utils.alert_rules import rule_summary
+from utils.import_worker import ImportWorker
+from utils.backfill_worker import BackfillWorker
+from utils.log_parser import find_log_files
 
 source_dir = "Preferences page"
 
 class Preferences(QWidget):
     refresh_database = Signal()
-    def __init__(self, prefs_sets):
+    def __init__(self):
         super().__init__()
         self.setAutoFillBackground(True)
         self.setWindowTitle("Preferences")
         self.main_layout = QVBoxLayout(self)
-        self.update_prefs(prefs_sets)
+        self.prefs_sets = None
         self.page_ui()
 
     def page_ui(self):
@@ -35,10 +42,34 @@ class Preferences(QWidget):
         self.save_prefs_btn = QPushButton("Save")
         self.save_prefs_btn.clicked.connect(self.prefs_btn_clicked)
 
+        rules_container = QVBoxLayout()
+        rules_btn_container = QHBoxLayout()
+        self.rules_label = QLabel("Alert rules: ")
+        self.rules_label.setStyleSheet("color: white; font-size: 20px; font-weight: bold;")
+        self.rules_list = QListWidget()
+        self.rules_list.setMaximumHeight(160)
+        self.rules_list.itemChanged.connect(self.rule_toggled)
+        self.add_rule_btn = QPushButton("Add Rule")
+        self.add_rule_btn.clicked.connect(self.add_rule_btn_clicked)
+        self.delete_rule_btn = QPushButton("Delete Rule")
+        self.delete_rule_btn.clicked.connect(self.delete_rule_btn_clicked)
+        self.backfill_label = QLabel("")
+        self.cancel_backfill_btn = QPushButton("Stop")
+        self.cancel_backfill_btn.clicked.connect(self.cancel_backfill)
+        self.cancel_backfill_btn.hide()
+        self.backfill_worker = None
+
         self.status_label = QLabel("Status: Ready to Import")
         self.status_label.setStyleSheet("color: white; font-size: 20px; font-weight: bold;")
         self.btn_upload = QPushButton("Upload Logs")
         self.btn_upload.clicked.connect(self.process_json)
+        self.btn_upload_dir = QPushButton("Upload Folder")
+        self.btn_upload_dir.clicked.connect(self.process_directory)
+        self.threadpool = QThreadPool.globalInstance()
+        self.import_worker = None
+        # imports raise alerts from the preferences, so they wait for load_data()
+        self.btn_upload.setEnabled(False)
+        self.btn_upload_dir.setEnabled(False)
 
         alert_prefs_container.addWidget(self.alert_prefs_label)
         alert_prefs_container.addWidget(self.error_check)
@@ -47,14 +78,119 @@ class Preferences(QWidget):
         alert_prefs_container.addWidget(self.save_prefs_btn)
         alert_prefs_container.addSpacing(20)
 
+        rules_btn_container.addWidget(self.add_rule_btn)
+        rules_btn_container.addWidget(self.delete_rule_btn)
+        rules_container.addWidget(self.rules_label)
+        rules_container.addWidget(self.rules_list)
+        rules_container.addLayout(rules_btn_container)
+        backfill_container = QHBoxLayout()
+        backfill_container.addWidget(self.backfill_label, 1)
+        backfill_container.addWidget(self.cancel_backfill_btn)
+        rules_container.addLayout(backfill_container)
+        rules_container.addSpacing(20)
+
         flex_container.addWidget(self.btn_upload)
+        flex_container.addWidget(self.btn_upload_dir)
         flex_container.addWidget(self.status_label)
 
         container.addLayout(alert_prefs_container)
+        container.addLayout(rules_container)
         container.addLayout(flex_container)
 
         container.addStretch(1)
         self.main_layout.addLayout(container)
+
+    def load_data(self, prefs_sets, rules):
+        """Fills the page with the preferences and rules read at startup."""
+        self.update_prefs(prefs_sets)
+        self.load_rules(rules)
+        self.btn_upload.setEnabled(True)
+        self.btn_upload_dir.setEnabled(True)
+
+    def load_rules(self, rules=None):
+        self.rules_list.blockSignals(True)
+        self.rules_list.clear()
+        for rule in fetch_alert_rules() if rules is None else rules:
+            item = QListWidgetItem(f"{rule['name']}  —  {rule_summary(rule)}")
+            item.setData(Qt.UserRole, rule["id"])
+            item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
+            item.setCheckState(Qt.Checked if rule["enabled"] else Qt.Unchecked)
+            self.rules_list.addItem(item)
+        self.rules_list.blockSignals(False)
+
+    def rule_toggled(self, item):
+        enabled = item.checkState() == Qt.Checked
+        if set_alert_rule_enabled(item.data(Qt.UserRole), enabled):
+            self.refresh_database.emit()
+            if enabled:
+                self.start_backfill(self.prefs_sets)
+
+    def add_rule_btn_clicked(self):
+        dialog = RuleDialog(self)
+        if dialog.exec() == QDialog.Accepted:
+            if save_alert_rule(dialog.rule()):
+                self.refresh_database.emit()
+                self.start_backfill(self.prefs_sets)
+                QMessageBox.information(self, "Success", "Alert rule saved, stored events are being checked against it")
+
+    def start_backfill(self, prefs_sets):
+        # a newer rule set replaces a running backfill; what it did stays
+        if self.backfill_worker is not None:
+            self.backfill_worker.cancel()
+        self.backfill_worker = BackfillWorker(prefs_sets)
+        self.backfill_worker.signals.progress.connect(self.on_backfill_progress)
+        self.backfill_worker.signals.finished.connect(self.on_backfill_finished)
+        self.backfill_worker.signals.error.connect(self.on_backfill_error)
+        self.backfill_label.setText("Checking stored events for alerts...")
+        self.cancel_backfill_btn.show()
+        self.threadpool.start(self.backfill_worker)
+
+    def is_current_backfill(self):
+        # signals of a replaced backfill may still be queued
+        return self.backfill_worker is not None and self.sender() is self.backfill_worker.signals
+
+    def cancel_backfill(self):
+        if self.backfill_worker is not None:
+            self.backfill_worker.cancel()
+            self.backfill_label.setText("Stopping alert check...")
+
+    @Slot(dict)
+    def on_backfill_progress(self, info):
+        if not self.is_current_backfill():
+            return
+        percent = f"{info['percent']}%  |  " if info["percent"] >= 0 else ""
+        self.backfill_label.setText(f"Checking stored events: {percent}{info['events']} of {info['total']}  |  {info['alerts']} alert(s)  |  ETA {info['eta']:.0f}s")
+        if info["alerts"]:
+            self.refresh_database.emit()
+
+    @Slot(dict)
+    def on_backfill_finished(self, summary):
+        if not self.is_current_backfill():
+            return
+        self.backfill_worker = None
+        self.cancel_backfill_btn.hide()
+        state = "stopped" if summary["cancelled"] else "done"
+        self.backfill_label.setText(f"Alert check {state}: {summary['events']} events checked, {summary['alerts']} alert(s) created")
+        if summary["alerts"]:
+            self.refresh_database.emit()
+
+    @Slot(str)
+    def on_backfill_error(self, message):
+        if not self.is_current_backfill():
+            return
+        self.backfill_worker = None
+        self.cancel_backfill_btn.hide()
+        self.backfill_label.setText(f"Alert check failed: {message}")
+
+    def delete_rule_btn_clicked(self):
+        item = self.rules_list.currentItem()
+        if item is None:
+            QMessageBox.warning(self, "Error", "No rule selected")
+            return
+        dialog = ConfirmDialog("Delete Rule", f"Are you sure you want to delete rule {item.text()}", self)
+        if dialog.exec() == QDialog.Accepted:
+            if delete_alert_rule(item.data(Qt.UserRole)):
+                self.refresh_database.emit()
     
     def prefs_btn_clicked(self):
         id = str(uuid.uuid4())
@@ -71,105 +207,93 @@ class Preferences(QWidget):
             result = save_prefs_settings(id, timestamp, warn_e_check, error_e_check, critical_e_check)
         
         if result:
+            self.refresh_database.emit()
+            self.start_backfill((warn_e_check, error_e_check, critical_e_check))
             QMessageBox.information(self, "Success", "User preference setting updated")
         
     def process_json(self):
-        self.status_label.setText("Uploading...")
-        file_path, _ = QFileDialog.getOpenFileName(self, "Open Log File", "", "JSON Files (*.json)")
-        if not file_path: return
-
-        try:
-            with open(file_path, "r") as f:
-                data = json.load(f)
-            
-            logs = data if isinstance(data, list) else [data]
-            all_records = []
-            
-            for entry in logs:
-                try:
-                    log_data = (
-                        entry["_id"],
-                        entry["timestamp"]["$date"],
-                        entry["level"],
-                        entry["category"],
-                        entry["event_type"],
-                        entry["source"],
-                        entry["message"],
-                        entry["stack"],
-                        json.dumps(entry["tags"]),
-                        entry["app"]["name"],
-                        entry["app"]["version"],
-                        entry["user"]["id"],
-                        entry["user"]["ip"],
-                        entry["user"]["method"],
-                        entry["user"]["endpoint"],
-                        entry["user"]["status"],
-                        entry["user"]["user_agent"]
-                    )
-                    all_records.append(log_data)
-                except KeyError as e:
-                    log_activity("error", type(e).__name__, source_dir, f"Rejected: Missing key {str(e)}", traceback.format_exc(), "process_json loop")
-                    QMessageBox.warning(self, "Warn", f"Rejected: Missing key {str(e)}.")
-                    self.status_label.setText(f"Rejected: Missing key {str(e)}")
-                    return
-            if all_records:
-                result = append_log(all_records)
-                if result:
-                    QMessageBox.information(self, "Success", f"Appended {len(all_records)} records.")
-                    self.status_label.setText(f"Success: Appended {len(all_records)} records.")
-                    self.refresh_database.emit()
-                    if self.prefs_sets:
-                        self.scan_for_alert(data)
-                    return
-        except Exception as e:
-            log_activity("error", type(e).__name__, source_dir, f"Invalid File: {str(e)}", traceback.format_exc(), "process_json func")
-            QMessageBox.critical(self, "Error", f"Invalid File: {str(e)}")
+        file_paths, _ = QFileDialog.getOpenFileNames(self, "Open Log Files", "", "Log Files (*.json *.jsonl *.ndjson *.zst *.gz *.bz2 *.xz);;All Files (*)")
+        if not file_paths: return
+        self.start_import(file_paths)
+
+    def process_directory(self):
+        directory = QFileDialog.getExistingDirectory(self, "Open Log Folder")
+        if not directory: return
+        file_paths = find_log_files(directory)
+        if not file_paths:
+            QMessageBox.information(self, "Import", "No log files found in the selected folder.")
             return
+        self.start_import(file_paths)
+
+    def start_import(self, file_paths):
+        self.status_label.setText("Uploading...")
+        self.btn_upload.setEnabled(False)
+        self.btn_upload_dir.setEnabled(False)
+        self.imported_records = 0
 
-    def scan_for_alert(self, data):
-        if self.prefs_sets:
-            check_list = {str(k).lower().strip() for k in self.prefs_sets if str(k).strip()}
+        self.progress_bar = QProgressDialog("Importing logs...", "Cancel", 0, 100, self)
+        self.progress_bar.setWindowTitle("Import")
+        self.progress_bar.setMinimumDuration(0)
+        self.progress_bar.setAutoClose(False)
+        self.progress_bar.setAutoReset(False)
+        self.progress_bar.show()
+
+        self.import_worker = ImportWorker(file_paths, self.prefs_sets)
+        self.import_worker.signals.progress.connect(self.on_import_progress)
+        self.import_worker.signals.finished.connect(self.on_import_finished)
+        self.import_worker.signals.error.connect(self.on_import_error)
+        self.progress_bar.canceled.connect(self.cancel_import)
+
+        self.threadpool.start(self.import_worker)
+
+    def cancel_import(self):
+        if self.import_worker is not None:
+            self.import_worker.cancel()
+            self.status_label.setText("Cancelling import...")
+
+    @Slot(dict)
+    def on_import_progress(self, info):
+        self.imported_records = info["records"]
+        if info["percent"] < 0:
+            self.progress_bar.setRange(0, 0)
         else:
-            check_list = set()
-
-        try:
-            alerts = data if isinstance(data, list) else [data]
-            all_alert = []
-            
-            for entry in alerts:
-                level = entry.get("level")
-                if not level:
-                    continue
-                    
-                if level.lower() in check_list:
-                    try:
-                        alert_data = (
-                            str(uuid.uuid4()),
-                            datetime.now(),
-                            entry["level"],
-                            entry["category"],
-                            entry["event_type"],
-                            entry["message"],
-                            entry["_id"],
-                            "unread"
-                        )
-                        all_alert.append(alert_data)
-                    except KeyError as e:
-                        log_activity("error", type(e).__name__, source_dir, f"Rejected: Missing key {str(e)}", traceback.format_exc(), "scan_for_alert loop")
-                        QMessageBox.warning(self, "Warn", f"Rejected: Missing key {str(e)}.")
-                        self.status_label.setText(f"Rejected: Missing key {str(e)}")
-                        return
-            if all_alert:
-                result = create_alert(all_alert)
-                if result:
-                    QMessageBox.information(self, "Success", f"{len(all_alert)} alert(s) created.")
-                    self.status_label.setText(f"Success: {len(all_alert)} alert(s) created.")
-                    self.refresh_database.emit()
-                return
-        except Exception as e:
-            log_activity("error", type(e).__name__, source_dir, f"Invalid Format: {str(e)}", traceback.format_exc(), "scan_for_alert func")
-            QMessageBox.critical(self, "Error", f"Invalid Format: {str(e)}")
-            return
+            self.progress_bar.setValue(info["percent"])
+        files = f"{info['files'][0]} of {info['files'][1]} files  |  " if "files" in info else ""
+        self.progress_bar.setLabelText(
+            f"{files}{info['records']} records  |  {info['records_per_sec']:.0f} records/sec\n"
+            f"{info['bytes_read'] / 1048576:.1f} of {info['total_bytes'] / 1048576:.1f} MB  |  ETA {info['eta']:.0f}s"
+        )
+        self.status_label.setText(f"Uploading... {info['records']} records")
+
+    @Slot(dict)
+    def on_import_finished(self, summary):
+        self.import_worker = None
+        self.progress_bar.close()
+        self.btn_upload.setEnabled(True)
+        self.btn_upload_dir.setEnabled(True)
+        state = "Cancelled" if summary["cancelled"] else "Success"
+        message = f"Appended {summary['inserted']} new records, skipped {summary['duplicates']} duplicates, {summary['alerts']} alert(s) created."
+        if summary["skipped_files"]:
+            message += f"\n{summary['skipped_files']} file(s) had already been imported."
+        if summary.get("failed"):
+            state = "Partial import" if not summary["cancelled"] else state
+            message += f"\n{len(summary['failed'])} of {summary['files']} file(s) failed:\n" + "\n".join(
+                f"{os.path.basename(path)}: {error}" for path, error in summary["failed"].items())
+        self.status_label.setText(f"{state}: {message}")
+        if summary["inserted"]:
+            self.refresh_database.emit()
+        QMessageBox.information(self, state, message)
+
+    @Slot(str)
+    def on_import_error(self, message):
+        self.import_worker = None
+        self.progress_bar.close()
+        self.btn_upload.setEnabled(True)
+        self.btn_upload_dir.setEnabled(True)
+        self.status_label.setText(message)
+        if self.imported_records:
+            self.refresh_database.emit()
+        QMessageBox.critical(self, "Error", f"Invalid File: {message}")
     
     def update_prefs(self, new_prefs_sets):
         self.prefs_sets = new_prefs_sets
\ No newline at end of file
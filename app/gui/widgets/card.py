@@ -3,6 +3,9 @@ from PySide6.QtWidgets import (
 )
 from PySide6.QtCore import Qt
 
+# card value shown until the page's data has loaded
+LOADING_TEXT = "…"
+
 class SummaryCard(QFrame):
     def __init__(self, title, value, color):
         super().__init__()
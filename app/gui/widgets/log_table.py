@@ -1,90 +1,304 @@
+from collections import OrderedDict
 from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex
 from gui.widgets.card import *
+from utils.columnar import ColumnPage
+from utils.db_crud import (
+    PAGE_SIZE, PAGED_TABLES, SORT_COLUMNS, ENCODED_COLUMNS, fetch_page, fetch_rows,
+    count_rows, count_new_rows, max_rowid, fts_query, search_rowids, decode_value
+)
 
-class LogTableModel(QAbstractTableModel):
-    HEADERS = ["Level", "Category", "Source", "Event Type", "Log ID", "Message", "Stack", "Timestamp", "User ID", "IP", "Method", "Endpoint", "Status", "User Agent", "Tags", "App", "Version"]
+MAX_CACHED_PAGES = 20
+# past this many loaded pages a change resets the model instead of re-reading them
+MAX_REBASE_PAGES = 40
+# wait for a pause in typing before querying the search index
+SEARCH_DEBOUNCE_MS = 200
+
+class PagedTableModel(QAbstractTableModel):
+    """Table model that reads its table page by page as the view scrolls.
+
+    Pages are keyset-paginated on (sort field, rowid) and only the last
+    MAX_CACHED_PAGES pages used stay in memory; an evicted page is read again
+    from the keyset position it started at. Sorting re-queries the database
+    with an indexed ORDER BY instead of sorting rows in Python.
+
+    A search restricts the rows to the FTS5 matches. They are listed by
+    relevance until a header is clicked, then sorted by that column.
+
+    Cached pages are ColumnPages holding the rows as read from the table,
+    dictionary-encoded columns still as ids; cells are decoded through the
+    db_crud value cache when they are displayed. Each row's display strings
+    are built once, in column order, the first time any of its cells is
+    painted and are cached alongside the page.
+
+    apply_changes() folds a db_crud change record into the loaded rows with
+    insert/remove/dataChanged notifications, keeping scroll position and
+    selection; it falls back to a reset only when it cannot place a change.
+
+    A new model is empty and does not touch the database: reload() it, or
+    hand it a page read off the GUI thread with show_first_page().
+    """
+    TABLE = None
+    HEADERS = []
+    FIELDS = []
 
-    def __init__(self, event_logs=None):
+    def __init__(self, page_size=PAGE_SIZE, max_cached_pages=MAX_CACHED_PAGES):
         super().__init__()
-        self.event_logs = event_logs if event_logs is not None else []
+        self.page_size = page_size
+        self.max_cached_pages = max_cached_pages
+        self.columns = PAGED_TABLES[self.TABLE]
+        self.field_index = [self.columns.index(f) + 1 for f in self.FIELDS]
+        # positions in a row tuple (rowid first)
+        self.encoded = {self.columns.index(f) + 1 for f in ENCODED_COLUMNS.get(self.TABLE, ())}
+        self.int_columns = {0, self.columns.index("ts_us") + 1} | self.encoded
+        self.sort_field = "timestamp"
+        self.descending = False
+        self.match = None
+        self.ranked = None
+        self.total = self.loaded = 0
+        self.watermark = None
+        self.page_keys = [None]
+        self.pages = OrderedDict()
+
+    def reset_pages(self):
+        self.ranked = None
+        if self.match and self.sort_field is None:
+            self.ranked = search_rowids(self.TABLE, self.match)
+            self.total = len(self.ranked)
+        else:
+            self.total = count_rows(self.TABLE, self.match)
+        self.watermark = max_rowid(self.TABLE)
+        self.loaded = 0
+        self.page_keys = [None]
+        self.pages = OrderedDict()
 
     def rowCount(self, parent=QModelIndex()):
-        return len(self.event_logs)
+        return 0 if parent.isValid() else self.loaded
 
     def columnCount(self, parent=QModelIndex()):
         return len(self.HEADERS)
 
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self.loaded < self.total
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        rows = self.load_page(len(self.page_keys) - 1)
+        if len(rows) < self.page_size:
+            self.total = self.loaded + len(rows)
+        if not rows:
+            return
+        self.beginInsertRows(QModelIndex(), self.loaded, self.loaded + len(rows) - 1)
+        self.loaded += len(rows)
+        self.endInsertRows()
+
+    def load_page(self, page_no):
+        if self.ranked is not None:
+            start = page_no * self.page_size
+            rows = fetch_rows(self.TABLE, self.ranked[start:start + self.page_size], raw=True)
+            next_key = None
+        else:
+            rows = fetch_page(self.TABLE, self.sort_field, self.descending, self.page_keys[page_no], self.page_size, self.match, raw=True)
+            sort_index = self.sort_index()
+            next_key = (rows[-1][sort_index], rows[-1][0]) if rows else None
+        if rows and page_no == len(self.page_keys) - 1:
+            self.page_keys.append(next_key)
+        self.cache_page(page_no, rows)
+        return rows
+
+    def cache_page(self, page_no, rows):
+        self.pages[page_no] = (ColumnPage(rows, len(self.columns) + 1, self.int_columns), [None] * len(rows))
+        self.pages.move_to_end(page_no)
+        while len(self.pages) > self.max_cached_pages:
+            self.pages.popitem(last=False)
+
+    def sort_index(self):
+        """Position in a row tuple of the value the keyset is built on."""
+        return self.columns.index(SORT_COLUMNS.get(self.sort_field, self.sort_field)) + 1
+
+    def page_for(self, row):
+        page_no, offset = divmod(row, self.page_size)
+        page = self.pages.get(page_no)
+        if page is None:
+            self.load_page(page_no)
+            page = self.pages[page_no]
+        else:
+            self.pages.move_to_end(page_no)
+        return page, offset
+
+    def cell(self, page, offset, index):
+        """Value at `index` of a cached row, dictionary ids decoded."""
+        value = page.value(offset, index)
+        return decode_value(value) if index in self.encoded else value
+
+    def row_at(self, row):
+        """The row's (rowid, *columns) tuple as stored, dictionary ids not decoded."""
+        (page, _), offset = self.page_for(row)
+        return page.row(offset) if offset < len(page) else None
+
+    def display_row(self, row):
+        (page, display), offset = self.page_for(row)
+        if offset >= len(page):
+            return None
+        strings = display[offset]
+        if strings is None:
+            values = (self.cell(page, offset, i) for i in self.field_index)
+            strings = display[offset] = tuple("" if v is None else str(v) for v in values)
+        return strings
+
+    def ids_at(self, rows):
+        """The id column of each of `rows`, for acting on a selection."""
+        index = self.columns.index("id") + 1
+        return [values[index] for values in map(self.row_at, rows) if values is not None]
+
+    def record_at(self, row):
+        """The row as a {column: value} dict, for the detail pane."""
+        (page, _), offset = self.page_for(row)
+        if offset >= len(page):
+            return {}
+        return {k: self.cell(page, offset, i) for i, k in enumerate(self.columns, 1) if k not in SORT_COLUMNS.values()}
+
     def data(self, index, role=Qt.DisplayRole):
         if not index.isValid():
             return None
 
-        log = self.event_logs[index.row()]
-        col = index.column()
-
-        if role == Qt.DisplayRole:
-            return str([
-                log["level"],
-                log["category"],
-                log["source"],
-                log["event_type"],
-                log["id"],
-                log["message"],
-                log["stack"],
-                log["timestamp"],
-                log["user_id"],
-                log["user_ip"],
-                log["user_method"],
-                log["user_endpoint"],
-                log["user_status"],
-                log["user_agent"],
-                log["tags"],
-                log["app_name"],
-                log["app_version"]
-            ][col])
+        if role == Qt.DisplayRole or role == Qt.ToolTipRole:
+            strings = self.display_row(index.row())
+            return strings[index.column()] if strings else None
+        return None
+
     def headerData(self, section, orientation, role):
         if role == Qt.DisplayRole and orientation == Qt.Horizontal:
             return self.HEADERS[section]
-    
-    def refresh_event_log_ui(self, new_event_logs=None):
+
+    def sort(self, column, order=Qt.AscendingOrder):
         self.beginResetModel()
-        self.event_logs = new_event_logs if new_event_logs is not None else []
+        if column < 0:
+            self.sort_field = None if self.match else "timestamp"
+        else:
+            self.sort_field = self.FIELDS[column]
+        self.descending = order == Qt.DescendingOrder
+        self.reset_pages()
         self.endResetModel()
 
-class AlertTableModel(QAbstractTableModel):
-    HEADERS = ["Alert_Id", "Level", "Category", "Event Type", "Log ID", "Message", "Timestamp", "Status"]
+    def set_search(self, text):
+        """Restricts the rows to the full-text matches of `text`, ranked by relevance."""
+        self.beginResetModel()
+        self.match = fts_query(text)
+        if self.match:
+            self.sort_field = None
+            self.descending = False
+        elif self.sort_field is None:
+            self.sort_field = "timestamp"
+        self.reset_pages()
+        self.endResetModel()
 
-    def __init__(self, alert_logs=None):
-        super().__init__()
-        self.alert_logs = alert_logs if alert_logs is not None else []
+    def reload(self):
+        self.beginResetModel()
+        self.reset_pages()
+        self.endResetModel()
 
-    def rowCount(self, parent=QModelIndex()):
-        return len(self.alert_logs)
+    def show_first_page(self, first):
+        """Shows a db_crud.fetch_first_page() read elsewhere; re-queries instead if the sort or search changed meanwhile."""
+        if self.match or self.sort_field != "timestamp" or self.descending:
+            self.reload()
+            return
+        watermark, total, rows = first
+        self.beginResetModel()
+        self.ranked = None
+        self.watermark = watermark
+        self.page_keys = [None]
+        self.pages = OrderedDict()
+        if rows:
+            self.page_keys.append((rows[-1][self.sort_index()], rows[-1][0]))
+            self.cache_page(0, rows)
+        self.loaded = len(rows)
+        self.total = total if len(rows) == self.page_size else len(rows)
+        self.endResetModel()
 
-    def columnCount(self, parent=QModelIndex()):
-        return len(self.HEADERS)
+    def cached_rows(self):
+        """Yields (row number, values) for every row held in the page cache."""
+        for page_no, (page, _) in self.pages.items():
+            for offset in range(len(page)):
+                row = page_no * self.page_size + offset
+                if row < self.loaded:
+                    yield row, page.row(offset)
 
-    def data(self, index, role=Qt.DisplayRole):
-        if not index.isValid():
-            return None
+    def rebase(self, loaded):
+        """Re-reads the first `loaded` rows from the start so page boundaries match the table again."""
+        self.page_keys = [None]
+        self.pages = OrderedDict()
+        page_no = 0
+        while page_no * self.page_size < loaded and self.load_page(page_no):
+            page_no += 1
 
-        log = self.alert_logs[index.row()]
-        col = index.column()
-        if role == Qt.DisplayRole:
-            return str([
-                log["id"],
-                log["level"],
-                log["category"],
-                log["event_type"],
-                log["log_id"],
-                log["message"],
-                log["timestamp"],
-                log["status"]
-            ][col])
-    def headerData(self, section, orientation, role):
-        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
-            return self.HEADERS[section]
+    def apply_changes(self, change):
+        if change["all"] or self.ranked is not None or self.loaded > MAX_REBASE_PAGES * self.page_size:
+            self.reload()
+            return
 
-    def refresh_alerts_ui(self, new_alert_logs=None):
-        self.beginResetModel()
-        self.alert_logs = new_alert_logs if new_alert_logs is not None else []
-        self.endResetModel()
\ No newline at end of file
+        removed = sorted((row for row, values in self.cached_rows() if values[1] in change["deleted"]), reverse=True)
+        if len(removed) != len(change["deleted"]):
+            # a deleted row outside the cache cannot be placed
+            self.reload()
+            return
+
+        sort_index = self.sort_index()
+        updated = [(row, values) for row, values in self.cached_rows() if values[1] in change["updated"]]
+        fresh = {values[0]: values for values in fetch_rows(self.TABLE, [values[0] for _, values in updated], raw=True)}
+        for row, values in updated:
+            new_values = fresh.get(values[0])
+            if new_values is None or new_values[sort_index] != values[sort_index]:
+                # the row left the result set or moved in the sort order
+                self.reload()
+                return
+        for row, values in updated:
+            (page, display), offset = self.page_for(row)
+            page.set_row(offset, fresh[values[0]])
+            display[offset] = None
+            self.dataChanged.emit(self.index(row, 0), self.index(row, self.columnCount() - 1))
+
+        last = self.row_at(self.loaded - 1) if self.loaded else None
+        after = (last[sort_index], last[0]) if last else None
+        new_rows, later = count_new_rows(self.TABLE, self.watermark, self.sort_field, self.descending, after, self.match, raw=True)
+        inside = new_rows - later if last else 0
+        self.watermark = max_rowid(self.TABLE)
+        self.total = self.total + new_rows - len(removed)
+
+        if removed or inside:
+            self.rebase(self.loaded - len(removed) + inside)
+            for row in removed:
+                self.beginRemoveRows(QModelIndex(), row, row)
+                self.loaded -= 1
+                self.endRemoveRows()
+            if inside:
+                self.beginInsertRows(QModelIndex(), self.loaded, self.loaded + inside - 1)
+                self.loaded += inside
+                self.endInsertRows()
+            if self.loaded:
+                self.dataChanged.emit(self.index(0, 0), self.index(self.loaded - 1, self.columnCount() - 1))
+
+        if not self.loaded and self.canFetchMore():
+            self.fetchMore()
+
+class LogTableModel(PagedTableModel):
+    TABLE = "event_logs"
+    HEADERS = ["Level", "Category", "Source", "Event Type", "Log ID", "Message", "Stack", "Timestamp", "User ID", "IP", "Method", "Endpoint", "Status", "User Agent", "Tags", "App", "Version"]
+    FIELDS = ["level", "category", "source", "event_type", "id", "message", "stack", "timestamp", "user_id", "user_ip", "user_method", "user_endpoint", "user_status", "user_agent", "tags", "app_name", "app_version"]
+
+    def refresh_event_log_ui(self, change=None):
+        if change is None:
+            self.reload()
+        else:
+            self.apply_changes(change)
+
+class AlertTableModel(PagedTableModel):
+    TABLE = "alert_logs"
+    HEADERS = ["Alert_Id", "Level", "Category", "Event Type", "Log ID", "Message", "Timestamp", "Status"]
+    FIELDS = ["id", "level", "category", "event_type", "log_id", "message", "timestamp", "status"]
+
+    def refresh_alerts_ui(self, change=None):
+        if change is None:
+            self.reload()
+        else:
+            self.apply_changes(change)
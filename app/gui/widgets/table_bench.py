@@ -0,0 +1,99 @@
+import os
+import random
+import secrets
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Scrolling cost of the paged table models, painted on the offscreen QPA
+# platform against a throwaway database. Run from app/:
+#   python -m gui.widgets.table_bench [rows]
+#
+# The view is scrolled down a screen at a time and repainted synchronously:
+# the cold pass reads the pages and builds each row's display strings, the
+# warm pass scrolls back up over rows whose strings are cached. The cell
+# pass calls data() for every cell of the rows scrolled through.
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtCore import Qt
+from PySide6.QtWidgets import QApplication, QTableView
+from utils import db_crud
+from utils.log_parser import format_epoch_us
+from gui.widgets.log_table import LogTableModel
+
+LEVELS = ("info", "warn", "error", "critical")
+CATEGORIES = ("auth", "payment", "network", "storage")
+EVENT_TYPES = ("login_failed", "login", "timeout", "disk_full", "refund")
+
+def use_throwaway_database(directory):
+    db_crud.data_dir = Path(directory)
+    db_crud.STORAGE = db_crud.data_dir / db_crud.DB_NAME
+    db_crud._db_key = secrets.token_hex(32)
+    if db_crud.init_db():
+        raise RuntimeError("Could not create the benchmark database")
+
+def fill(rows, start_us=1767225600 * 1000000):
+    records = []
+    for i in range(rows):
+        ts_us = start_us + i * 1000000
+        records.append((
+            f"bench-{i}", format_epoch_us(ts_us),
+            LEVELS[i % 4], random.choice(CATEGORIES), random.choice(EVENT_TYPES), "api-gateway",
+            f"request {i} finished with code {random.choice((200, 404, 500))}", "Traceback (most recent call last): ...",
+            '["bench", "api"]', "shop", "2.4.1", f"user-{i % 500}", f"10.0.{i % 256}.{i % 7}", "POST",
+            "/api/v1/orders", "500", "Mozilla/5.0", ts_us,
+        ))
+    db_crud.store_event_rows(records)
+
+def frame_times(view, rows):
+    times = []
+    for row in rows:
+        started = time.perf_counter()
+        view.scrollTo(view.model().index(row, 0), QTableView.PositionAtTop)
+        view.viewport().repaint()
+        times.append(time.perf_counter() - started)
+    return times
+
+def summary(times):
+    times = sorted(times)
+    return f"median {statistics.median(times) * 1000:7.2f} ms   p95 {times[int(len(times) * 0.95)] * 1000:7.2f} ms"
+
+def main(rows=20000):
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    with tempfile.TemporaryDirectory() as tmp:
+        use_throwaway_database(tmp)
+        try:
+            fill(rows)
+            model = LogTableModel()
+            model.reload()
+            view = QTableView()
+            view.setModel(model)
+            view.resize(1600, 900)
+            view.show()
+            app.processEvents()
+            visible = max(1, view.viewport().height() // view.verticalHeader().defaultSectionSize())
+            # stay within the page cache, so the warm pass reads nothing
+            last = min(rows, model.page_size * model.max_cached_pages) - visible
+            steps = list(range(0, last, visible))
+            while model.canFetchMore() and model.rowCount() < last + visible:
+                model.fetchMore()
+            # the cold pass reads the pages again, as after a scroll far away
+            model.pages.clear()
+            print(f"{rows} events, {len(steps)} screens of {visible} rows, {model.columnCount()} columns")
+            print(f"cold scroll   {summary(frame_times(view, steps))}")
+            print(f"warm scroll   {summary(frame_times(view, reversed(steps)))}")
+            cells = [model.index(row, column) for row in range(last + visible) for column in range(model.columnCount())]
+            started = time.perf_counter()
+            for index in cells:
+                model.data(index, Qt.DisplayRole)
+            elapsed = time.perf_counter() - started
+            print(f"data()        {elapsed / len(cells) * 1e6:7.2f} us per cell ({len(cells)} cells)")
+            view.close()
+        finally:
+            db_crud.close_db()
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,153 @@
+from PySide6.QtCore import Qt, QDateTime, QPointF, QTimer
+from PySide6.QtCharts import QChart, QChartView, QLineSeries, QDateTimeAxis, QValueAxis
+from PySide6.QtGui import QColor, QPainter
+from utils.db_crud import TIMELINE_RESOLUTIONS, fetch_timeline_bounds, fetch_event_timeline
+
+# a resolution is used when it gives at most this many buckets per pixel
+MAX_BUCKETS_PER_PIXEL = 4
+RANGE_DEBOUNCE_MS = 40
+
+def pick_resolution(span, width):
+    """Finest pre-bucketed resolution that keeps the query within MAX_BUCKETS_PER_PIXEL."""
+    for resolution in TIMELINE_RESOLUTIONS:
+        if span / resolution <= width * MAX_BUCKETS_PER_PIXEL:
+            return resolution
+    return TIMELINE_RESOLUTIONS[-1]
+
+def fill_gaps(buckets, resolution):
+    """Adds zero points around empty buckets so the line drops to 0 between bursts."""
+    points = []
+    previous = None
+    for bucket, count in buckets:
+        if previous is not None and bucket - previous > resolution:
+            points.append((previous + resolution, 0))
+            if bucket - previous > 2 * resolution:
+                points.append((bucket - resolution, 0))
+        points.append((bucket, count))
+        previous = bucket
+    return points
+
+def downsample_minmax(points, start, end, width):
+    """Keeps the min and max point of every pixel column, in time order."""
+    if len(points) <= 2 * width or end <= start:
+        return points
+    span = end - start
+    sampled = []
+    column = None
+    low = high = None
+    for point in points:
+        pixel = int((point[0] - start) * width / span)
+        if pixel != column:
+            if column is not None:
+                sampled.extend(sorted({low, high}))
+            column = pixel
+            low = high = point
+        else:
+            if point[1] < low[1]:
+                low = point
+            if point[1] > high[1]:
+                high = point
+    if column is not None:
+        sampled.extend(sorted({low, high}))
+    return sampled
+
+class TimelineChart(QChartView):
+    """Events-over-time line chart read from the event_timeline buckets.
+
+    Zoom with the mouse wheel or by dragging a range, pan with the arrow
+    keys, right click to zoom out and Home to show everything. Every range
+    change re-queries only the visible range at a resolution matched to the
+    chart width, then reduces it to a min/max pair per pixel.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.series = QLineSeries()
+        self.series.setColor(QColor("#0ea5a0"))
+        self.series.setUseOpenGL(False)
+
+        self.axis_x = QDateTimeAxis()
+        self.axis_x.setFormat("dd MMM yy hh:mm")
+        self.axis_x.setTickCount(5)
+        self.axis_x.setLabelsColor(QColor("#cbd5e1"))
+        self.axis_y = QValueAxis()
+        self.axis_y.setLabelFormat("%d")
+        self.axis_y.setLabelsColor(QColor("#cbd5e1"))
+
+        chart = QChart()
+        chart.addSeries(self.series)
+        chart.addAxis(self.axis_x, Qt.AlignBottom)
+        chart.addAxis(self.axis_y, Qt.AlignLeft)
+        self.series.attachAxis(self.axis_x)
+        self.series.attachAxis(self.axis_y)
+        chart.legend().hide()
+        chart.setBackgroundBrush(QColor("#07102a"))
+        self.setChart(chart)
+        self.setRenderHint(QPainter.Antialiasing)
+        self.setRubberBand(QChartView.HorizontalRubberBand)
+        self.setFocusPolicy(Qt.StrongFocus)
+
+        self.bounds = None
+        self.visible = None
+        self._updating = False
+        self.range_timer = QTimer(self)
+        self.range_timer.setSingleShot(True)
+        self.range_timer.setInterval(RANGE_DEBOUNCE_MS)
+        self.range_timer.timeout.connect(self.load_visible)
+        self.axis_x.rangeChanged.connect(self.on_range_changed)
+        # empty until the owner calls refresh(), once the data has loaded
+
+    def refresh(self):
+        """Reloads the bounds and redraws the visible range (everything if not zoomed)."""
+        self.bounds = fetch_timeline_bounds()
+        if self.bounds is None:
+            self.visible = None
+            self.series.clear()
+            return
+        if self.visible is None:
+            self.visible = (self.bounds[0], self.bounds[1] + TIMELINE_RESOLUTIONS[0])
+        self.load_range(*self.visible)
+
+    def reset_zoom(self):
+        self.visible = None
+        self.refresh()
+
+    def on_range_changed(self, low, high):
+        if self._updating:
+            return
+        self.visible = (low.toSecsSinceEpoch(), high.toSecsSinceEpoch())
+        self.range_timer.start()
+
+    def load_visible(self):
+        if self.visible:
+            self.load_range(*self.visible)
+
+    def load_range(self, start, end):
+        width = max(self.chart().plotArea().width(), 100)
+        resolution = pick_resolution(end - start, width)
+        points = fill_gaps(fetch_event_timeline(start, end, resolution), resolution)
+        points = downsample_minmax(points, start, end, int(width))
+
+        self._updating = True
+        try:
+            self.series.replace([QPointF(bucket * 1000.0, count) for bucket, count in points])
+            self.axis_x.setRange(QDateTime.fromSecsSinceEpoch(int(start)), QDateTime.fromSecsSinceEpoch(int(end)))
+            self.axis_y.setRange(0, max((count for _, count in points), default=0) or 1)
+        finally:
+            self._updating = False
+
+    def wheelEvent(self, event):
+        factor = 0.8 if event.angleDelta().y() > 0 else 1.25
+        self.chart().zoom(factor)
+        event.accept()
+
+    def keyPressEvent(self, event):
+        step = self.chart().plotArea().width() / 10
+        if event.key() == Qt.Key_Left:
+            self.chart().scroll(-step, 0)
+        elif event.key() == Qt.Key_Right:
+            self.chart().scroll(step, 0)
+        elif event.key() == Qt.Key_Home:
+            self.reset_zoom()
+        else:
+            super().keyPressEvent(event)
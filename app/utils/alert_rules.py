@@ -0,0 +1,219 @@
+import hashlib
+import json
+import re
+from collections import OrderedDict, deque
+
+# Alert rules
+#
+# A rule is a row of alert_rules (see migrations.ALERT_RULES_V10): predicates
+# on level, category, event_type, source, tags and a message regex, plus an
+# optional count threshold over a sliding time window, counted per value of
+# one event field ("more than 20 login_failed from one user_ip in 5
+# minutes"). RuleEngine compiles the rules once per import and streams the
+# event records of every batch through them. Rules are indexed by level, so
+# an event only meets the rules that can match it, and a threshold rule keeps
+# at most `threshold` timestamps for each of at most MAX_WINDOW_KEYS group
+# values, so the cost stays linear in the events and the state bounded.
+
+MAX_WINDOW_KEYS = 10000
+# event_logs record fields (EVENT_COLUMNS order) a rule can test or group by
+RECORD_FIELDS = {
+    "level": 2, "category": 3, "event_type": 4, "source": 5, "message": 6, "tags": 8,
+    "app_name": 9, "app_version": 10, "user_id": 11, "user_ip": 12, "user_method": 13,
+    "user_endpoint": 14, "user_status": 15, "user_agent": 16,
+}
+TS_US = 17
+# list columns of alert_rules and the record field each one tests
+LIST_PREDICATES = {"categories": "category", "event_types": "event_type", "sources": "source"}
+GROUP_FIELDS = ("user_ip", "user_id", "source", "category", "event_type", "app_name", "user_endpoint")
+
+def rule_values(value):
+    """Lowercased values of a list column (JSON text or a list), None when it matches anything."""
+    if not value:
+        return None
+    if isinstance(value, str):
+        value = json.loads(value)
+    values = frozenset(str(v).strip().lower() for v in value if str(v).strip())
+    return values or None
+
+def _field_check(index, values):
+    def check(record):
+        value = record[index]
+        return value is not None and str(value).lower() in values
+    return check
+
+def _tags_check(values):
+    def check(record):
+        try:
+            tags = json.loads(record[RECORD_FIELDS["tags"]] or "null")
+        except ValueError:
+            return False
+        if isinstance(tags, str):
+            tags = [tags]
+        elif not isinstance(tags, list):
+            return False
+        return any(str(tag).lower() in values for tag in tags)
+    return check
+
+def _message_check(pattern):
+    search = re.compile(pattern, re.IGNORECASE).search
+    def check(record):
+        message = record[RECORD_FIELDS["message"]]
+        return message is not None and search(message) is not None
+    return check
+
+class WindowCounter:
+    """Counts hits per key and tells which hit raises an alert.
+
+    With a window, a hit fires when it brings the key's count within
+    `window_us` up to `threshold` from below: once per burst, however long
+    the burst lasts. The count has to drop below the threshold again before
+    the key can fire another time. Without a window, every `threshold`-th
+    hit of a key fires.
+
+    Hits are counted in the order they are given, and backfill_alerts
+    (db_crud.rule_backfill_query) counts stored events the same way in
+    ts_us order, so both raise the same alerts for time-ordered events.
+    Only the last `threshold` timestamps of a key are kept, and the least
+    recently hit keys are dropped past MAX_WINDOW_KEYS.
+    """
+
+    def __init__(self, threshold, window_us=None):
+        self.threshold = threshold
+        self.window_us = window_us
+        # key -> [last timestamps, whether the count was at the threshold]
+        self.keys = OrderedDict()
+
+    def hit(self, key, ts_us):
+        state = self.keys.get(key)
+        if state is None:
+            state = self.keys[key] = [deque(maxlen=self.threshold), False]
+            if len(self.keys) > MAX_WINDOW_KEYS:
+                self.keys.popitem(last=False)
+        else:
+            self.keys.move_to_end(key)
+        times = state[0]
+        times.append(ts_us)
+        if self.window_us is None:
+            if len(times) < self.threshold:
+                return False
+            times.clear()
+            return True
+        above = len(times) == self.threshold and ts_us - times[0] <= self.window_us
+        fired = above and not state[1]
+        state[1] = above
+        return fired
+
+class CompiledRule:
+    __slots__ = ("name", "levels", "checks", "counter", "group_index", "window_seconds")
+
+    def __init__(self, rule):
+        self.name = rule.get("name")
+        self.levels = rule_values(rule.get("levels"))
+        checks = []
+        for column, field in LIST_PREDICATES.items():
+            values = rule_values(rule.get(column))
+            if values:
+                checks.append(_field_check(RECORD_FIELDS[field], values))
+        tags = rule_values(rule.get("tags"))
+        if tags:
+            checks.append(_tags_check(tags))
+        # the regex is the slowest test, so it runs last
+        if rule.get("message_regex"):
+            checks.append(_message_check(rule["message_regex"]))
+        self.checks = tuple(checks)
+
+        threshold = max(1, int(rule.get("threshold") or 1))
+        self.window_seconds = rule.get("window_seconds") or None
+        group_by = rule.get("group_by") or None
+        if group_by is not None and group_by not in RECORD_FIELDS:
+            raise ValueError(f"Cannot group by {group_by}")
+        self.group_index = RECORD_FIELDS[group_by] if group_by else None
+        self.counter = None
+        if threshold > 1:
+            self.counter = WindowCounter(threshold, self.window_seconds * 1000000 if self.window_seconds else None)
+
+    def fires(self, record):
+        for check in self.checks:
+            if not check(record):
+                return False
+        if self.counter is None:
+            return True
+        ts_us = record[TS_US]
+        if ts_us is None and self.window_seconds:
+            return False
+        key = record[self.group_index] if self.group_index is not None else None
+        return self.counter.hit(key, ts_us)
+
+    def message(self, record):
+        text = record[RECORD_FIELDS["message"]]
+        if self.name is None:
+            return text
+        if self.counter is None:
+            return f"{self.name}: {text}"
+        group = f" from {record[self.group_index]}" if self.group_index is not None else ""
+        window = f" within {self.window_seconds}s" if self.window_seconds else ""
+        return f"{self.name}: {self.counter.threshold} events{group}{window}; last: {text}"
+
+def rule_summary(rule):
+    """One line describing a rule, e.g. `event_types: login_failed; 20 within 300s per user_ip`."""
+    parts = [f"{column}: {', '.join(sorted(rule_values(rule.get(column))))}" for column in ("levels", *LIST_PREDICATES, "tags") if rule_values(rule.get(column))]
+    if rule.get("message_regex"):
+        parts.append(f"message ~ /{rule['message_regex']}/")
+    threshold = rule.get("threshold") or 1
+    if threshold > 1:
+        count = f"{threshold}" + (f" within {rule['window_seconds']}s" if rule.get("window_seconds") else "")
+        parts.append(count + (f" per {rule['group_by']}" if rule.get("group_by") else ""))
+    return "; ".join(parts) or "every event"
+
+# the fields that decide what a rule raises; ids and enabled flags are not part of it
+RULE_KEYS = ("name", "levels", "categories", "event_types", "sources", "tags", "message_regex", "threshold", "window_seconds", "group_by")
+
+def rules_digest(rules):
+    """sha256 identifying a rule set, to tell whether a backfill checkpoint still applies."""
+    normal = []
+    for rule in rules:
+        normal.append({key: sorted(rule_values(rule.get(key)) or []) if key in ("levels", "tags", *LIST_PREDICATES) else rule.get(key) for key in RULE_KEYS})
+    return hashlib.sha256(json.dumps(normal, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+def level_rule(prefs_sets):
+    """The preference checkboxes as a rule: alert on every event of a selected level (None when none is)."""
+    levels = [str(k).lower().strip() for k in (prefs_sets or []) if k and str(k).strip()]
+    return {"name": None, "levels": levels} if levels else None
+
+class RuleEngine:
+    """Runs event records through compiled rules; a rule that fails to compile is left out and listed in errors."""
+
+    def __init__(self, rules):
+        self.rules = []
+        self.errors = {}
+        for rule in rules:
+            if not rule:
+                continue
+            try:
+                self.rules.append(CompiledRule(rule))
+            except (ValueError, TypeError, re.error) as e:
+                self.errors[rule.get("name") or "level preferences"] = str(e)
+        self.any_level = [rule for rule in self.rules if rule.levels is None]
+        levels = set().union(*(rule.levels for rule in self.rules if rule.levels))
+        self.by_level = {level: [rule for rule in self.rules if rule.levels is None or level in rule.levels] for level in levels}
+
+    def __bool__(self):
+        return bool(self.rules)
+
+    def matches(self, records):
+        """Yields (record, rule) for the records that raise an alert, one alert per record.
+
+        Every candidate rule still sees the record, so the window counts
+        stay right when an earlier rule already fired for it.
+        """
+        by_level, any_level = self.by_level, self.any_level
+        for record in records:
+            level = record[2]
+            rules = by_level.get(str(level).lower(), any_level) if level else any_level
+            fired = None
+            for rule in rules:
+                if rule.fires(record) and fired is None:
+                    fired = rule
+            if fired is not None:
+                yield record, fired
@@ -0,0 +1,53 @@
+import time
+import traceback
+from PySide6.QtCore import QRunnable, QObject, Signal
+from utils.db_crud import log_activity, backfill_alerts, fetch_alert_rules
+from utils.alert_rules import level_rule
+
+source_dir = "alert backfill"
+
+class BackfillSignals(QObject):
+    progress = Signal(dict)
+    finished = Signal(dict)
+    error = Signal(str)
+
+class BackfillWorker(QRunnable):
+    """Raises the alerts the current preferences and rules give for events already stored, off the GUI thread.
+
+    The work is committed slice by slice with its checkpoint, so a cancelled
+    backfill keeps what it did and the next one carries on from there.
+    """
+
+    def __init__(self, prefs_sets):
+        super().__init__()
+        self.prefs_sets = prefs_sets
+        self.signals = BackfillSignals()
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        started = time.monotonic()
+        try:
+            rules = [level_rule(self.prefs_sets), *fetch_alert_rules(enabled_only=True)]
+            on_progress = lambda done, total, alerts: self.signals.progress.emit(self.progress_info(done, total, alerts, started))
+            summary = backfill_alerts(rules, on_progress, lambda: self._cancelled)
+            log_activity("info", "alert backfill", source_dir, f"Checked {summary['events']} events, {summary['alerts']} alert(s) created", "", "BackfillWorker run")
+            self.signals.finished.emit(summary)
+        except Exception as e:
+            log_activity("error", type(e).__name__, source_dir, str(e), traceback.format_exc(), "BackfillWorker run")
+            self.signals.error.emit(str(e))
+
+    def progress_info(self, done, total, alerts, started):
+        elapsed = max(time.monotonic() - started, 1e-6)
+        events_per_sec = done / elapsed
+        eta = (total - done) / events_per_sec if events_per_sec else 0
+        return {
+            "events": done,
+            "total": total,
+            "alerts": alerts,
+            "events_per_sec": events_per_sec,
+            "eta": max(eta, 0),
+            "percent": min(99, int(100 * done / total)) if total else -1,
+        }
@@ -0,0 +1,110 @@
+import os
+from pathlib import Path
+from sqlcipher3 import dbapi2 as sqlite
+
+# SQLCipher settings.
+#
+# The keyring secret (32 random bytes as hex) is used as a raw key, x'...',
+# so opening a connection no longer runs the PBKDF2 passphrase derivation;
+# kdf_iter only matters for files still keyed with a passphrase.
+# cipher_page_size and kdf_iter are part of a file's format, the other
+# settings only of a connection. mmap_size cannot map encrypted pages (they
+# go through the codec); it is kept for profiles on unencrypted builds.
+#
+# This module has no side effects on import, so cipher_bench can use it
+# without touching the keyring or the app's database.
+
+CIPHER_PROFILES = {
+    # SQLCipher 4 defaults: how databases keyed with a passphrase were written
+    "legacy": {"cipher_page_size": 4096, "kdf_iter": 256000, "cipher_memory_security": False, "cache_size": -2000, "mmap_size": 0},
+    "balanced": {"cipher_page_size": 4096, "kdf_iter": 256000, "cipher_memory_security": False, "cache_size": -32000, "mmap_size": 0},
+    # bigger pages read long scans in fewer decrypt calls, at a cost for point lookups
+    "throughput": {"cipher_page_size": 16384, "kdf_iter": 256000, "cipher_memory_security": False, "cache_size": -131072, "mmap_size": 268435456},
+    # wipes freed memory; slower, for machines shared with untrusted users
+    "hardened": {"cipher_page_size": 4096, "kdf_iter": 256000, "cipher_memory_security": True, "cache_size": -8000, "mmap_size": 0},
+}
+FORMAT_SETTINGS = ("cipher_page_size", "kdf_iter")
+
+def raw_key(hex_key):
+    return f"x'{hex_key}'"
+
+def key_pragma(key):
+    # the key is hex (or x'hex'), nothing in it needs escaping
+    return f'PRAGMA key = "{key}"'
+
+def cipher_pragmas(profile, schema=None, format_only=False):
+    """PRAGMA statements applying a profile; for an attached `schema`, run right after ATTACH."""
+    prefix = f"{schema}." if schema else ""
+    pragmas = [f"PRAGMA {prefix}{name} = {int(profile[name])}" for name in FORMAT_SETTINGS]
+    if not format_only:
+        pragmas.append(f"PRAGMA cipher_memory_security = {'ON' if profile['cipher_memory_security'] else 'OFF'}")
+        pragmas.append(f"PRAGMA {prefix}cache_size = {int(profile['cache_size'])}")
+        pragmas.append(f"PRAGMA {prefix}mmap_size = {int(profile['mmap_size'])}")
+    return pragmas
+
+def open_keyed(path, key, profile, **kwargs):
+    conn = sqlite.connect(str(path), **kwargs)
+    conn.execute(key_pragma(key))
+    for pragma in cipher_pragmas(profile):
+        conn.execute(pragma)
+    return conn
+
+def opens_with(path, key, profile):
+    """True if the file at `path` can be read with this key and profile."""
+    try:
+        conn = open_keyed(path, key, profile)
+    except sqlite.DatabaseError:
+        return False
+    try:
+        conn.execute("SELECT count(*) FROM sqlite_master").fetchone()
+        return True
+    except sqlite.DatabaseError:
+        return False
+    finally:
+        conn.close()
+
+def export_copy(path, old_key, old_profile, new_key, new_profile):
+    """Writes a copy of the database at `path` under the new key and profile through sqlcipher_export; returns its path."""
+    copy = path.with_name(path.name + ".rekey")
+    copy.unlink(missing_ok=True)
+    conn = open_keyed(path, old_key, old_profile)
+    try:
+        # fold the WAL into the file, the copy is made from the file alone
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        conn.execute("ATTACH DATABASE ? AS rekeyed KEY ?", (str(copy), new_key))
+        for pragma in cipher_pragmas(new_profile, "rekeyed", format_only=True):
+            conn.execute(pragma)
+        conn.execute("SELECT sqlcipher_export('rekeyed')")
+        version = conn.execute("PRAGMA main.user_version").fetchone()[0]
+        conn.execute(f"PRAGMA rekeyed.user_version = {int(version)}")
+        conn.execute("PRAGMA rekeyed.journal_mode = WAL")
+        conn.execute("DETACH DATABASE rekeyed")
+    except BaseException:
+        conn.close()
+        copy.unlink(missing_ok=True)
+        raise
+    conn.close()
+    return copy
+
+def rekey_files(paths, old_key, old_profile, new_key, new_profile):
+    """Re-encrypts the databases at `paths` with a new key and profile; returns how many were rewritten.
+
+    Every file is copied first and the copies are swapped in only once all of
+    them exist, so a failed export leaves every file as it was. A file that
+    already opens with the new settings is left alone, which lets a rekey
+    interrupted while swapping finish on the next start.
+    """
+    copies = []
+    try:
+        for path in map(Path, paths):
+            if not opens_with(path, new_key, new_profile):
+                copies.append((path, export_copy(path, old_key, old_profile, new_key, new_profile)))
+    except BaseException:
+        for _, copy in copies:
+            copy.unlink(missing_ok=True)
+        raise
+    for path, copy in copies:
+        for suffix in ("-wal", "-shm"):
+            Path(f"{path}{suffix}").unlink(missing_ok=True)
+        os.replace(copy, path)
+    return len(copies)
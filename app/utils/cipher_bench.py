@@ -0,0 +1,71 @@
+import random
+import secrets
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from utils.cipher import CIPHER_PROFILES, raw_key, open_keyed
+
+# Open latency and query throughput of the SQLCipher profiles, measured on a
+# throwaway database. Run from app/:  python -m utils.cipher_bench [rows]
+#
+# "legacy" is opened with the hex passphrase, the way databases were keyed
+# before raw keys, so its open latency includes the PBKDF2 derivation; the
+# other profiles are opened with the raw key.
+
+OPENS = 20
+LOOKUPS = 5000
+LEVELS = ("info", "warn", "error", "critical")
+
+def build(path, key, profile, rows):
+    conn = open_keyed(path, key, profile)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("CREATE TABLE events (id INTEGER PRIMARY KEY, ts_us INTEGER, level TEXT, message TEXT)")
+    conn.execute("CREATE INDEX idx_events_ts ON events(ts_us)")
+    conn.executemany(
+        "INSERT INTO events (ts_us, level, message) VALUES (?, ?, ?)",
+        ((i * 1000, LEVELS[i % 4], f"request {i} finished with code {random.choice((200, 404, 500))}") for i in range(rows)),
+    )
+    conn.commit()
+    conn.close()
+
+def open_latency(path, key, profile):
+    times = []
+    for _ in range(OPENS):
+        started = time.perf_counter()
+        conn = open_keyed(path, key, profile)
+        conn.execute("SELECT count(*) FROM sqlite_master").fetchone()
+        times.append(time.perf_counter() - started)
+        conn.close()
+    return statistics.median(times)
+
+def throughput(path, key, profile, rows):
+    conn = open_keyed(path, key, profile)
+    try:
+        started = time.perf_counter()
+        conn.execute("SELECT level, count(*), sum(length(message)) FROM events GROUP BY level").fetchall()
+        scan = rows / (time.perf_counter() - started)
+        started = time.perf_counter()
+        for _ in range(LOOKUPS):
+            conn.execute("SELECT message FROM events WHERE ts_us = ?", (random.randrange(rows) * 1000,)).fetchone()
+        lookups = LOOKUPS / (time.perf_counter() - started)
+    finally:
+        conn.close()
+    return scan, lookups
+
+def main(rows=200000):
+    hex_key = secrets.token_hex(32)
+    print(f"{rows} rows, median of {OPENS} opens, {LOOKUPS} indexed lookups")
+    print(f"{'profile':<12} {'key':<11} {'open ms':>9} {'scan rows/s':>13} {'lookups/s':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, profile in CIPHER_PROFILES.items():
+            key, kind = (hex_key, "passphrase") if name == "legacy" else (raw_key(hex_key), "raw")
+            path = Path(tmp) / f"{name}.db"
+            build(path, key, profile, rows)
+            latency = open_latency(path, key, profile)
+            scan, lookups = throughput(path, key, profile, rows)
+            print(f"{name:<12} {kind:<11} {latency * 1000:>9.2f} {scan:>13,.0f} {lookups:>11,.0f}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
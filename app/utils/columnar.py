@@ -0,0 +1,80 @@
+from array import array
+
+# Column-wise storage for the pages the table models keep in memory.
+#
+# A page of N rows is kept as one packed sequence per column instead of N
+# tuples of Python objects. Integer columns (rowid, ts_us and the
+# value_dictionary ids) go into 8-byte array('q') slots; text columns are
+# joined into a single string with an array of end offsets, so a cell costs
+# its characters plus 8 bytes instead of a str object. Cells and rows are
+# only turned back into Python objects when they are read.
+
+NULL = -2 ** 63  # stands in for NULL in the packed integer columns
+
+class TextColumn:
+    __slots__ = ("text", "ends", "nulls")
+
+    def __init__(self, values):
+        ends = array("q")
+        nulls = set()
+        end = 0
+        for i, v in enumerate(values):
+            if v is None:
+                nulls.add(i)
+            else:
+                end += len(v)
+            ends.append(end)
+        self.text = "".join(v for v in values if v is not None)
+        self.ends = ends
+        self.nulls = nulls
+
+    def __len__(self):
+        return len(self.ends)
+
+    def __getitem__(self, i):
+        if i in self.nulls:
+            return None
+        return self.text[self.ends[i - 1] if i else 0:self.ends[i]]
+
+def _pack(values, integer):
+    values = list(values)
+    if integer:
+        try:
+            return array("q", [NULL if v is None else v for v in values])
+        except (TypeError, OverflowError):
+            return values
+    if all(v is None or type(v) is str for v in values):
+        return TextColumn(values)
+    # a column mixing types, keep it as SQLite returned it
+    return values
+
+class ColumnPage:
+    __slots__ = ("columns", "int_columns", "length")
+
+    def __init__(self, rows, width, int_columns=()):
+        self.length = len(rows)
+        self.int_columns = int_columns
+        columns = list(zip(*rows)) if rows else [()] * width
+        self.columns = [_pack(col, i in int_columns) for i, col in enumerate(columns)]
+
+    def __len__(self):
+        return self.length
+
+    def value(self, offset, column):
+        values = self.columns[column]
+        v = values[offset]
+        if type(values) is array and v == NULL:
+            return None
+        return v
+
+    def row(self, offset):
+        return tuple(self.value(offset, column) for column in range(len(self.columns)))
+
+    def set_row(self, offset, row):
+        """Replaces one row; the columns it touches are repacked."""
+        for column, v in enumerate(row):
+            if self.value(offset, column) == v:
+                continue
+            values = [self.value(i, column) for i in range(self.length)]
+            values[offset] = v
+            self.columns[column] = _pack(values, column in self.int_columns)
@@ -0,0 +1,88 @@
+import secrets
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from utils.cipher import CIPHER_PROFILES, open_keyed
+from utils.db_crud import ConnectionManager
+
+# Per-call latency of execute_query style reads and writes with a connection
+# opened and keyed for every call (how db_crud worked before the
+# ConnectionManager) and with the manager's long-lived connections, measured
+# on a throwaway database. Run from app/:  python -m utils.connection_bench [calls]
+#
+# Both sides use the hex passphrase and the SQLCipher defaults, the way
+# databases were keyed at the time, so the difference is the reuse alone.
+
+OPENS = 20
+PROFILE = CIPHER_PROFILES["legacy"]
+
+def build(path, key):
+    conn = open_keyed(path, key, PROFILE)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("CREATE TABLE alert_logs (id TEXT PRIMARY KEY, level TEXT, message TEXT, status TEXT)")
+    conn.executemany("INSERT INTO alert_logs VALUES (?, 'warn', 'disk almost full', 'unread')", ((str(i),) for i in range(10000)))
+    conn.commit()
+    conn.close()
+
+def open_latency(path, key):
+    times = []
+    for _ in range(OPENS):
+        started = time.perf_counter()
+        conn = open_keyed(path, key, PROFILE)
+        conn.execute("SELECT count(*) FROM sqlite_master").fetchone()
+        times.append(time.perf_counter() - started)
+        conn.close()
+    return statistics.median(times)
+
+def per_call(path, key, calls):
+    """(read, write) median seconds per call, opening a connection each time."""
+    reads, writes = [], []
+    for i in range(calls):
+        started = time.perf_counter()
+        conn = open_keyed(path, key, PROFILE)
+        conn.execute("SELECT status FROM alert_logs WHERE id = ?", (str(i % 10000),)).fetchone()
+        conn.close()
+        reads.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        conn = open_keyed(path, key, PROFILE)
+        conn.execute("INSERT INTO alert_logs VALUES (?, 'info', 'bench', 'unread')", (str(uuid.uuid4()),))
+        conn.commit()
+        conn.close()
+        writes.append(time.perf_counter() - started)
+    return statistics.median(reads), statistics.median(writes)
+
+def managed_per_call(path, key, calls):
+    """(read, write) median seconds per call through a ConnectionManager."""
+    connections = ConnectionManager(path, key, PROFILE)
+    reads, writes = [], []
+    try:
+        for i in range(calls):
+            started = time.perf_counter()
+            with connections.reader() as conn:
+                conn.execute("SELECT status FROM alert_logs WHERE id = ?", (str(i % 10000),)).fetchone()
+            reads.append(time.perf_counter() - started)
+            started = time.perf_counter()
+            with connections.writer() as conn:
+                conn.execute("INSERT INTO alert_logs VALUES (?, 'info', 'bench', 'unread')", (str(uuid.uuid4()),))
+            writes.append(time.perf_counter() - started)
+    finally:
+        connections.close()
+    return statistics.median(reads), statistics.median(writes)
+
+def main(calls=200):
+    key = secrets.token_hex(32)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "bench.db"
+        build(path, key)
+        print(f"open + key: {open_latency(path, key) * 1000:.2f} ms (median of {OPENS})")
+        print(f"{calls} calls, median per call")
+        print(f"{'connections':<20} {'read ms':>9} {'write ms':>9}")
+        for name, run in (("opened per call", per_call), ("ConnectionManager", managed_per_call)):
+            read, write = run(path, key, calls)
+            print(f"{name:<20} {read * 1000:>9.3f} {write * 1000:>9.3f}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -1,12 +1,28 @@
-from datetime import datetime
+from datetime import datetime, timezone
+import json
 import sqlite3
+import heapq
+from collections import OrderedDict
+from contextlib import contextmanager
+from itertools import chain, islice
 from PySide6.QtCore import QStandardPaths
 from pathlib import Path
+import queue
+import re
+import threading
 import traceback
 import uuid
-import keyring # type: ignore
 import secrets
+import weakref
 from sqlcipher3 import dbapi2 as sqlite
+from utils.migrations import migrate
+from utils.cipher import CIPHER_PROFILES, raw_key, key_pragma, cipher_pragmas, rekey_files
+from utils.log_parser import to_epoch_us
+from utils.alert_rules import CompiledRule, LIST_PREDICATES, rule_values, rules_digest
+from utils.partitions import (
+    Partition, PARTITION_SCHEMA, PARTITION_SCHEMA_VERSION, PARTITION_FILE_GLOB, MAX_ATTACHED_PARTITIONS,
+    UNDATED, month_of, month_range, split_rowid, time_order
+)
 
 source_dir = "database crud"
 
@@ -17,140 +33,827 @@ APP_VERSION = "1.0.0"
 # --- DATABASE ---
 DB_NAME = "shield_eye_database.db"
 REQUIRED_SQLITE_VERSION = (3, 50, 2)
+MAX_READER_CONNECTIONS = 4
+BUSY_TIMEOUT_MS = 5000
+
+# --- ACTIVITY LOG ---
+ACTIVITY_FLUSH_INTERVAL = 2.0  # seconds
+ACTIVITY_FLUSH_SIZE = 500
 
     # development mode
 # current_dir = Path(__file__).resolve().parent 
 # STORAGE = current_dir.parent / "storage" / DB_NAME
 
     # production mode
+# The path is resolved at import, before the QApplication sets the
+# application name, so it stays where existing databases are; the directory
+# is created with the first connection.
 data_dir = Path(
     QStandardPaths.writableLocation(QStandardPaths.AppDataLocation)
 )
-data_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
 STORAGE = data_dir / DB_NAME
 
 # --- PRAGMA KEY ---
+# Looked up with the first connection, not at import: the keyring backend can
+# take a while to answer (or ask to be unlocked), and the window should paint
+# first. The import pool's processes re-import this module and never need it.
 APPNAME = "ShieldEyeDesktop"
-db_key = keyring.get_password(APPNAME, "db_encryption_key")
-if not db_key:
-    db_key = secrets.token_hex(32)
-    keyring.set_password(APPNAME, "db_encryption_key", db_key)
+_db_key = None
 
-def init_db():
-        try:
-            """Creates the schema if it doesn't exist."""
-            
-            global STORAGE
-            conn = sqlite.connect(STORAGE)
-            conn.execute(f"PRAGMA key = '{db_key}';")
-            cursor = conn.cursor()
-
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS event_logs (
-                    id TEXT PRIMARY KEY,
-                    timestamp TEXT,
-                    level TEXT,
-                    category TEXT,
-                    event_type TEXT,
-                    source TEXT,
-                    message TEXT,
-                    stack TEXT,
-                    tags TEXT,
-                    app_name TEXT,
-                    app_version TEXT,
-                    user_id TEXT,
-                    user_ip TEXT,
-                    user_method TEXT,
-                    user_endpoint TEXT,
-                    user_status TEXT,
-                    user_agent TEXT
-                )
-            """)
-
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS alert_logs (
-                    id TEXT PRIMARY KEY,
-                    timestamp TEXT,
-                    level TEXT,
-                    category TEXT,
-                    event_type TEXT,
-                    message TEXT,
-                    log_id TEXT,
-                    status TEXT
-                )
-            """)
-
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS preference_settings (
-                    id TEXT PRIMARY KEY,
-                    timestamp TEXT,
-                    warn TEXT,
-                    error TEXT,
-                    critical TEXT
-                )
-            """)
-
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS activity_logs (
-                    id TEXT PRIMARY KEY,
-                    timestamp TEXT,
-                    level TEXT,
-                    event_type TEXT,
-                    source TEXT,
-                    message TEXT,
-                    stack TEXT,
-                    tags TEXT,
-                    app_name TEXT,
-                    app_version TEXT
-                );
-            """)
-
-            conn.commit()
+def database_key():
+    """The database key from the keyring, created on the first run. Called under _connections_lock."""
+    global _db_key
+    if _db_key is None:
+        import keyring # type: ignore
+        key = keyring.get_password(APPNAME, "db_encryption_key")
+        if not key:
+            key = secrets.token_hex(32)
+            keyring.set_password(APPNAME, "db_encryption_key", key)
+        _db_key = key
+    return _db_key
+
+# --- CIPHER ---
+# The SQLCipher settings the database and its partitions are kept in (see
+# utils/cipher.py). CIPHER_STATE_FILE records the key format and profile the
+# files were written with; when they differ from these, the files are
+# re-encrypted on the next start, before the first connection is opened.
+CIPHER_PROFILE = "balanced"
+CIPHER_STATE_FILE = "cipher.json"
+
+# --- CONNECTIONS ---
+class _ReaderOwner:
+    """Kept in a thread's local storage; its finalizer closes the thread's reader."""
+    __slots__ = ("__weakref__",)
+
+class ConnectionManager:
+    """Long-lived keyed connections: one writer plus thread-affine readers.
+
+    Opening a keyed connection costs a key setup (a full PBKDF2 derivation
+    for a passphrase key), so the connections are opened once and reused.
+    Writes are serialised through the single writer connection; every thread
+    that reads (the GUI thread and the QThreadPool workers) gets its own
+    reader, up to MAX_READER_CONNECTIONS.
+    Threads past that limit share the writer under its lock. A reader is
+    closed when its thread's local storage goes away; QThreadPool threads are
+    not listed by threading.enumerate(), so that cannot tell which are alive.
+
+    Event partitions are attached to each connection as they are needed and
+    stay attached, up to MAX_ATTACHED_PARTITIONS per connection.
+    """
+
+    def __init__(self, path, key, cipher=CIPHER_PROFILES[CIPHER_PROFILE], max_readers=MAX_READER_CONNECTIONS):
+        self.path = path
+        self.key = key
+        self.cipher = cipher
+        self.max_readers = max_readers
+        self._writer = None
+        self._writer_lock = threading.RLock()
+        self._writer_depth = 0
+        self._readers = {}
+        # RLock: a reader's finalizer may run on a thread that holds it
+        self._readers_lock = threading.RLock()
+        self._local = threading.local()
+        # schemas attached to each connection, least recently used first
+        self._attached = {}
+        # called after the writer rolls a transaction back
+        self.rollback_listeners = []
+
+    def _open(self, readonly=False):
+        conn = sqlite.connect(str(self.path), check_same_thread=False)
+        conn.execute(key_pragma(self.key))
+        for pragma in cipher_pragmas(self.cipher):
+            conn.execute(pragma)
+        conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS};")
+        if readonly:
+            conn.execute("PRAGMA query_only = ON;")
+        else:
+            # WAL lets the readers keep reading while the writer commits
+            conn.execute("PRAGMA journal_mode = WAL;")
+            conn.execute("PRAGMA synchronous = NORMAL;")
+        return conn
+
+    def _get_writer(self):
+        if self._writer is None:
+            self._writer = self._open()
+        return self._writer
+
+    def _get_reader(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+        ident = threading.get_ident()
+        with self._readers_lock:
+            # an ident still listed belongs to a finished thread whose locals are not cleared yet
+            stale = self._readers.pop(ident, None)
+            if stale is not None:
+                self._close_reader(ident, stale)
+            if len(self._readers) >= self.max_readers:
+                return None
+            conn = self._open(readonly=True)
+            self._readers[ident] = conn
+        owner = _ReaderOwner()
+        weakref.finalize(owner, self._close_reader, ident, conn)
+        self._local.owner = owner
+        self._local.conn = conn
+        return conn
+
+    def _close_reader(self, ident, conn):
+        with self._readers_lock:
+            if self._readers.get(ident) is conn:
+                del self._readers[ident]
+            self._attached.pop(id(conn), None)
+        conn.close()
+
+    @contextmanager
+    def writer(self):
+        """Yields the writer connection and commits (or rolls back) on exit.
+
+        Nested writer() blocks on the same thread join the outer transaction;
+        only the outermost block commits.
+        """
+        with self._writer_lock:
+            conn = self._get_writer()
+            self._writer_depth += 1
+            try:
+                yield conn
+                if self._writer_depth == 1:
+                    conn.commit()
+            except BaseException:
+                if self._writer_depth == 1:
+                    conn.rollback()
+                    for listener in self.rollback_listeners:
+                        listener()
+                raise
+            finally:
+                self._writer_depth -= 1
+
+    @contextmanager
+    def reader(self):
+        conn = self._get_reader()
+        if conn is not None:
+            yield conn
             return
-        except sqlite3.Error as e:
-            return "An error occured while initialing database!"
+        with self._writer_lock:
+            yield self._get_writer()
+
+    def attach(self, conn, schema, path):
+        """Attaches the database at `path` to `conn` as `schema`; True if it was not attached yet.
+
+        The least recently used schema is detached when the connection is
+        full. SQLite cannot attach or detach inside a transaction, so writers
+        attach everything they need before they start writing.
+        """
+        attached = self._attached.setdefault(id(conn), OrderedDict())
+        if schema in attached:
+            attached.move_to_end(schema)
+            return False
+        while len(attached) >= MAX_ATTACHED_PARTITIONS:
+            oldest = next(iter(attached))
+            conn.execute(f"DETACH DATABASE {oldest}")
+            del attached[oldest]
+        conn.execute(f"ATTACH DATABASE ? AS {schema} KEY ?", (str(path), self.key))
+        for pragma in cipher_pragmas(self.cipher, schema, format_only=True):
+            conn.execute(pragma)
+        attached[schema] = path
+        return True
+
+    def detach(self, conn, keep):
+        """Detaches from `conn` every attached schema not in `keep`."""
+        attached = self._attached.get(id(conn), {})
+        for schema in [s for s in attached if s not in keep]:
+            conn.execute(f"DETACH DATABASE {schema}")
+            del attached[schema]
+
+    def close(self):
+        with self._readers_lock:
+            for conn in self._readers.values():
+                conn.close()
+            self._readers.clear()
+            self._attached.clear()
+        with self._writer_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        self._local = threading.local()
+
+_connections = None
+_connections_lock = threading.Lock()
+
+def get_connections():
+    global _connections
+    if _connections is None:
+        with _connections_lock:
+            if _connections is None:
+                data_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+                _connections = ConnectionManager(STORAGE, *cipher_settings())
+                _connections.rollback_listeners.append(_value_dictionary.clear)
+    return _connections
+
+def _cipher_key(state):
+    return raw_key(database_key()) if state["key_format"] == "raw" else database_key()
+
+def cipher_settings():
+    """(key, profile) to open the database with, re-encrypting the files first when they use other settings.
+
+    A database without a state file predates raw keys: it was keyed with the
+    hex passphrase and SQLCipher's defaults. If the re-encryption fails the
+    files are left as they were and opened with the settings they have.
+    """
+    state_file = data_dir / CIPHER_STATE_FILE
+    target = {"key_format": "raw", "profile": CIPHER_PROFILE}
+    try:
+        state = json.loads(state_file.read_text())
+        CIPHER_PROFILES[state["profile"]]
+    except (OSError, ValueError, KeyError, TypeError):
+        state = {"key_format": "passphrase", "profile": "legacy"} if STORAGE.exists() else target
+    if state != target:
+        paths = [*sorted(data_dir.glob(PARTITION_FILE_GLOB)), STORAGE]
+        try:
+            rekeyed = rekey_files(paths, _cipher_key(state), CIPHER_PROFILES[state["profile"]], _cipher_key(target), CIPHER_PROFILES[CIPHER_PROFILE])
+        except (sqlite.Error, OSError) as e:
+            log_activity("error", type(e).__name__, source_dir, f"Re-encrypting the database failed: {e}", traceback.format_exc(), "cipher_settings func")
+            return _cipher_key(state), CIPHER_PROFILES[state["profile"]]
+        log_activity("info", "database cipher", source_dir, f"Re-encrypted {rekeyed} database file(s) with the {CIPHER_PROFILE} cipher profile ({target['key_format']} key)", "", "cipher_settings func")
+    if state != target or not state_file.exists():
+        state_file.write_text(json.dumps(target))
+    return _cipher_key(target), CIPHER_PROFILES[CIPHER_PROFILE]
+
+def optimize_db():
+    """Lets SQLite refresh the planner statistics that have gone stale (after imports and on exit)."""
+    try:
+        with get_connections().writer() as conn:
+            conn.execute("PRAGMA optimize")
+    except sqlite.Error as e:
+        log_activity("error", type(e).__name__, source_dir, f"Database error: {e}", traceback.format_exc(), "optimize_db func")
+
+def close_db():
+    global _connections
+    if _connections is not None:
+        optimize_db()
+    # after optimize_db, whose failure is logged: a log_activity past close()
+    # would start the flusher again and reopen the connections
+    _activity_writer.close()
+    if _connections is not None:
+        _connections.close()
+        _connections = None
+
+def init_db():
+    """Creates the schema if it doesn't exist and applies pending migrations."""
+    try:
+        with get_connections().writer() as conn:
+            old_version, new_version = migrate(conn)
+            moved = adopt_legacy_events(conn)
+        if new_version != old_version:
+            log_activity("info", "schema migration", source_dir, f"Upgraded database schema from v{old_version} to v{new_version}", "", "init_db func")
+        if moved:
+            log_activity("info", "schema migration", source_dir, f"Moved {moved} event logs into month partitions", "", "init_db func")
+        sweep_partition_files()
+        return
+    except (sqlite.Error, RuntimeError) as e:
+        log_activity("error", type(e).__name__, source_dir, f"Database migration failed: {e}", traceback.format_exc(), "init_db func")
+        return "An error occured while initialing database!"
 
 def execute_query(query, params=(), fetchone=False, fetchall=False, bulkyinsert=False, dict_data = False):
     try:
-        global STORAGE
-        conn = sqlite.connect(STORAGE)
-        conn.execute(f"PRAGMA key = '{db_key}';")
-        if dict_data:
-            conn.row_factory = sqlite.Row
-        cursor = conn.cursor()
-        cursor.execute(f"PRAGMA key = '{db_key}';")
-        if bulkyinsert:
-            cursor.executemany(query, params)
-        else:
-            cursor.execute(query, params)
-        if fetchone:
-            result = cursor.fetchone()
-        elif fetchall:
-            result = cursor.fetchall()
-        else:
-            conn.commit()
-            result = True
-        conn.close()
-        return result
-    except sqlite3.Error as e:
+        connections = get_connections()
+        if fetchone or fetchall:
+            with connections.reader() as conn:
+                cursor = conn.cursor()
+                if dict_data:
+                    cursor.row_factory = sqlite.Row
+                cursor.execute(query, params)
+                result = cursor.fetchone() if fetchone else cursor.fetchall()
+                cursor.close()
+            return result
+        with connections.writer() as conn:
+            if bulkyinsert:
+                conn.executemany(query, params)
+            else:
+                conn.execute(query, params)
+        return True
+    except sqlite.Error as e:
         log_activity("error", type(e).__name__, source_dir, f"Database error: {e}", traceback.format_exc(), "execute_query func")
 
+ACTIVITY_INSERT_QUERY = "INSERT INTO activity_logs (id, timestamp, level, event_type, source, message, stack, tags, app_name, app_version) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+
+class ActivityLogWriter:
+    """Buffers activity_logs rows and writes them in batches from one thread.
+
+    log() only enqueues. The flusher thread writes the queue every
+    ACTIVITY_FLUSH_INTERVAL seconds, or sooner once ACTIVITY_FLUSH_SIZE rows
+    are waiting. close() stops the thread and writes whatever is left.
+    """
+
+    def __init__(self, interval=ACTIVITY_FLUSH_INTERVAL, flush_size=ACTIVITY_FLUSH_SIZE):
+        self.interval = interval
+        self.flush_size = flush_size
+        self._queue = queue.SimpleQueue()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def log(self, record):
+        self._queue.put(record)
+        if self._thread is None:
+            self._start()
+        if self._queue.qsize() >= self.flush_size:
+            self._wake.set()
+
+    def _start(self):
+        with self._start_lock:
+            if self._thread is None and not self._stop.is_set():
+                self._thread = threading.Thread(target=self._run, name="activity-log-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        rows = []
+        while True:
+            try:
+                rows.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if not rows:
+            return
+        try:
+            with get_connections().writer() as conn:
+                conn.executemany(ACTIVITY_INSERT_QUERY, rows)
+        except sqlite.Error:
+            # nowhere left to log the failure of the logger itself
+            traceback.print_exc()
+
+    def close(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+        self._stop.clear()
+
+_activity_writer = ActivityLogWriter()
+
 def log_activity(level, event_type, source, message, stack, tags):
-    global STORAGE
     id = str(uuid.uuid4())
     timestamp = datetime.now()
     app_name = APP_NAME
     app_version = APP_VERSION
-    query = "INSERT INTO activity_logs (id, timestamp, level, event_type, source, message, stack, tags, app_name, app_version) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
-    params = (id, timestamp, level, event_type, source, message, stack, tags, app_name, app_version)
-    execute_query(query, params)
+    _activity_writer.log((id, timestamp, level, event_type, source, message, stack, tags, app_name, app_version))
+
+# CHANGE TRACKING
+# Every write helper records what it changed; MainWindow.refresh_all_data takes
+# the record and refreshes only the tables, and rows, that actually changed.
+# New rows are not listed: the models find them through their rowid watermark.
+_changes = {}
+_changes_lock = threading.Lock()
+
+def mark_changed(table, updated=(), deleted=(), everything=False):
+    with _changes_lock:
+        change = _changes.setdefault(table, {"updated": set(), "deleted": set(), "all": False})
+        change["updated"].update(updated)
+        change["deleted"].update(deleted)
+        change["all"] = change["all"] or everything
+
+def take_changes():
+    """Returns {table: change} for every table written since the last call."""
+    global _changes
+    with _changes_lock:
+        changes, _changes = _changes, {}
+    return changes
+
+# VALUE DICTIONARY
+# event_logs columns stored as value_dictionary ids (see migrations.DICTIONARY_V7)
+ENCODED_FIELDS = ("level", "category", "event_type", "source", "app_name", "app_version", "user_method", "user_agent")
+ENCODED_COLUMNS = {"event_logs": ENCODED_FIELDS}
+
+class ValueDictionary:
+    """In-process id<->string cache over the value_dictionary table.
+
+    Encoding happens on the writer connection, inside the caller's
+    transaction, so a value first seen in a batch is added together with the
+    batch. A rollback may take those ids with it, so the cache is cleared
+    after every rollback and reloaded on the next miss.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.ids = {}
+        self.values = {}
+
+    def clear(self):
+        with self._lock:
+            self.ids = {}
+            self.values = {}
+
+    def load(self, conn):
+        rows = conn.execute("SELECT id, field, value FROM value_dictionary").fetchall()
+        with self._lock:
+            self.ids = {(field, value): id for id, field, value in rows}
+            self.values = {id: value for id, _, value in rows}
+
+    def encode(self, conn, field, value):
+        """Id of `value`, adding it to value_dictionary on `conn` when it is new."""
+        if value is None:
+            return None
+        key = (field, str(value))
+        id = self.ids.get(key)
+        if id is None:
+            conn.execute("INSERT OR IGNORE INTO value_dictionary (field, value) VALUES (?, ?)", key)
+            id = conn.execute("SELECT id FROM value_dictionary WHERE field = ? AND value = ?", key).fetchone()[0]
+            with self._lock:
+                self.ids[key] = id
+                self.values[id] = key[1]
+        return id
+
+    def decode(self, id):
+        if id is None:
+            return None
+        if id not in self.values:
+            with get_connections().reader() as conn:
+                self.load(conn)
+        return self.values.get(id)
+
+_value_dictionary = ValueDictionary()
+
+def encode_event_rows(rows):
+    """event_logs rows (EVENT_COLUMNS order) with the ENCODED_FIELDS strings swapped for ids."""
+    positions = [(EVENT_COLUMNS.index(field), field) for field in ENCODED_FIELDS]
+    encode = _value_dictionary.encode
+    encoded = []
+    with get_connections().writer() as conn:
+        for row in rows:
+            row = list(row)
+            for i, field in positions:
+                row[i] = encode(conn, field, row[i])
+            encoded.append(tuple(row))
+    return encoded
+
+def decode_value(id):
+    """String for a value_dictionary id (None stays None)."""
+    values = _value_dictionary.values
+    return values[id] if id in values else _value_dictionary.decode(id)
+
+def decode_rows(table, rows):
+    """Paged rows ((rowid, *columns) tuples) with dictionary ids turned back into strings."""
+    if table not in ENCODED_COLUMNS or not rows:
+        return rows
+    positions = [PAGED_TABLES[table].index(field) + 1 for field in ENCODED_COLUMNS[table]]
+    decode = _value_dictionary.decode
+    values = _value_dictionary.values
+    decoded = []
+    for row in rows:
+        row = list(row)
+        for i in positions:
+            id = row[i]
+            if id is not None:
+                row[i] = values[id] if id in values else decode(id)
+        decoded.append(tuple(row))
+    return decoded
+
+def decode_sort_key(table, order_by, after):
+    """Turns the stored id of a raw keyset position into the string an encoded column sorts by."""
+    if after is None or order_by not in ENCODED_COLUMNS.get(table, ()):
+        return after
+    value, rowid = after
+    return (decode_value(value), rowid)
+
+# PARTITIONS
+# event_logs is stored in month partition files (see utils.partitions). The
+# helpers below keep the catalog, attach partitions on demand and run a
+# query against each partition a read or a write touches, in month order.
+PARTITIONED_TABLES = {"event_logs"}
+# keeps each partition's copy of value_dictionary in step with main
+DICTIONARY_SYNC_QUERY = "INSERT OR REPLACE INTO {db}.value_dictionary (id, field, value) SELECT id, field, value FROM main.value_dictionary WHERE id > (SELECT IFNULL(MAX(id), 0) FROM {db}.value_dictionary)"
+
+_partitions = None
+_partitions_version = 0
+_partitions_lock = threading.Lock()
+
+def _reset_partitions():
+    global _partitions, _partitions_version
+    with _partitions_lock:
+        _partitions = None
+        _partitions_version += 1
+
+def event_partitions(start_us=None, end_us=None, descending=False):
+    """Catalogued partitions that may hold events between start_us and end_us, in ts_us order."""
+    global _partitions
+    partitions = _partitions
+    if partitions is None:
+        version = _partitions_version
+        rows = execute_query("SELECT id, month, start_us, end_us FROM event_partitions", (), False, True)
+        if rows is None:
+            return []
+        partitions = [Partition(*row) for row in rows]
+        with _partitions_lock:
+            if version == _partitions_version:
+                _partitions = partitions
+    if start_us is not None or end_us is not None:
+        partitions = [p for p in partitions if p.overlaps(start_us, end_us)]
+    return time_order(partitions, descending)
+
+def table_sources(table, start_us=None, end_us=None, descending=False):
+    """Where `table` is read from: its partitions in ts_us order, or [None] for a table in main."""
+    if table in PARTITIONED_TABLES:
+        return event_partitions(start_us, end_us, descending)
+    return [None]
+
+def use_partition(conn, partition, write=False):
+    """Attaches `partition` to `conn`, False if its file is missing.
+
+    Partitions dropped since the connection last used one are detached
+    first. With `write` (writer only, outside a transaction) a missing file
+    is created with the partition schema.
+    """
+    connections = get_connections()
+    connections.detach(conn, {p.schema for p in event_partitions()} | {partition.schema})
+    path = data_dir / partition.file
+    if not write and not path.exists():
+        return False
+    if connections.attach(conn, partition.schema, path) and write:
+        schema = partition.schema
+        conn.execute(f"PRAGMA {schema}.synchronous = NORMAL")
+        if conn.execute(f"PRAGMA {schema}.user_version").fetchone()[0] < PARTITION_SCHEMA_VERSION:
+            conn.execute(f"PRAGMA {schema}.journal_mode = WAL")
+            conn.execute("BEGIN")
+            try:
+                for statement in PARTITION_SCHEMA:
+                    conn.execute(statement.format(schema=schema))
+                conn.execute(f"PRAGMA {schema}.user_version = {PARTITION_SCHEMA_VERSION}")
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+    return True
+
+def _new_partition(conn, month):
+    # the file is set up before the catalog lists it, so readers never find it half made
+    seq = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'event_partitions'").fetchone()
+    start_us, end_us = month_range(month)
+    partition = Partition((seq[0] if seq else 0) + 1, month, start_us, end_us)
+    use_partition(conn, partition, write=True)
+    conn.execute("INSERT INTO event_partitions (id, month, start_us, end_us) VALUES (?, ?, ?, ?)", partition)
+    conn.commit()
+    _reset_partitions()
+    return partition
+
+def attach_event_partitions(conn, months):
+    """Attaches the partitions for `months` to the writer, creating the new ones; returns {month: Partition}.
+
+    Must run before the writer's transaction starts writing.
+    """
+    if len(months) > MAX_ATTACHED_PARTITIONS:
+        raise ValueError(f"Cannot write {len(months)} partitions at once (max {MAX_ATTACHED_PARTITIONS})")
+    known = {p.month: p for p in event_partitions()}
+    partitions = {}
+    for month in months:
+        partition = known.get(month)
+        if partition is None:
+            partition = _new_partition(conn, month)
+        else:
+            use_partition(conn, partition, write=True)
+        partitions[month] = partition
+    return partitions
+
+def insert_event_rows(conn, rows, partitions, inserted_ids=None):
+    """Inserts encoded event_logs rows into their partitions (from attach_event_partitions); returns the number inserted.
+
+    With `inserted_ids` (a set), the ids of the rows actually inserted are
+    added to it; INSERT OR IGNORE skips the ids already stored.
+    """
+    groups = {}
+    for row in rows:
+        groups.setdefault(month_of(row[-1]), []).append(row)
+    inserted = 0
+    for month, group in groups.items():
+        schema = partitions[month].schema
+        # the partition's triggers decode through its own copy of the dictionary
+        conn.execute(DICTIONARY_SYNC_QUERY.format(db=schema))
+        if inserted_ids is not None:
+            top = conn.execute(f"SELECT IFNULL(MAX(rowid), 0) FROM {schema}.event_logs").fetchone()[0]
+        inserted += conn.executemany(EVENT_INSERT_QUERY.format(db=schema), group).rowcount
+        if inserted_ids is not None:
+            # new rows always get a rowid above the highest one
+            inserted_ids.update(id for (id,) in conn.execute(f"SELECT id FROM {schema}.event_logs WHERE rowid > ?", (top,)))
+    return inserted
+
+def store_event_rows(rows):
+    """Encodes and inserts event_logs rows, one writer transaction per MAX_ATTACHED_PARTITIONS months."""
+    groups = {}
+    for row in rows:
+        groups.setdefault(month_of(row[-1]), []).append(row)
+    months = list(groups)
+    inserted = 0
+    for i in range(0, len(months), MAX_ATTACHED_PARTITIONS):
+        chunk = months[i:i + MAX_ATTACHED_PARTITIONS]
+        try:
+            with get_connections().writer() as conn:
+                partitions = attach_event_partitions(conn, chunk)
+                encoded = encode_event_rows([row for month in chunk for row in groups[month]])
+                inserted += insert_event_rows(conn, encoded, partitions)
+        finally:
+            forget_partition_stats(p.id for p in event_partitions() if p.month in chunk)
+    return inserted
+
+def write_partitions(partitions, query, params=()):
+    """Runs a write `query` ({db} = the schema) on each partition; returns the rows changed, None on error.
+
+    Up to MAX_ATTACHED_PARTITIONS partitions share a writer transaction.
+    """
+    connections = get_connections()
+    changed = 0
+    try:
+        for i in range(0, len(partitions), MAX_ATTACHED_PARTITIONS):
+            group = partitions[i:i + MAX_ATTACHED_PARTITIONS]
+            with connections.writer() as conn:
+                for partition in group:
+                    use_partition(conn, partition, write=True)
+                for partition in group:
+                    changed += conn.execute(query.format(db=partition.schema), params).rowcount
+        return changed
+    except sqlite.Error as e:
+        log_activity("error", type(e).__name__, source_dir, f"Database error: {e}", traceback.format_exc(), "write_partitions func")
+    finally:
+        forget_partition_stats(p.id for p in partitions)
+
+def _remove_partition_file(name):
+    for path in (data_dir / name, data_dir / f"{name}-wal", data_dir / f"{name}-shm"):
+        try:
+            path.unlink(missing_ok=True)
+        except OSError as e:
+            # still open somewhere (Windows); sweep_partition_files takes it on the next start
+            log_activity("warn", type(e).__name__, source_dir, f"Could not remove {path.name}: {e}", "", "drop_partition func")
+
+def drop_partition(partition):
+    """Removes a partition from the catalog, then deletes its file."""
+    connections = get_connections()
+    with connections.writer() as conn:
+        conn.execute("DELETE FROM event_partitions WHERE id = ?", (partition.id,))
+        conn.execute("DELETE FROM alert_backfill WHERE partition_id = ?", (partition.id,))
+    _reset_partitions()
+    forget_partition_stats((partition.id,))
+    with connections.writer() as conn:
+        connections.detach(conn, {p.schema for p in event_partitions()})
+    _remove_partition_file(partition.file)
+
+def sweep_partition_files():
+    """Deletes partition files the catalog no longer lists (drops that could not remove them)."""
+    listed = {p.file for p in event_partitions()}
+    for path in data_dir.glob(PARTITION_FILE_GLOB):
+        if path.name not in listed:
+            _remove_partition_file(path.name)
+
+def adopt_legacy_events(conn):
+    """Moves the events of a pre-v8 database from main into month partitions, then drops the old tables.
+
+    Runs on the writer outside a transaction. Each group of months is
+    committed on its own and copied with INSERT OR IGNORE, so an
+    interrupted move picks up where it stopped on the next start.
+    """
+    if not conn.execute("SELECT 1 FROM main.sqlite_master WHERE type = 'table' AND name = 'event_logs'").fetchone():
+        return 0
+    months = [month or UNDATED for (month,) in conn.execute(
+        "SELECT DISTINCT strftime('%Y-%m', ts_us / 1000000, 'unixepoch') FROM main.event_logs")]
+    columns = ", ".join(EVENT_COLUMNS)
+    moved = 0
+    for i in range(0, len(months), MAX_ATTACHED_PARTITIONS):
+        partitions = attach_event_partitions(conn, months[i:i + MAX_ATTACHED_PARTITIONS])
+        for month, partition in partitions.items():
+            schema = partition.schema
+            conn.execute(DICTIONARY_SYNC_QUERY.format(db=schema))
+            if month == UNDATED:
+                where, params = "ts_us IS NULL", ()
+            else:
+                where, params = "ts_us >= ? AND ts_us < ?", (partition.start_us, partition.end_us)
+            query = f"INSERT OR IGNORE INTO {schema}.event_logs ({columns}) SELECT {columns} FROM main.event_logs WHERE {where} ORDER BY rowid"
+            moved += conn.execute(query, params).rowcount
+        conn.commit()
+    conn.execute("BEGIN")
+    for statement in (
+        "DROP TABLE IF EXISTS main.event_search",
+        "DROP VIEW IF EXISTS main.event_logs_text",
+        "DROP TABLE IF EXISTS main.event_logs",
+        "DROP TABLE IF EXISTS main.event_rollup",
+        "DROP TABLE IF EXISTS main.event_timeline",
+    ):
+        conn.execute(statement)
+    conn.commit()
+    if moved:
+        # give the space the events took in main back to the file system
+        conn.execute("VACUUM main")
+    return moved
+
+def read_sources(sources, query, params=(), fetchone=False, dict_data=False):
+    """Runs `query` on each source in turn and yields (source, result).
+
+    A source is a partition, or None for the main database; {db} in the
+    query stands for its schema. Partitions whose file is missing are
+    skipped.
+    """
+    try:
+        with get_connections().reader() as conn:
+            for source in sources:
+                if source is not None and not use_partition(conn, source):
+                    continue
+                cursor = conn.cursor()
+                if dict_data:
+                    cursor.row_factory = sqlite.Row
+                cursor.execute(query.format(db=source.schema if source else "main"), params)
+                result = cursor.fetchone() if fetchone else cursor.fetchall()
+                cursor.close()
+                yield source, result
+    except sqlite.Error as e:
+        log_activity("error", type(e).__name__, source_dir, f"Database error: {e}", traceback.format_exc(), "read_sources func")
+
+def read_source(source, query, params=(), fetchone=False):
+    for _, result in read_sources([source], query, params, fetchone):
+        return result
+    return None if fetchone else []
+
+def global_rowid(source, rowid):
+    return rowid if source is None else source.global_rowid(rowid)
+
+def global_rows(source, rows):
+    """Rows read from `source` with their partition rowid turned into the global rowid."""
+    if source is None:
+        return rows
+    return [(source.global_rowid(row[0]),) + tuple(row[1:]) for row in rows]
+
+def _local_after(source, after):
+    return after if source is None else source.local_after(after)
+
+class PartitionStats:
+    """Per-partition rollup totals and time bounds, kept until the partition is written.
+
+    The dashboard sums these on every refresh; caching them saves attaching
+    every month's file each time. Writers call forget() once committed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._version = 0
+
+    def get(self, partition):
+        with self._lock:
+            stats = self._stats.get(partition.id)
+            version = self._version
+        if stats is not None:
+            return stats
+        levels = {}
+        categories = set()
+        for _, rows in read_sources([partition], "SELECT level, category, SUM(count) FROM {db}.event_rollup GROUP BY level, category"):
+            for level, category, count in rows:
+                levels[level] = levels.get(level, 0) + count
+                categories.add(category)
+        bounds = read_source(partition, (
+            "SELECT (SELECT MIN(ts_us) FROM {db}.event_logs), (SELECT MAX(ts_us) FROM {db}.event_logs),"
+            " (SELECT MIN(bucket) FROM {db}.event_timeline WHERE resolution = ? AND count > 0),"
+            " (SELECT MAX(bucket) FROM {db}.event_timeline WHERE resolution = ? AND count > 0)"
+        ), (TIMELINE_RESOLUTIONS[0],) * 2, True)
+        if bounds is None:
+            return None
+        stats = {"levels": levels, "categories": categories, "ts_us": tuple(bounds[:2]), "buckets": tuple(bounds[2:])}
+        with self._lock:
+            if version == self._version:
+                self._stats[partition.id] = stats
+        return stats
+
+    def forget(self, ids):
+        with self._lock:
+            self._version += 1
+            for id in ids:
+                self._stats.pop(id, None)
+
+_partition_stats = PartitionStats()
+
+def forget_partition_stats(ids):
+    _partition_stats.forget(list(ids))
+
+def all_partition_stats():
+    return [s for s in map(_partition_stats.get, event_partitions()) if s is not None]
 
 # LOGS
+# rows follow EVENT_COLUMNS / ALERT_COLUMNS, ts_us last (see log_parser.event_to_record);
+# {db} in EVENT_INSERT_QUERY is the partition schema (see insert_event_rows)
+EVENT_INSERT_QUERY = "INSERT OR IGNORE INTO {db}.event_logs (id, timestamp, level, category, event_type, source, message, stack, tags, app_name, app_version, user_id, user_ip, user_method, user_endpoint, user_status, user_agent, ts_us) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+ALERT_INSERT_QUERY = "INSERT OR IGNORE INTO alert_logs (id, timestamp, level, category, event_type, message, log_id, status, ts_us) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+
 def append_log(logs):
-    query = "INSERT OR IGNORE INTO event_logs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
-    params = logs
-    result = execute_query(query, params, False, False, True)
+    try:
+        store_event_rows(logs)
+        result = True
+    except (sqlite.Error, ValueError) as e:
+        log_activity("error", type(e).__name__, source_dir, f"Database error: {e}", traceback.format_exc(), "append_log func")
+        result = False
     if result:
+        mark_changed("event_logs")
         log_activity("info","event log creation", source_dir, "Successfully appended event logs", "", "append_log func")
         return True
     else:
@@ -158,10 +861,12 @@ def append_log(logs):
 
 #! operation not available in this version
 def delete_single_log(id):
-    query = "DELETE FROM event_logs WHERE id = ?"
+    query = "DELETE FROM {db}.event_logs WHERE id = ?"
     params = (id,)
-    result = execute_query(query, params)
-    if result:
+    result = write_partitions(event_partitions(), query, params)
+    if result is not None:
+        forget_imports(id=id)
+        mark_changed("event_logs", deleted=(id,))
         log_activity("info","event log deletion", source_dir, f"Successfully deleted event log {id}", "", "delete_single_log func")
         return True
     else:
@@ -169,20 +874,62 @@ def delete_single_log(id):
 
 #! operation not available in this version
 def delete_range_logs(start_date, end_date):
-    query = "DELETE FROM event_logs WHERE timestamp BETWEEN ? AND ?"
-    params = (start_date, end_date)
-    result = execute_query(query, params)
-    if result:
+    start_us, end_us = to_epoch_us(start_date), to_epoch_us(end_date)
+    if start_us is None or end_us is None:
+        log_activity("error","event log deletion", source_dir, f"Invalid date range {start_date} to {end_date}", "", "delete_range_logs func")
+        return
+    partitions = event_partitions(start_us, end_us)
+    # months wholly inside the range go by removing their file, the rest row by row
+    try:
+        for partition in partitions:
+            if partition.within(start_us, end_us):
+                drop_partition(partition)
+        dropped = True
+    except sqlite.Error as e:
+        log_activity("error", type(e).__name__, source_dir, f"Database error: {e}", traceback.format_exc(), "delete_range_logs func")
+        dropped = False
+    query = "DELETE FROM {db}.event_logs WHERE ts_us BETWEEN ? AND ?"
+    params = (start_us, end_us)
+    result = write_partitions([p for p in partitions if not p.within(start_us, end_us)], query, params)
+    forget_imports(start_us, end_us)
+    mark_changed("event_logs", everything=True)
+    if dropped and result is not None:
         log_activity("info","event log deletion", source_dir, f"Successfully deleted event logs from {start_date} to {end_date}", "", "delete_range_logs func")
         return True
     else:
         log_activity("error","event log deletion", source_dir, f"Failed to delete event logs from {start_date} to {end_date}", "", "delete_range_logs func")
 
 def fetch_log():
-    query = "SELECT * FROM event_logs ORDER BY timestamp"
-    result = execute_query(query, (), False, True, False, True)
+    query = f"SELECT {', '.join(EVENT_COLUMNS)} FROM {{db}}.event_logs_text ORDER BY ts_us"
+    result = list(chain.from_iterable(rows for _, rows in read_sources(event_partitions(), query, dict_data=True)))
     if result:
         return result
+
+# IMPORT MANIFEST
+# A file or chunk whose hash is listed here has been imported and is skipped
+# unparsed the next time (see import_worker). Deleting events forgets the
+# entries overlapping them, so deleted events can be imported again.
+MANIFEST_INSERT_QUERY = "INSERT OR REPLACE INTO import_manifest (hash, kind, source, records, inserted, first_id, last_id, first_us, last_us, imported_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+
+def fetch_import_digests():
+    """{hash: records} of every imported file and chunk."""
+    rows = execute_query("SELECT hash, records FROM import_manifest", fetchall=True)
+    return dict(rows or [])
+
+def record_import(conn, digest, kind, source, tally):
+    """Adds a file or chunk to the manifest in the caller's transaction; tally is (records, inserted, first_id, last_id, first_us, last_us)."""
+    conn.execute(MANIFEST_INSERT_QUERY, (digest, kind, source, *tally, to_epoch_us(datetime.now())))
+
+def forget_imports(start_us=None, end_us=None, id=None):
+    """Drops the manifest entries whose ts_us range, or _id range, overlaps deleted events."""
+    if id is not None:
+        query = "DELETE FROM import_manifest WHERE ? BETWEEN first_id AND last_id"
+        params = (id,)
+    else:
+        # undated events fall in no range; entries holding only those are kept
+        query = "DELETE FROM import_manifest WHERE first_us <= ? AND last_us >= ?"
+        params = (end_us, start_us)
+    return execute_query(query, params)
     
 # PREFERENCE SETTINGS
 def save_prefs_settings(id, timestamp, warn, error, critical):
@@ -190,6 +937,7 @@ def save_prefs_settings(id, timestamp, warn, error, critical):
     params = (id, timestamp, warn, error, critical)
     result = execute_query(query, params, False, False, False, False)
     if result:
+        mark_changed("preference_settings")
         log_activity("info","preferences creation", source_dir, "Successfully updated account preference settings", "", "save_prefs_settings func")
         return True
     else:
@@ -206,17 +954,278 @@ def update_prefs_settings(warn, error, critical):
     params = (warn, error, critical)
     result = execute_query(query, params)
     if result:
+        mark_changed("preference_settings")
         log_activity("info","alert status", source_dir, f"Successfully updated account preference settings", "", "update_prefs_settings func")
         return True
     else:
         log_activity("error","alert status", source_dir, f"Failed to updated account preference settings", "", "update_prefs_settings func")
 
+# ALERT RULES
+# list columns are stored as JSON arrays (see migrations.ALERT_RULES_V10)
+RULE_COLUMNS = ("id", "name", "enabled", "levels", "categories", "event_types", "sources", "tags", "message_regex", "threshold", "window_seconds", "group_by", "created_at")
+RULE_LIST_COLUMNS = ("levels", "categories", "event_types", "sources", "tags")
+
+def fetch_alert_rules(enabled_only=False):
+    query = f"SELECT {', '.join(RULE_COLUMNS)} FROM alert_rules{' WHERE enabled = 1' if enabled_only else ''} ORDER BY created_at"
+    result = execute_query(query, (), False, True, False, True)
+    return [dict(row) for row in result or []]
+
+def save_alert_rule(rule):
+    """Creates or replaces a rule; list fields may be given as lists."""
+    rule = dict(rule)
+    rule.setdefault("id", str(uuid.uuid4()))
+    rule.setdefault("enabled", 1)
+    rule.setdefault("threshold", 1)
+    rule.setdefault("created_at", to_epoch_us(datetime.now()))
+    for column in RULE_LIST_COLUMNS:
+        if isinstance(rule.get(column), (list, tuple)):
+            rule[column] = json.dumps(list(rule[column])) if rule[column] else None
+    query = f"INSERT OR REPLACE INTO alert_rules ({', '.join(RULE_COLUMNS)}) VALUES ({', '.join('?' * len(RULE_COLUMNS))})"
+    params = tuple(rule.get(column) for column in RULE_COLUMNS)
+    result = execute_query(query, params)
+    if result:
+        mark_changed("alert_rules")
+        log_activity("info","alert rule", source_dir, f"Successfully saved alert rule {rule['name']}", "", "save_alert_rule func")
+        return rule["id"]
+    else:
+        log_activity("error","alert rule", source_dir, f"Failed to save alert rule {rule['name']}", "", "save_alert_rule func")
+
+def set_alert_rule_enabled(id, enabled):
+    query = "UPDATE alert_rules SET enabled = ? WHERE id = ?"
+    params = (1 if enabled else 0, id)
+    result = execute_query(query, params)
+    if result:
+        mark_changed("alert_rules")
+        return True
+    else:
+        log_activity("error","alert rule", source_dir, f"Failed to update alert rule {id}", "", "set_alert_rule_enabled func")
+
+def delete_alert_rule(id):
+    query = "DELETE FROM alert_rules WHERE id = ?"
+    params = (id,)
+    result = execute_query(query, params)
+    if result:
+        mark_changed("alert_rules")
+        log_activity("info","alert rule", source_dir, f"Successfully deleted alert rule {id}", "", "delete_alert_rule func")
+        return True
+    else:
+        log_activity("error","alert rule", source_dir, f"Failed to delete alert rule {id}", "", "delete_alert_rule func")
+
+# ALERT BACKFILL
+# Raises the alerts the current rules give for events already stored: one
+# INSERT ... SELECT per rule over a rowid slice of a partition, instead of a
+# Python loop over the rows. The unique log_id index keeps one alert per
+# event, so the first rule that matches wins, as during ingest. A slice's
+# alerts and its partition's checkpoint commit together, so a rerun with the
+# same rules only covers events stored since.
+#
+# Threshold rules count with window functions in ts_us order, the way
+# alert_rules.WindowCounter counts during ingest: a window rule fires where a
+# key's count within the window reaches the threshold from below, once per
+# burst, and counts the matched events of the month before as well, since a
+# window of up to seven days can reach back into it. A rule without a window
+# fires on every threshold-th event of a key, with the counts of the earlier
+# months carried in temp.backfill_carry.
+BACKFILL_SLICE = 50000
+ALERT_UUID_SQL = (
+    "lower(hex(randomblob(4))) || '-' || lower(hex(randomblob(2))) || '-4' || substr(lower(hex(randomblob(2))), 2) || '-'"
+    " || substr('89ab', 1 + abs(random()) % 4, 1) || substr(lower(hex(randomblob(2))), 2) || '-' || lower(hex(randomblob(6)))"
+)
+ALERT_BACKFILL_COLUMNS = "id, timestamp, level, category, event_type, message, log_id, status, ts_us"
+
+def _regexp(pattern, text):
+    return text is not None and _compiled_pattern(pattern).search(text) is not None
+
+_patterns = {}
+
+def _compiled_pattern(pattern):
+    compiled = _patterns.get(pattern)
+    if compiled is None:
+        compiled = _patterns[pattern] = re.compile(pattern, re.IGNORECASE)
+    return compiled
+
+def _decoded(db, field, expr):
+    """SQL text of an event_logs field from `expr`, decoded through {db}'s dictionary when encoded."""
+    if field in ENCODED_FIELDS:
+        return f"(SELECT value FROM {db}.value_dictionary WHERE id = {expr})"
+    return expr
+
+def rule_condition(rule, db):
+    """SQL condition on `{db}.event_logs e` for a rule's predicates, and its params."""
+    conditions, params = [], []
+    for key, column in (("levels", "level"), *LIST_PREDICATES.items()):
+        values = sorted(rule_values(rule.get(key)) or [])
+        if values:
+            conditions.append(f"e.{column} IN (SELECT id FROM {db}.value_dictionary WHERE field = '{column}' AND lower(value) IN ({', '.join('?' * len(values))}))")
+            params.extend(values)
+    tags = sorted(rule_values(rule.get("tags")) or [])
+    if tags:
+        conditions.append(f"EXISTS (SELECT 1 FROM json_each(CASE WHEN json_valid(e.tags) THEN e.tags END) WHERE lower(value) IN ({', '.join('?' * len(tags))}))")
+        params.extend(tags)
+    if rule.get("message_regex"):
+        conditions.append("regexp(?, e.message)")
+        params.append(rule["message_regex"])
+    return " AND ".join(conditions) or "1", params
+
+def counts_every_event(rule):
+    """True for a threshold rule without a window, whose counts go on from month to month."""
+    compiled = CompiledRule(rule)
+    return compiled.counter is not None and not compiled.window_seconds
+
+def rule_match_counts(rule, db):
+    """(query, params) counting the events of `{db}` matching a threshold rule, per group value."""
+    condition, params = rule_condition(rule, db)
+    group_by = rule.get("group_by")
+    return f"SELECT {'e.' + group_by if group_by else 'NULL'}, COUNT(*) FROM {db}.event_logs e WHERE {condition} GROUP BY 1", params
+
+def rule_backfill_query(rule, db, earlier=(), index=0):
+    """(query, params(now, now_us, lo, hi, since)) raising `rule`'s alerts for the events of `{db}` with lo < rowid <= hi.
+
+    `since` is the lowest ts_us a window rule has to count from, and
+    `earlier` the schemas of the months before `{db}` that reach it. A rule
+    without a window starts from its counts in temp.backfill_carry under
+    `index`.
+    """
+    compiled = CompiledRule(rule)
+    condition, condition_params = rule_condition(rule, db)
+    prefix = f"{rule['name']}: " if rule.get("name") else ""
+    decoded = lambda alias: ", ".join(_decoded(db, field, f"{alias}.{field}") for field in ("level", "category", "event_type"))
+    if compiled.counter is None:
+        query = (
+            f"INSERT OR IGNORE INTO main.alert_logs ({ALERT_BACKFILL_COLUMNS}) "
+            f"SELECT {ALERT_UUID_SQL}, ?, {decoded('e')}, ? || e.message, e.id, 'unread', ? "
+            f"FROM {db}.event_logs e WHERE e.rowid > ? AND e.rowid <= ? AND {condition}"
+        )
+        return query, lambda now, now_us, lo, hi, since: (now, prefix, now_us, lo, hi, *condition_params)
+
+    threshold = compiled.counter.threshold
+    group_by = rule.get("group_by")
+    over = "PARTITION BY grp ORDER BY ts_us, rowid" if group_by else "ORDER BY ts_us, rowid"
+    columns = f"e.rowid AS rowid, e.id, e.level, e.category, e.event_type, e.message, e.ts_us, {'e.' + group_by if group_by else 'NULL'} AS grp"
+    if compiled.window_seconds:
+        # earlier months only lend their events to the counts; ids are global, so grp compares across them
+        selects, condition_sets = [], []
+        for schema in (db, *earlier):
+            schema_condition, schema_params = rule_condition(rule, schema)
+            current, bound = (1, "e.rowid <= ? AND ") if schema == db else (0, "")
+            selects.append(f"SELECT {current} AS is_current, {columns} FROM {schema}.event_logs e WHERE {bound}e.ts_us >= ? AND {schema_condition}")
+            condition_sets.append(schema_params)
+        matched = " UNION ALL ".join(selects)
+        def match_params(hi, since):
+            params = [hi]
+            for condition_set in condition_sets:
+                params += [since, *condition_set]
+            return params
+        # a key is at the threshold while its threshold-th last event is within the window, as in WindowCounter
+        counted = (
+            f"hits AS (SELECT *, IFNULL(ts_us - LAG(ts_us, {threshold - 1}) OVER ({over}) <= {int(compiled.window_seconds) * 1000000}, 0) AS above FROM matched), "
+            f"crossings AS (SELECT *, LAG(above, 1, 0) OVER ({over}) AS prev FROM hits) "
+        )
+        source, fires = "crossings c", "c.above AND NOT c.prev"
+        source_params, fire_params = (), ()
+    else:
+        matched = f"SELECT 1 AS is_current, {columns} FROM {db}.event_logs e WHERE e.rowid <= ? AND {condition}"
+        counted = f"hits AS (SELECT *, ROW_NUMBER() OVER ({over}) AS n FROM matched) "
+        source = "hits c LEFT JOIN temp.backfill_carry k ON k.rule = ? AND k.grp IS c.grp"
+        fires = "(IFNULL(k.n, 0) + c.n) % ? = 0"
+        match_params = lambda hi, since: [hi, *condition_params]
+        source_params, fire_params = (index,), (threshold,)
+    detail = f"{prefix}{threshold} events"
+    window = f" within {compiled.window_seconds}s" if compiled.window_seconds else ""
+    group_text = f"' from ' || {_decoded(db, group_by, 'c.grp')}" if group_by else "''"
+    # the CTE sits inside the INSERT so that the cursor reports its rowcount
+    query = (
+        f"INSERT OR IGNORE INTO main.alert_logs ({ALERT_BACKFILL_COLUMNS}) "
+        f"WITH matched AS ({matched}), {counted}"
+        f"SELECT {ALERT_UUID_SQL}, ?, {decoded('c')}, ? || IFNULL({group_text}, '') || ? || IFNULL(c.message, ''), c.id, 'unread', ? "
+        f"FROM {source} WHERE c.is_current AND c.rowid > ? AND {fires}"
+    )
+    def params(now, now_us, lo, hi, since):
+        return (*match_params(hi, since), now, detail, f"{window}; last: ", now_us, *source_params, lo, *fire_params)
+    return query, params
+
+def backfill_alerts(rules, on_progress=None, is_cancelled=None):
+    """Raises alerts for stored events under `rules` (alert_rules rows in priority order, see ingest.alert_engine).
+
+    on_progress(done, total, alerts) is called after every slice. Returns
+    {"events", "alerts", "cancelled"}; events counts the rows looked at.
+    """
+    valid = []
+    for rule in rules:
+        if not rule:
+            continue
+        try:
+            CompiledRule(rule)
+            valid.append(rule)
+        except (ValueError, TypeError, re.error) as e:
+            log_activity("error", "alert rule", source_dir, f"Rule {rule.get('name')} skipped: {e}", "", "backfill_alerts func")
+    summary = {"events": 0, "alerts": 0, "cancelled": False}
+    if not valid:
+        return summary
+    digest = rules_digest(valid)
+    checkpoints = dict(execute_query("SELECT partition_id, last_rowid FROM alert_backfill WHERE rules_hash = ?", (digest,), fetchall=True) or [])
+    tops = max_rowid("event_logs")
+    partitions = event_partitions()
+    work = {p.id: (checkpoints.get(p.id, 0), tops.get(p.id, 0)) for p in partitions}
+    total = sum(hi - lo for lo, hi in work.values() if hi > lo)
+    last = max((i for i, p in enumerate(partitions) if work[p.id][1] > work[p.id][0]), default=-1)
+    # counts of the rules without a window, {rule index: {group value: events}}, over the months done
+    carried = {i: {} for i, rule in enumerate(valid) if counts_every_event(rule)}
+    now = datetime.now()
+    now_us = to_epoch_us(now)
+    # a window rule counts the events up to twice its window before a slice
+    reach_us = 2 * max((CompiledRule(rule).window_seconds or 0 for rule in valid), default=0) * 1000000
+    connections = get_connections()
+    for partition in partitions[:last + 1]:
+        start, end = work[partition.id]
+        if end > start:
+            with connections.writer() as conn:
+                conn.execute("CREATE TEMP TABLE IF NOT EXISTS backfill_carry (rule INTEGER, grp, n INTEGER)")
+                conn.execute("DELETE FROM temp.backfill_carry")
+                conn.executemany("INSERT INTO temp.backfill_carry (rule, grp, n) VALUES (?, ?, ?)", ((i, grp, n) for i, counts in carried.items() for grp, n in counts.items()))
+        queries = {}
+        for lo in range(start, end, BACKFILL_SLICE):
+            if is_cancelled and is_cancelled():
+                summary["cancelled"] = True
+                break
+            hi = min(lo + BACKFILL_SLICE, end)
+            with connections.writer() as conn:
+                use_partition(conn, partition, write=True)
+                conn.create_function("regexp", 2, _regexp)
+                since, earlier = None, ()
+                if reach_us:
+                    first = conn.execute(f"SELECT MIN(ts_us) FROM {partition.schema}.event_logs WHERE rowid > ? AND rowid <= ?", (lo, hi)).fetchone()[0]
+                    since = first - reach_us if first is not None else None
+                    if since is not None and since < partition.start_us:
+                        earlier = tuple(p.schema for p in event_partitions(since, partition.start_us - 1) if p.id != partition.id and use_partition(conn, p))
+                if earlier not in queries:
+                    queries[earlier] = [rule_backfill_query(rule, partition.schema, earlier, i) for i, rule in enumerate(valid)]
+                for query, params in queries[earlier]:
+                    summary["alerts"] += conn.execute(query, params(str(now), now_us, lo, hi, since)).rowcount
+                conn.execute("INSERT OR REPLACE INTO alert_backfill (partition_id, rules_hash, last_rowid) VALUES (?, ?, ?)", (partition.id, digest, hi))
+            summary["events"] += hi - lo
+            if on_progress:
+                on_progress(summary["events"], total, summary["alerts"])
+        if summary["cancelled"]:
+            break
+        if carried and partition is not partitions[last]:
+            with connections.reader() as conn:
+                if use_partition(conn, partition):
+                    conn.create_function("regexp", 2, _regexp)
+                    for i, counts in carried.items():
+                        for grp, n in conn.execute(*rule_match_counts(valid[i], partition.schema)):
+                            counts[grp] = counts.get(grp, 0) + n
+    if summary["alerts"]:
+        mark_changed("alert_logs")
+    return summary
+
 # ALERT
 def create_alert(alert):
-    query = "INSERT OR IGNORE INTO alert_logs VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+    query = ALERT_INSERT_QUERY
     params = alert
     result = execute_query(query, params, False, False, True)
     if result:
+        mark_changed("alert_logs")
         log_activity("info","alert creation", source_dir, "Successfully created alert", "", "create_alert func")
         return True
     else:
@@ -227,6 +1236,7 @@ def delete_alert(id):
     params = (id,)
     result = execute_query(query, params)
     if result:
+        mark_changed("alert_logs", deleted=(id,))
         log_activity("info","alert deletion", source_dir, f"Successfully deleted alert {id}", "", "delete_alert func")
         return True
     else:
@@ -237,6 +1247,7 @@ def delete_all_alerts():
     query = "DELETE FROM alert_logs"
     result = execute_query(query, ())
     if result:
+        mark_changed("alert_logs", everything=True)
         log_activity("info","alert deletion", source_dir, f"Successfully deleted all alerts", "", "delete_all_alerts func")
         return True
     else:
@@ -248,6 +1259,7 @@ def mark_alert_as_read(id):
     params = (status, id)
     result = execute_query(query, params)
     if result:
+        mark_changed("alert_logs", updated=(id,))
         log_activity("info","alert status", source_dir, f"Successfully marked alert {id} as read", "", "mark_alert_as_read func")
         return True
     else:
@@ -260,24 +1272,362 @@ def mark_all_alert():
     params = (status, condition)
     result = execute_query(query, params)
     if result:
+        mark_changed("alert_logs", everything=True)
         log_activity("info","alert status", source_dir, f"Successfully marked all alerts as read", "", "mark_all_alert func")
         return True
     else:
         log_activity("error","alert status", source_dir, f"Failed to mark all alerts as read", "", "mark_all_alert func")
 
+# BULK ALERT OPERATIONS
+# A selection of alerts is written in one transaction: the ids go into a
+# temp table with executemany and a single UPDATE/DELETE joins on it.
+def _fill_bulk_ids(conn, ids):
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS bulk_ids (id TEXT PRIMARY KEY) WITHOUT ROWID")
+    conn.execute("DELETE FROM temp.bulk_ids")
+    conn.executemany("INSERT OR IGNORE INTO temp.bulk_ids (id) VALUES (?)", ((id,) for id in ids))
+
+def mark_alerts(ids, status="read"):
+    """Sets the status of the alerts in `ids`; returns how many changed."""
+    ids = list(ids)
+    try:
+        with get_connections().writer() as conn:
+            _fill_bulk_ids(conn, ids)
+            # only the rows whose status changes, so the rollup triggers fire for those alone
+            changed = conn.execute("UPDATE alert_logs SET status = ? WHERE status != ? AND id IN (SELECT id FROM temp.bulk_ids)", (status, status)).rowcount
+            conn.execute("DELETE FROM temp.bulk_ids")
+    except sqlite.Error as e:
+        log_activity("error", type(e).__name__, source_dir, f"Database error: {e}", traceback.format_exc(), "mark_alerts func")
+        log_activity("error","alert status", source_dir, f"Failed to mark {len(ids)} alerts as {status}", "", "mark_alerts func")
+        return None
+    mark_changed("alert_logs", updated=ids)
+    log_activity("info","alert status", source_dir, f"Successfully marked {changed} alerts as {status}", "", "mark_alerts func")
+    return changed
+
+def delete_alerts(ids):
+    """Deletes the alerts in `ids`; returns how many were deleted."""
+    ids = list(ids)
+    try:
+        with get_connections().writer() as conn:
+            _fill_bulk_ids(conn, ids)
+            deleted = conn.execute("DELETE FROM alert_logs WHERE id IN (SELECT id FROM temp.bulk_ids)").rowcount
+            conn.execute("DELETE FROM temp.bulk_ids")
+    except sqlite.Error as e:
+        log_activity("error", type(e).__name__, source_dir, f"Database error: {e}", traceback.format_exc(), "delete_alerts func")
+        log_activity("error","alert deletion", source_dir, f"Failed to delete {len(ids)} alerts", "", "delete_alerts func")
+        return None
+    mark_changed("alert_logs", deleted=ids)
+    log_activity("info","alert deletion", source_dir, f"Successfully deleted {deleted} alerts", "", "delete_alerts func")
+    return deleted
+
 def fetch_alert_log():
-    query = "SELECT * FROM alert_logs ORDER BY timestamp"
+    query = "SELECT * FROM alert_logs ORDER BY ts_us"
     result = execute_query(query, (), False, True, False, True)
     if result:
         return result
     
+# PAGING
+PAGE_SIZE = 500
+EXPORT_BATCH_SIZE = 2000
+EVENT_COLUMNS = ("id", "timestamp", "level", "category", "event_type", "source", "message", "stack", "tags", "app_name", "app_version", "user_id", "user_ip", "user_method", "user_endpoint", "user_status", "user_agent", "ts_us")
+ALERT_COLUMNS = ("id", "timestamp", "level", "category", "event_type", "message", "log_id", "status", "ts_us")
+PAGED_TABLES = {"event_logs": EVENT_COLUMNS, "alert_logs": ALERT_COLUMNS}
+# fields sorted by a typed column instead of their own text
+SORT_COLUMNS = {"timestamp": "ts_us"}
+
+SEARCH_TABLES = {"event_logs": "event_search", "alert_logs": "alert_search"}
+SEARCH_RESULT_LIMIT = 50000
+
+def keyset_from(table, order_by, valued):
+    """FROM clause for a keyset segment of `table` (aliased e); `valued` is what keyset_segments gives the segment.
+
+    A dictionary encoded column sorts by its string, read through a join
+    on value_dictionary, so the order is alphabetical rather than the order
+    the values were first stored in.
+    """
+    if valued and order_by in ENCODED_COLUMNS.get(table, ()):
+        # driven by the (field, value) index, the rows come out in value order
+        return f"{{db}}.value_dictionary d JOIN {{db}}.{table} e ON e.{order_by} = d.id AND d.field = '{order_by}'"
+    return f"{{db}}.{table} e"
+
+def keyset_segments(key, descending, after, column=None):
+    """Conditions selecting, in order, the rows that sort after `after`, as (where, params, valued).
+
+    Rows are ordered by (key, rowid) and `after` is the (value, rowid) of
+    the last row already read. SQLite sorts NULL before every value, so
+    the NULL rows are read as their own segment rather than OR-ed into the
+    row-value comparison, which would stop SQLite from walking the index.
+
+    `column` is the stored column when `key` is read through a join (an
+    encoded column, see keyset_from). The join has no NULL rows, so then the
+    NULL rows are always a segment of their own. `valued` is True for a
+    segment with only non-NULL keys, False for one with only NULL keys and
+    None for one with both.
+    """
+    split = column is not None
+    column = column or key
+    if after is None:
+        if not split:
+            return [("1", (), None)]
+        nulls, values = (f"{column} IS NULL", (), False), ("1", (), True)
+        return [values, nulls] if descending else [nulls, values]
+    value, rowid = after
+    if descending:
+        if value is None:
+            return [(f"{column} IS NULL AND e.rowid < ?", (rowid,), False)]
+        return [(f"({key}, e.rowid) < (?, ?)", (value, rowid), True), (f"{column} IS NULL", (), False)]
+    if value is None:
+        return [(f"{column} IS NULL AND e.rowid > ?", (rowid,), False), ("1" if split else f"{column} IS NOT NULL", (), True)]
+    return [(f"({key}, e.rowid) > (?, ?)", (value, rowid), True)]
+
+def table_keyset(table, order_by, descending, after):
+    """(FROM clause, ORDER BY, where, params) of each keyset segment of `table`, in order."""
+    encoded = order_by in ENCODED_COLUMNS.get(table, ())
+    key = "d.value" if encoded else f"e.{order_by}"
+    direction = "DESC" if descending else "ASC"
+    segments = []
+    for where, params, valued in keyset_segments(key, descending, after, f"e.{order_by}" if encoded else None):
+        # a segment of NULL keys is in rowid order
+        order = f"e.rowid {direction}" if valued is False else f"{key} {direction}, e.rowid {direction}"
+        segments.append((keyset_from(table, order_by, valued), order, where, params))
+    return segments
+
+def search_condition(table, match):
+    if not match:
+        return "", ()
+    fts = SEARCH_TABLES[table]
+    return f" AND e.rowid IN (SELECT rowid FROM {{db}}.{fts} WHERE {fts} MATCH ?)", (match,)
+
+def fetch_page(table, order_by, descending=False, after=None, limit=PAGE_SIZE, match=None, raw=False):
+    """One keyset page of `table` as (rowid, *columns) tuples.
+
+    `match` is an FTS5 query (see fts_query) restricting the page to the
+    rows found by the table's search index. With `raw` the dictionary
+    encoded columns stay ids, in the rows and in `after`.
+
+    A partitioned table is read partition by partition. Sorted by time,
+    the partitions are read in month order, skipping the months before
+    `after`, until the page is full; sorted by another column, each gives
+    its first `limit` rows and the runs are merged.
+    """
+    columns = PAGED_TABLES[table]
+    order_by = SORT_COLUMNS.get(order_by, order_by)
+    if order_by not in columns:
+        raise ValueError(f"Cannot sort {table} by {order_by}")
+    search, search_params = search_condition(table, match)
+    if raw:
+        after = decode_sort_key(table, order_by, after)
+    by_time = order_by == "ts_us"
+    sources = table_sources(table, descending=descending)
+    if by_time and after is not None and after[0] is not None and table in PARTITIONED_TABLES:
+        if descending:
+            sources = [p for p in sources if not p.dated or p.start_us <= after[0]]
+        else:
+            sources = [p for p in sources if p.dated and p.end_us > after[0]]
+    runs = []
+    wanted = limit
+    for source in sources:
+        run = []
+        for source_from, order, where, params in table_keyset(table, order_by, descending, _local_after(source, after)):
+            query = f"SELECT e.rowid, {', '.join('e.' + c for c in columns)} FROM {source_from} WHERE {where}{search} ORDER BY {order} LIMIT ?"
+            run += read_source(source, query, params + search_params + (wanted - len(run),))
+            if len(run) >= wanted:
+                break
+        runs.append(global_rows(source, run))
+        if by_time:
+            wanted -= len(run)
+            if not wanted:
+                break
+    if by_time or len(runs) < 2:
+        page = list(chain.from_iterable(runs))
+    else:
+        i = columns.index(order_by) + 1
+        if order_by in ENCODED_COLUMNS.get(table, ()):
+            sort_value = lambda row: decode_value(row[i])
+        else:
+            sort_value = lambda row: row[i]
+        merged = heapq.merge(*runs, key=lambda row: (sort_value(row) is not None, sort_value(row), row[0]), reverse=descending)
+        page = list(islice(merged, limit))
+    return page if raw else decode_rows(table, page)
+
+def fetch_rows(table, rowids, raw=False):
+    """Rows of `table` as (rowid, *columns) tuples, in the order of `rowids`."""
+    if not rowids:
+        return []
+    columns = PAGED_TABLES[table]
+    groups = {}
+    if table in PARTITIONED_TABLES:
+        partitions = {p.id: p for p in event_partitions()}
+        for rowid in rowids:
+            partition_id, local = split_rowid(rowid)
+            if partition_id in partitions:
+                groups.setdefault(partitions[partition_id], []).append(local)
+    else:
+        groups[None] = list(rowids)
+    rows = {}
+    for source, locals in groups.items():
+        query = f"SELECT rowid, {', '.join(columns)} FROM {{db}}.{table} WHERE rowid IN ({', '.join('?' * len(locals))})"
+        rows.update((row[0], row) for row in global_rows(source, read_source(source, query, tuple(locals))))
+    rows = [rows[rowid] for rowid in rowids if rowid in rows]
+    return rows if raw else decode_rows(table, rows)
+
+def iter_table(table, order_by="timestamp", descending=False, match=None, batch_size=EXPORT_BATCH_SIZE):
+    """Yields lists of `table` rows ((rowid, *columns), decoded) in sort order, one keyset page at a time.
+
+    Only one page is held at a time and no read transaction stays open
+    between pages, so a long export neither grows in memory nor holds up
+    the writer's checkpoints.
+    """
+    index = PAGED_TABLES[table].index(SORT_COLUMNS.get(order_by, order_by)) + 1
+    after = None
+    while True:
+        page = fetch_page(table, order_by, descending, after, batch_size, match, raw=True)
+        if page:
+            yield decode_rows(table, page)
+        if len(page) < batch_size:
+            return
+        after = (page[-1][index], page[-1][0])
+
+def fetch_log_page(order_by="timestamp", descending=False, after=None, limit=PAGE_SIZE, match=None):
+    return fetch_page("event_logs", order_by, descending, after, limit, match)
+
+def fetch_alert_page(order_by="timestamp", descending=False, after=None, limit=PAGE_SIZE, match=None):
+    return fetch_page("alert_logs", order_by, descending, after, limit, match)
+
+def count_rows(table, match=None):
+    if table not in PAGED_TABLES:
+        raise ValueError(f"Unknown table {table}")
+    if match:
+        fts = SEARCH_TABLES[table]
+        query, params = f"SELECT COUNT(*) FROM {{db}}.{fts} WHERE {fts} MATCH ?", (match,)
+    else:
+        query, params = f"SELECT COUNT(*) FROM {{db}}.{table}", ()
+    return sum(result[0] for _, result in read_sources(table_sources(table), query, params, True))
+
+def max_rowid(table):
+    """Watermark for count_new_rows: the highest rowid, kept per partition ({partition id: rowid}) for a partitioned table."""
+    if table not in PAGED_TABLES:
+        raise ValueError(f"Unknown table {table}")
+    marks = {}
+    for source, result in read_sources(table_sources(table), f"SELECT MAX(rowid) FROM {{db}}.{table}", (), True):
+        marks[source.id if source else None] = result[0] or 0
+    return marks if table in PARTITIONED_TABLES else marks.get(None, 0)
+
+def count_new_rows(table, watermark, order_by, descending=False, after=None, match=None, raw=False):
+    """Counts rows added since `watermark` (from max_rowid): (all new rows, new rows sorting after `after`)."""
+    search, search_params = search_condition(table, match)
+    order_by = SORT_COLUMNS.get(order_by, order_by)
+    if raw:
+        after = decode_sort_key(table, order_by, after)
+    total = later = 0
+    for source in table_sources(table):
+        mark = watermark if source is None else watermark.get(source.id, 0)
+        result = read_source(source, f"SELECT COUNT(*) FROM {{db}}.{table} e WHERE e.rowid > ?{search}", (mark,) + search_params, True)
+        new = result[0] if result else 0
+        total += new
+        if after is None or not new:
+            later += new
+            continue
+        for source_from, _, where, params in table_keyset(table, order_by, descending, _local_after(source, after)):
+            query = f"SELECT COUNT(*) FROM {source_from} WHERE e.rowid > ? AND {where}{search}"
+            result = read_source(source, query, (mark,) + params + search_params, True)
+            later += result[0] if result else 0
+    return total, later
+
+def fetch_first_page(table, limit=PAGE_SIZE):
+    """(watermark, total, rows) of a table model's first page, sorted by time with no search (see PagedTableModel.show_first_page).
+
+    The watermark is read first: a row written in between is counted twice
+    at worst, and the next page read corrects the total.
+    """
+    watermark = max_rowid(table)
+    return watermark, count_rows(table), fetch_page(table, "timestamp", False, None, limit, None, raw=True)
+
+# SEARCH
+def fts_query(text):
+    """Turns search box text into an FTS5 query.
+
+    Quoted text is kept as a phrase; every other word becomes a prefix term,
+    and all terms must match. Returns None for blank input.
+    """
+    terms = []
+    for i, part in enumerate((text or "").split('"')):
+        if i % 2:
+            if part.strip():
+                terms.append('"' + part.strip() + '"')
+        else:
+            terms.extend('"' + word.replace('"', '') + '"*' for word in part.split())
+    return " ".join(terms) or None
+
+def search_rowids(table, match, limit=SEARCH_RESULT_LIMIT):
+    """Rowids of the best `limit` matches, best first (FTS5 bm25 rank)."""
+    fts = SEARCH_TABLES[table]
+    query = f"SELECT rank, rowid FROM {{db}}.{fts} WHERE {fts} MATCH ? ORDER BY rank LIMIT ?"
+    runs = [[(rank, global_rowid(source, rowid)) for rank, rowid in rows]
+            for source, rows in read_sources(table_sources(table), query, (match, limit))]
+    return [rowid for _, rowid in islice(heapq.merge(*runs), limit)]
+
+def search_logs(text, limit=SEARCH_RESULT_LIMIT):
+    """Ids of the event logs matching `text`, most relevant first."""
+    match = fts_query(text)
+    if not match:
+        return []
+    query = "SELECT s.rank, e.id FROM {db}.event_search s JOIN {db}.event_logs e ON e.rowid = s.rowid WHERE event_search MATCH ? ORDER BY s.rank LIMIT ?"
+    runs = [rows for _, rows in read_sources(event_partitions(), query, (match, limit))]
+    return [id for _, id in islice(heapq.merge(*runs), limit)]
+
+# STATS
+# Read from the trigger-maintained rollup tables (see migrations.ROLLUPS_V4),
+# so the cost is the number of buckets, not the number of events. Event
+# totals are summed over the cached per-partition stats (see PartitionStats).
+def fetch_log_stats():
+    levels = {}
+    categories = set()
+    for stats in all_partition_stats():
+        for level, count in stats["levels"].items():
+            levels[level] = levels.get(level, 0) + count
+        categories |= stats["categories"]
+    total = sum(levels.values())
+    start_date, end_date = (select_date_interval() or ("", "")) if total else ("", "")
+    return {
+        "levels": levels,
+        "total": total,
+        "categories": len(categories),
+        "start_date": start_date,
+        "end_date": end_date,
+    }
+
+def fetch_alert_stats():
+    rows = execute_query("SELECT level, status, count FROM alert_rollup WHERE count > 0", (), False, True) or []
+    levels = {}
+    status = {}
+    for level, state, count in rows:
+        levels[level] = levels.get(level, 0) + count
+        status[state] = status.get(state, 0) + count
+    return {"levels": levels, "status": status, "total": sum(levels.values())}
+
+# TIMELINE
+TIMELINE_RESOLUTIONS = (60, 3600, 86400)  # seconds per bucket, see migrations.TIMELINE_V5
+
+def fetch_timeline_bounds():
+    """(first, last) minute bucket in epoch seconds, or None when there are no events."""
+    buckets = [stats["buckets"] for stats in all_partition_stats() if stats["buckets"][0] is not None]
+    if buckets:
+        return min(first for first, _ in buckets), max(last for _, last in buckets)
+
+def fetch_event_timeline(start, end, resolution):
+    """(bucket, count) pairs between `start` and `end` (epoch seconds) at one resolution."""
+    # buckets never straddle a month, so each partition's buckets follow the previous one's
+    start -= start % resolution
+    query = "SELECT bucket, count FROM {db}.event_timeline WHERE resolution = ? AND bucket BETWEEN ? AND ? AND count > 0 ORDER BY bucket"
+    partitions = [p for p in event_partitions(start * 1000000, (end + resolution) * 1000000 - 1) if p.dated]
+    return list(chain.from_iterable(rows for _, rows in read_sources(partitions, query, (resolution, start, end))))
+
 # GENERAL
 def select_date_interval():
-    query = "SELECT datetime(MIN(timestamp)), datetime(MAX(timestamp)) FROM event_logs"
-    result = execute_query(query, (), True)
-    if result:
-        first, last = result
-        return result
+    bounds = [stats["ts_us"] for stats in all_partition_stats() if stats["ts_us"][0] is not None]
+    if bounds:
+        result = (min(first for first, _ in bounds), max(last for _, last in bounds))
+        return tuple(datetime.fromtimestamp(ts_us // 1000000, timezone.utc).strftime("%Y-%m-%d %H:%M:%S") for ts_us in result)
 
 def verify_sql_version():
     sql_version = sqlite3.sqlite_version_info
@@ -1,4 +1,9 @@
-from PySide6.QtWidgets import QPushButton, QDialog, QVBoxLayout, QLabel, QHBoxLayout
+import re
+from PySide6.QtWidgets import (
+    QPushButton, QDialog, QVBoxLayout, QLabel, QHBoxLayout,
+    QFormLayout, QLineEdit, QSpinBox, QComboBox, QMessageBox
+)
+from utils.alert_rules import CompiledRule, GROUP_FIELDS
 
 class ConfirmDialog(QDialog):
     def __init__(self, title, message, parent=None):
@@ -23,4 +28,86 @@ class ConfirmDialog(QDialog):
 
         btn_layout.addWidget(confirm_btn)
         btn_layout.addWidget(cancel_btn)
-        container.addLayout(btn_layout)
\ No newline at end of file
+        container.addLayout(btn_layout)
+
+class RuleDialog(QDialog):
+    """Form for a new alert rule; rule() returns it as an alert_rules row."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("New Alert Rule")
+        self.setMinimumWidth(450)
+        container = QVBoxLayout(self)
+        form = QFormLayout()
+
+        self.name_edit = QLineEdit()
+        self.levels_edit = QLineEdit()
+        self.levels_edit.setPlaceholderText("any, or e.g. error, critical")
+        self.categories_edit = QLineEdit()
+        self.categories_edit.setPlaceholderText("any, or e.g. auth")
+        self.event_types_edit = QLineEdit()
+        self.event_types_edit.setPlaceholderText("any, or e.g. login_failed")
+        self.sources_edit = QLineEdit()
+        self.sources_edit.setPlaceholderText("any")
+        self.tags_edit = QLineEdit()
+        self.tags_edit.setPlaceholderText("any")
+        self.regex_edit = QLineEdit()
+        self.regex_edit.setPlaceholderText("message regex, optional")
+        self.threshold_spin = QSpinBox()
+        self.threshold_spin.setRange(1, 100000)
+        self.window_spin = QSpinBox()
+        self.window_spin.setRange(0, 7 * 86400)
+        self.window_spin.setSuffix(" s")
+        self.window_spin.setSpecialValueText("no window")
+        self.group_combo = QComboBox()
+        self.group_combo.addItem("(all events)", None)
+        for field in GROUP_FIELDS:
+            self.group_combo.addItem(field, field)
+
+        form.addRow("Name", self.name_edit)
+        form.addRow("Levels", self.levels_edit)
+        form.addRow("Categories", self.categories_edit)
+        form.addRow("Event types", self.event_types_edit)
+        form.addRow("Sources", self.sources_edit)
+        form.addRow("Tags", self.tags_edit)
+        form.addRow("Message", self.regex_edit)
+        form.addRow("Alert after", self.threshold_spin)
+        form.addRow("Within", self.window_spin)
+        form.addRow("Counted per", self.group_combo)
+        container.addLayout(form)
+
+        btn_layout = QHBoxLayout()
+        save_btn = QPushButton("Save")
+        save_btn.clicked.connect(self.validate)
+        cancel_btn = QPushButton("Cancel")
+        cancel_btn.clicked.connect(self.reject)
+        btn_layout.addWidget(save_btn)
+        btn_layout.addWidget(cancel_btn)
+        container.addLayout(btn_layout)
+
+    def rule(self):
+        values = lambda edit: [v.strip() for v in edit.text().split(",") if v.strip()]
+        return {
+            "name": self.name_edit.text().strip(),
+            "levels": values(self.levels_edit),
+            "categories": values(self.categories_edit),
+            "event_types": values(self.event_types_edit),
+            "sources": values(self.sources_edit),
+            "tags": values(self.tags_edit),
+            "message_regex": self.regex_edit.text().strip() or None,
+            "threshold": self.threshold_spin.value(),
+            "window_seconds": self.window_spin.value() or None,
+            "group_by": self.group_combo.currentData(),
+        }
+
+    def validate(self):
+        rule = self.rule()
+        if not rule["name"]:
+            QMessageBox.warning(self, "Error", "The rule needs a name")
+            return
+        try:
+            CompiledRule(rule)
+        except (ValueError, re.error) as e:
+            QMessageBox.warning(self, "Error", f"Invalid rule: {e}")
+            return
+        self.accept()
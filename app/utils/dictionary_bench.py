@@ -0,0 +1,121 @@
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+from utils.migrations import MIGRATIONS
+from utils.log_parser import format_epoch_us
+from utils.db_crud import EVENT_COLUMNS, ENCODED_FIELDS, keyset_segments, table_keyset
+
+# Size, import rate and keyset paging of the event table before (schema v6,
+# text columns) and after (v7) dictionary encoding, measured on throwaway
+# plain SQLite databases. Run from app/:  python -m utils.dictionary_bench [events]
+#
+# v6 is measured without the statistics its migrations took on the empty
+# tables, which v7 drops: they slow every search index write as the table
+# grows. Pages are read by time, and by category (header sort), which in v7
+# goes through the value_dictionary join.
+
+BATCH = 5000
+PAGES = 400
+LEVELS = ("info", "warn", "error", "critical")
+CATEGORIES = ("auth", "payment", "network", "storage", "search", "billing", "profile", "admin")
+EVENT_TYPES = ("login_failed", "login", "timeout", "disk_full", "refund", "signup")
+USER_AGENTS = tuple(f"Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 Chrome/{100 + i}.0.{i * 7}.0 Safari/537.36" for i in range(300))
+
+def events(count, start_us=1767225600 * 1000000):
+    rng = random.Random(7)
+    for i in range(count):
+        ts_us = start_us + i * 1000000
+        yield (
+            f"bench-{i}", format_epoch_us(ts_us), rng.choice(LEVELS), rng.choice(CATEGORIES), rng.choice(EVENT_TYPES), "api-gateway",
+            f"request {i} finished with code {rng.choice((200, 404, 500))}", "Traceback (most recent call last): ...",
+            '["bench", "api"]', "shop", "2.4.1", f"user-{i % 500}", f"10.0.{i % 256}.{i % 7}", rng.choice(("GET", "POST")),
+            "/api/v1/orders", "500", rng.choice(USER_AGENTS), ts_us,
+        )
+
+def build(path, version):
+    conn = sqlite3.connect(path)
+    for target, _, steps in MIGRATIONS:
+        if target > version:
+            break
+        for step in steps:
+            step(conn) if callable(step) else conn.execute(step)
+        conn.execute(f"PRAGMA user_version = {target}")
+        conn.commit()
+    if version < 7:
+        conn.execute("DELETE FROM sqlite_stat1")
+        conn.execute("ANALYZE sqlite_master")
+        conn.commit()
+    # the statistics are read when a connection loads the schema
+    conn.close()
+    return sqlite3.connect(path)
+
+def encoder(conn):
+    ids = {}
+    positions = [(EVENT_COLUMNS.index(field), field) for field in ENCODED_FIELDS]
+    def encode(row):
+        row = list(row)
+        for i, field in positions:
+            key = (field, row[i])
+            if key not in ids:
+                conn.execute("INSERT INTO value_dictionary (field, value) VALUES (?, ?)", key)
+                ids[key] = conn.execute("SELECT id FROM value_dictionary WHERE field = ? AND value = ?", key).fetchone()[0]
+            row[i] = ids[key]
+        return tuple(row)
+    return encode, ids
+
+def load(conn, count, encoded):
+    query = f"INSERT OR IGNORE INTO event_logs ({', '.join(EVENT_COLUMNS)}) VALUES ({', '.join('?' * len(EVENT_COLUMNS))})"
+    encode, ids = encoder(conn)
+    rows = list(events(count))
+    started = time.perf_counter()
+    for i in range(0, count, BATCH):
+        batch = rows[i:i + BATCH]
+        conn.executemany(query, [encode(row) for row in batch] if encoded else batch)
+        conn.commit()
+    rate = count / (time.perf_counter() - started)
+    conn.execute("PRAGMA optimize")
+    return rate, {id: value for (_, value), id in ids.items()}
+
+def read_pages(conn, order_by, encoded, values, page_size):
+    columns = ", ".join(f"e.{c}" for c in EVENT_COLUMNS)
+    index = EVENT_COLUMNS.index(order_by) + 1
+    positions = [EVENT_COLUMNS.index(field) + 1 for field in ENCODED_FIELDS] if encoded else []
+    after = None
+    started = time.perf_counter()
+    for _ in range(PAGES):
+        if encoded:
+            segments = table_keyset("event_logs", order_by, False, after)
+        else:
+            segments = [("{db}.event_logs e", f"e.{order_by}, e.rowid", where, params) for where, params, _ in keyset_segments(f"e.{order_by}", False, after)]
+        page = []
+        for source, order, where, params in segments:
+            query = f"SELECT e.rowid, {columns} FROM {source.format(db='main')} WHERE {where} ORDER BY {order} LIMIT ?"
+            page += conn.execute(query, params + (page_size - len(page),)).fetchall()
+            if len(page) >= page_size:
+                break
+        # decoded like db_crud.decode_rows
+        page = [tuple(values.get(v, v) if i in positions else v for i, v in enumerate(row)) for row in page]
+        if len(page) < page_size:
+            break
+        after = (page[-1][index], page[-1][0])
+    return time.perf_counter() - started
+
+def main(count=100000):
+    page_size = max(1, count // PAGES)
+    print(f"{count} events, {len(USER_AGENTS)} user agents, {len(CATEGORIES)} categories; {PAGES} keyset pages of {page_size}")
+    print(f"{'schema':<8} {'size MB':>8} {'pages':>7} {'import/s':>9} {'by time s':>10} {'by category s':>14}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for version in (6, 7):
+            conn = build(str(Path(tmp) / f"v{version}.db"), version)
+            rate, values = load(conn, count, version >= 7)
+            pages, page_bytes = conn.execute("PRAGMA page_count").fetchone()[0], conn.execute("PRAGMA page_size").fetchone()[0]
+            by_time = read_pages(conn, "ts_us", version >= 7, values, page_size)
+            by_category = read_pages(conn, "category", version >= 7, values, page_size)
+            print(f"v{version:<7} {pages * page_bytes / 1e6:>8.1f} {pages:>7} {rate:>9,.0f} {by_time:>10.2f} {by_category:>14.2f}")
+            conn.close()
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
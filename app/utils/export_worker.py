@@ -0,0 +1,73 @@
+import os
+import time
+import traceback
+from PySide6.QtCore import QRunnable, QObject, Signal
+from utils.db_crud import log_activity, iter_table, count_rows
+from utils.log_export import open_export_file
+
+source_dir = "log exporter"
+
+class ExportSignals(QObject):
+    progress = Signal(dict)
+    finished = Signal(dict)
+    error = Signal(str)
+
+class ExportWorker(QRunnable):
+    """Streams a table's rows, in the view's order and search, to an export file off the GUI thread.
+
+    Rows are written a page at a time as they are read. A cancelled or
+    failed export removes the partial file.
+    """
+
+    def __init__(self, file_path, table="event_logs", order_by="timestamp", descending=False, match=None):
+        super().__init__()
+        self.file_path = file_path
+        self.table = table
+        self.order_by = order_by
+        self.descending = descending
+        self.match = match
+        self.signals = ExportSignals()
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        started = time.monotonic()
+        records = 0
+        created = False
+        try:
+            total = count_rows(self.table, self.match)
+            with open_export_file(self.file_path) as writer:
+                created = True
+                for rows in iter_table(self.table, self.order_by, self.descending, self.match):
+                    if self._cancelled:
+                        break
+                    writer.write_records([row[1:] for row in rows])
+                    records += len(rows)
+                    self.signals.progress.emit(self.progress_info(records, total, writer, started))
+            if self._cancelled:
+                os.remove(self.file_path)
+            else:
+                log_activity("info", "event log export", source_dir, f"Exported {records} records to {self.file_path}", "", "ExportWorker run")
+            self.signals.finished.emit({"records": records, "bytes": os.path.getsize(self.file_path) if not self._cancelled else 0, "cancelled": self._cancelled})
+        except Exception as e:
+            log_activity("error", type(e).__name__, source_dir, str(e), traceback.format_exc(), "ExportWorker run")
+            if created and os.path.exists(self.file_path):
+                os.remove(self.file_path)
+            self.signals.error.emit(str(e))
+
+    def progress_info(self, records, total, writer, started):
+        elapsed = max(time.monotonic() - started, 1e-6)
+        records_per_sec = records / elapsed
+        eta = (total - records) / records_per_sec if records_per_sec else 0
+        return {
+            "records": records,
+            "total": total,
+            "bytes_written": writer.bytes_written,
+            "file_bytes": writer.file_bytes,
+            "records_per_sec": records_per_sec,
+            "bytes_per_sec": writer.bytes_written / elapsed,
+            "eta": max(eta, 0),
+            "percent": min(99, int(100 * records / total)) if total else -1,
+        }
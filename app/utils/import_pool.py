@@ -0,0 +1,115 @@
+import multiprocessing
+import os
+import queue
+from concurrent.futures import ProcessPoolExecutor
+from utils.log_parser import IMPORT_BATCH_SIZE, ImportChunk, open_log_file, iter_event_chunks, event_to_record
+
+# Parallel parsing for multi-file imports.
+#
+# Worker processes each take a whole file, parse it and flatten the events
+# into event_logs records; the record batches come back over one bounded
+# queue and are written by the importing thread alone (SQLCipher has a
+# single writer). The bound keeps memory flat: the workers wait whenever
+# the writer falls behind. Chunks already in the import manifest are
+# reported as skipped instead of being parsed. This module only imports
+# log_parser, and main.py imports the GUI only under its __main__ guard, so
+# a spawned worker (which re-imports main.py as __mp_main__) loads neither
+# Qt nor the database code.
+
+# leave one core to the writer
+MAX_PARSE_WORKERS = max(1, min(8, (os.cpu_count() or 2) - 1))
+QUEUE_TIMEOUT = 0.2  # seconds between cancellation checks
+
+_results = None
+_cancelled = None
+
+def _init_worker(results, cancelled):
+    global _results, _cancelled
+    _results, _cancelled = results, cancelled
+    # a cancelled import stops reading; don't hang on exit flushing to it
+    _results.cancel_join_thread()
+
+def _send(message):
+    while not _cancelled.is_set():
+        try:
+            _results.put(message, timeout=QUEUE_TIMEOUT)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+def parse_file(index, file_path, batch_size, known=frozenset()):
+    """Worker process: sends ("batch", index, (digest, records), bytes_read) for each batch of a file,
+    ("skip", index, count, bytes_read) for a batch whose digest is in `known`, then ("done", ...) or ("error", ...)."""
+    records = 0
+    try:
+        with open_log_file(file_path) as reader:
+            for chunk in iter_event_chunks(reader, batch_size):
+                if chunk.digest in known:
+                    message = ("skip", index, chunk.count, reader.bytes_read)
+                else:
+                    message = ("batch", index, (chunk.digest, [event_to_record(entry) for entry in chunk.entries()]), reader.bytes_read)
+                records += chunk.count
+                if not _send(message):
+                    return
+        _send(("done", index, records, None))
+    except KeyError as e:
+        _send(("error", index, f"Rejected: Missing key {str(e)} after {records} records", None))
+    except Exception as e:
+        _send(("error", index, f"{type(e).__name__}: {e}", None))
+
+class ParallelParser:
+    """Parses several log files in a process pool and yields their record batches, as ImportChunks, in arrival order.
+
+    bytes_read and errors are kept per file while batches() runs; a file
+    that fails is reported in errors and the others carry on. Batches with
+    a digest in `known` go to on_skip(file_path, count) instead.
+    """
+
+    def __init__(self, file_paths, workers=MAX_PARSE_WORKERS, batch_size=IMPORT_BATCH_SIZE, known=frozenset(), on_skip=None):
+        self.file_paths = list(file_paths)
+        self.known = frozenset(known)
+        self.on_skip = on_skip
+        self.workers = max(1, min(workers, len(self.file_paths)))
+        self.batch_size = batch_size
+        self.total_bytes = sum(os.path.getsize(path) for path in self.file_paths)
+        self.bytes_read = [0] * len(self.file_paths)
+        self.errors = {}
+        self.done = 0
+
+    def batches(self, is_cancelled=None):
+        context = multiprocessing.get_context("spawn")
+        results = context.Queue(maxsize=2 * self.workers)
+        cancelled = context.Event()
+        pool = ProcessPoolExecutor(self.workers, mp_context=context, initializer=_init_worker, initargs=(results, cancelled))
+        try:
+            futures = [pool.submit(parse_file, i, path, self.batch_size, self.known) for i, path in enumerate(self.file_paths)]
+            pending = set(range(len(self.file_paths)))
+            while pending:
+                if is_cancelled and is_cancelled():
+                    return
+                try:
+                    kind, index, payload, bytes_read = results.get(timeout=QUEUE_TIMEOUT)
+                except queue.Empty:
+                    # a worker process that died never reports its file
+                    for i in [i for i in pending if futures[i].done() and futures[i].exception()]:
+                        self.errors[self.file_paths[i]] = f"Parser process failed: {futures[i].exception()}"
+                        pending.discard(i)
+                    continue
+                if kind == "batch":
+                    self.bytes_read[index] = bytes_read
+                    yield ImportChunk(payload[1], payload[0], self.file_paths[index])
+                    continue
+                if kind == "skip":
+                    self.bytes_read[index] = bytes_read
+                    if self.on_skip:
+                        self.on_skip(self.file_paths[index], payload)
+                    continue
+                pending.discard(index)
+                self.done += 1
+                self.bytes_read[index] = os.path.getsize(self.file_paths[index])
+                if kind == "error":
+                    self.errors[self.file_paths[index]] = payload
+        finally:
+            cancelled.set()
+            pool.shutdown(wait=True, cancel_futures=True)
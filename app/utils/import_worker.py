@@ -0,0 +1,124 @@
+import os
+import time
+import traceback
+from PySide6.QtCore import QRunnable, QObject, Signal
+from utils.db_crud import log_activity, fetch_import_digests, fetch_alert_rules
+from utils.ingest import IngestPipeline, alert_engine, default_stages
+from utils.log_parser import IMPORT_BATCH_SIZE, ImportChunk, open_log_file, iter_event_chunks, file_digest
+from utils.import_pool import ParallelParser
+
+source_dir = "log importer"
+
+class ImportSignals(QObject):
+    progress = Signal(dict)
+    finished = Signal(dict)
+    error = Signal(str)
+
+class ImportWorker(QRunnable):
+    """Imports log files batch by batch off the GUI thread.
+
+    Cancellation is checked between batches, and between the parts of a
+    batch spanning more months than can be attached at once; a batch (or
+    part) is committed as a whole, so a cancelled import never leaves a
+    half-written one behind. See utils.ingest for what a crash can leave.
+    Several files are parsed in parallel by import_pool and written here by
+    the one writer; a file that fails to parse is reported, the rest are
+    imported.
+
+    Files and chunks listed in the import manifest are skipped without
+    being parsed and counted as duplicates, like the records INSERT OR
+    IGNORE finds already stored.
+    """
+
+    def __init__(self, file_paths, prefs_sets, batch_size=IMPORT_BATCH_SIZE):
+        super().__init__()
+        self.file_paths = [file_paths] if isinstance(file_paths, str) else list(file_paths)
+        self.prefs_sets = prefs_sets
+        self.batch_size = batch_size
+        self.signals = ImportSignals()
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        started = time.monotonic()
+        try:
+            engine = alert_engine(self.prefs_sets, fetch_alert_rules(enabled_only=True))
+            for name, message in engine.errors.items():
+                log_activity("error", "alert rule", source_dir, f"Rule {name} skipped: {message}", "", "ImportWorker run")
+            pipeline = IngestPipeline(default_stages(engine), self.batch_size)
+            known = fetch_import_digests()
+            digests = self.new_files(pipeline, known)
+            if not digests:
+                summary = pipeline.summary()
+            elif len(self.file_paths) == 1:
+                summary = self.import_file(pipeline, self.file_paths[0], started, known)
+            else:
+                summary = self.import_files(pipeline, list(digests), started, known)
+            if not summary["cancelled"]:
+                for path, digest in digests.items():
+                    if path not in summary.get("failed", {}):
+                        pipeline.finish_file(path, digest)
+            source = self.file_paths[0] if len(self.file_paths) == 1 else f"{len(self.file_paths)} files"
+            log_activity("info", "event log import", source_dir, f"Imported {summary['records']} records ({summary['inserted']} new, {summary['duplicates']} duplicate), {summary['alerts']} alert(s) from {source}; {summary['skipped_files']} file(s) and {summary['skipped_chunks']} chunk(s) already imported", "", "ImportWorker run")
+            for path, message in summary.get("failed", {}).items():
+                log_activity("error", "event log import", source_dir, f"{path}: {message}", "", "ImportWorker run")
+            self.signals.finished.emit(summary)
+        except Exception as e:
+            log_activity("error", type(e).__name__, source_dir, str(e), traceback.format_exc(), "ImportWorker run")
+            self.signals.error.emit(str(e))
+
+    def new_files(self, pipeline, known):
+        """{path: digest} of the files not imported before; the rest are counted as skipped."""
+        digests = {}
+        for path in self.file_paths:
+            digest = file_digest(path)
+            if digest in known or digest in digests.values():
+                pipeline.skip_file(known.get(digest, 0))
+            else:
+                digests[path] = digest
+        return digests
+
+    def new_chunks(self, pipeline, chunks, file_path, known):
+        for chunk in chunks:
+            if chunk.digest in known:
+                pipeline.skip_chunk(file_path, chunk.count)
+            else:
+                yield ImportChunk(chunk.entries(), chunk.digest, file_path)
+
+    def import_file(self, pipeline, file_path, started, known):
+        total_bytes = os.path.getsize(file_path)
+        with open_log_file(file_path) as reader:
+            on_batch = lambda p: self.signals.progress.emit(self.progress_info(p.records, reader.bytes_read, total_bytes, started))
+            chunks = self.new_chunks(pipeline, iter_event_chunks(reader, self.batch_size), file_path, known)
+            try:
+                return pipeline.run_batches(chunks, on_batch, lambda: self._cancelled)
+            except KeyError as e:
+                raise KeyError(f"Rejected: Missing key {str(e)} after {pipeline.records} records") from e
+
+    def import_files(self, pipeline, file_paths, started, known):
+        parser = ParallelParser(file_paths, batch_size=self.batch_size, known=known, on_skip=pipeline.skip_chunk)
+        def on_batch(p):
+            info = self.progress_info(p.records, sum(parser.bytes_read), parser.total_bytes, started)
+            info["files"] = (parser.done, len(file_paths))
+            self.signals.progress.emit(info)
+        is_cancelled = lambda: self._cancelled
+        summary = pipeline.run_batches(parser.batches(is_cancelled), on_batch, is_cancelled, validated=True)
+        summary["cancelled"] = summary["cancelled"] or self._cancelled
+        summary["files"] = len(self.file_paths)
+        summary["failed"] = dict(parser.errors)
+        return summary
+
+    def progress_info(self, records, bytes_read, total_bytes, started):
+        elapsed = max(time.monotonic() - started, 1e-6)
+        byte_rate = bytes_read / elapsed
+        eta = (total_bytes - bytes_read) / byte_rate if byte_rate else 0
+        return {
+            "records": records,
+            "bytes_read": bytes_read,
+            "total_bytes": total_bytes,
+            "records_per_sec": records / elapsed,
+            "eta": max(eta, 0),
+            "percent": min(99, int(100 * bytes_read / total_bytes)) if total_bytes else -1,
+        }
@@ -0,0 +1,263 @@
+import uuid
+from datetime import datetime
+from utils.db_crud import (
+    get_connections, mark_changed, optimize_db, encode_event_rows, attach_event_partitions,
+    insert_event_rows, forget_partition_stats, record_import, ALERT_INSERT_QUERY
+)
+from utils.log_parser import IMPORT_BATCH_SIZE, ImportChunk, iter_batches, event_to_record, to_epoch_us
+from utils.partitions import MAX_ATTACHED_PARTITIONS, UNDATED, month_of
+from utils.alert_rules import RuleEngine, level_rule
+
+# Ingest pipeline: parse -> validate -> attach partitions -> encode -> insert event -> evaluate alert rules -> insert alert
+#
+# The parsed events are cut into batches and every stage runs over the batch
+# in order. A stage is any callable taking the IngestBatch; to add one, pass
+# a custom stage list to IngestPipeline. Stages before attach_partitions
+# must not write: partitions can only be attached outside a transaction.
+#
+# All stages of a batch share one writer transaction, so an error or a
+# rollback undoes the batch's events and alerts together. That transaction
+# spans files, though: the events go to their month partitions and the
+# alerts to main. In WAL mode SQLite commits each file atomically but not
+# the set, so a crash in the middle of the commit can keep a batch's events
+# without their alerts (or the other way round). A batch spanning more than
+# MAX_ATTACHED_PARTITIONS months is also split into parts committed one
+# after the other, so a crash or cancel between parts keeps the parts
+# already committed. Nothing is lost for good: events never get an alert
+# twice (alert_logs has one per log_id), and the next alert backfill
+# (db_crud.backfill_alerts) raises the alerts that are missing for stored
+# events.
+#
+# Batches parsed elsewhere (the process pool of a multi-file import) enter
+# with their records already validated; validate_events leaves them as is.
+# A batch that is a chunk of an import file (ImportChunk with a digest) is
+# added to the import manifest in the transaction of its last part, so a
+# chunk cut short is read again by the next import of its file.
+
+class IngestBatch:
+    __slots__ = ("entries", "conn", "records", "events", "alerts", "inserted", "inserted_ids", "alerted", "partitions")
+
+    def __init__(self, entries, conn, records=None):
+        self.entries = entries
+        self.conn = conn
+        # event_logs rows as parsed; events holds them once encoded
+        self.records = records
+        self.events = []
+        self.alerts = []
+        self.inserted = 0
+        # ids of the events this batch stored; the others were already there
+        self.inserted_ids = set()
+        # alerts actually stored; an event that already has one gets no other
+        self.alerted = 0
+        self.partitions = {}
+
+class ImportTally:
+    """Records read, records inserted and the _id / ts_us range of one imported chunk or file."""
+    __slots__ = ("records", "inserted", "first_id", "last_id", "first_us", "last_us")
+
+    def __init__(self):
+        self.records = self.inserted = 0
+        self.first_id = self.last_id = self.first_us = self.last_us = None
+
+    def add(self, records, inserted):
+        self.records += len(records)
+        self.inserted += inserted
+        ids = [str(record[0]) for record in records]
+        stamps = [record[-1] for record in records if record[-1] is not None]
+        self.first_id, self.last_id = _widen(self.first_id, self.last_id, ids)
+        self.first_us, self.last_us = _widen(self.first_us, self.last_us, stamps)
+
+    def merge(self, other):
+        self.records += other.records
+        self.inserted += other.inserted
+        self.first_id, self.last_id = _widen(self.first_id, self.last_id, [v for v in (other.first_id, other.last_id) if v is not None])
+        self.first_us, self.last_us = _widen(self.first_us, self.last_us, [v for v in (other.first_us, other.last_us) if v is not None])
+
+    def row(self):
+        return (self.records, self.inserted, self.first_id, self.last_id, self.first_us, self.last_us)
+
+def _widen(low, high, values):
+    if not values:
+        return low, high
+    low = min(values) if low is None else min(low, min(values))
+    high = max(values) if high is None else max(high, max(values))
+    return low, high
+
+def entry_month(entry):
+    try:
+        return month_of(to_epoch_us(entry["timestamp"]["$date"]))
+    except (KeyError, TypeError):
+        return UNDATED
+
+def record_month(record):
+    return month_of(record[-1])
+
+def split_by_partition(entries, month=entry_month):
+    """Splits a batch so that no part needs more than MAX_ATTACHED_PARTITIONS partitions.
+
+    Each part is its own transaction, so the batch is no longer committed
+    as a whole (see the note at the top of this module).
+    """
+    months = {}
+    for entry in entries:
+        months.setdefault(month(entry), []).append(entry)
+    if len(months) <= MAX_ATTACHED_PARTITIONS:
+        yield entries
+        return
+    groups = list(months.values())
+    for i in range(0, len(groups), MAX_ATTACHED_PARTITIONS):
+        yield [entry for group in groups[i:i + MAX_ATTACHED_PARTITIONS] for entry in group]
+
+def validate_events(batch):
+    """Flattens every entry into an event_logs row, raises KeyError on a missing field."""
+    if batch.records is None:
+        batch.records = [event_to_record(entry) for entry in batch.entries]
+
+def attach_partitions(batch):
+    """Attaches (creating when new) the month partitions the batch's events go to."""
+    batch.partitions = attach_event_partitions(batch.conn, {record_month(record) for record in batch.records})
+
+def encode_events(batch):
+    """Swaps the repeated strings for value_dictionary ids, in the batch's transaction."""
+    batch.events = encode_event_rows(batch.records)
+
+def insert_events(batch):
+    batch.inserted = insert_event_rows(batch.conn, batch.events, batch.partitions, batch.inserted_ids)
+
+def inserted_records(batch):
+    """The batch's records that insert_events stored, each id once: duplicates never reach the alert rules."""
+    new = {str(id) for id in batch.inserted_ids}
+    for record in batch.records:
+        id = str(record[0])
+        if id in new:
+            new.discard(id)
+            yield record
+
+def evaluate_alert_rules(engine):
+    """Builds the stage that raises the alerts of a RuleEngine; its window counts carry over from batch to batch.
+
+    Only the events the batch stored are counted, so re-importing events
+    that are already stored neither raises alerts nor moves the windows.
+    """
+
+    def evaluate_alerts(batch):
+        if not engine:
+            return
+        now = datetime.now()
+        now_us = to_epoch_us(now)
+        for record, rule in engine.matches(inserted_records(batch)):
+            # record fields: 0 _id, 2 level, 3 category, 4 event_type
+            batch.alerts.append((
+                str(uuid.uuid4()),
+                now,
+                record[2],
+                record[3],
+                record[4],
+                rule.message(record),
+                record[0],
+                "unread",
+                now_us
+            ))
+    return evaluate_alerts
+
+def insert_alerts(batch):
+    if batch.alerts:
+        batch.alerted = batch.conn.executemany(ALERT_INSERT_QUERY, batch.alerts).rowcount
+
+def alert_engine(prefs_sets, rules=()):
+    """RuleEngine for the preference levels plus `rules` (alert_rules rows)."""
+    return RuleEngine([level_rule(prefs_sets), *rules])
+
+def default_stages(engine):
+    return [validate_events, attach_partitions, encode_events, insert_events, evaluate_alert_rules(engine), insert_alerts]
+
+class IngestPipeline:
+    def __init__(self, stages, batch_size=IMPORT_BATCH_SIZE):
+        self.stages = stages
+        self.batch_size = batch_size
+        self.records = 0
+        self.inserted = 0
+        self.alerts = 0
+        self.duplicates = 0
+        self.skipped_chunks = 0
+        self.skipped_files = 0
+        self.cancelled = False
+        # ImportTally per import file, for its manifest entry
+        self.files = {}
+
+    def run(self, entries, on_batch=None, is_cancelled=None):
+        """Feeds parsed entries through the stages, one transaction per batch."""
+        return self.run_batches(iter_batches(entries, self.batch_size), on_batch, is_cancelled)
+
+    def run_batches(self, chunks, on_batch=None, is_cancelled=None, validated=False):
+        """Feeds batches through the stages, one transaction each (one per part for a batch split by split_by_partition).
+
+        A batch is a list of parsed entries, or of event_logs records when
+        `validated` (see import_pool), or an ImportChunk of either.
+        """
+        connections = get_connections()
+        month = record_month if validated else entry_month
+        for chunk in chunks:
+            if not isinstance(chunk, ImportChunk):
+                chunk = ImportChunk(chunk, None, None)
+            tally = ImportTally()
+            parts = list(split_by_partition(chunk.items, month))
+            for i, part in enumerate(parts):
+                if is_cancelled and is_cancelled():
+                    self.cancelled = True
+                    break
+                batch = IngestBatch(None, None, part) if validated else IngestBatch(part, None)
+                try:
+                    with connections.writer() as conn:
+                        batch.conn = conn
+                        for stage in self.stages:
+                            stage(batch)
+                        tally.add(batch.records, batch.inserted)
+                        if chunk.digest and i == len(parts) - 1:
+                            record_import(conn, chunk.digest, "chunk", chunk.source, tally.row())
+                finally:
+                    forget_partition_stats(p.id for p in batch.partitions.values())
+                self.records += len(batch.events)
+                self.inserted += batch.inserted
+                self.duplicates += len(batch.events) - batch.inserted
+                self.alerts += batch.alerted
+                if batch.inserted:
+                    mark_changed("event_logs")
+                if batch.alerted:
+                    mark_changed("alert_logs")
+                if on_batch:
+                    on_batch(self)
+            if chunk.source:
+                self.files.setdefault(chunk.source, ImportTally()).merge(tally)
+            if self.cancelled:
+                break
+        if self.inserted:
+            optimize_db()
+        return self.summary()
+
+    def skip_chunk(self, source, records):
+        """Counts a chunk found in the import manifest as duplicates."""
+        self.skipped_chunks += 1
+        self.duplicates += records
+        self.files.setdefault(source, ImportTally()).records += records
+
+    def skip_file(self, records):
+        self.skipped_files += 1
+        self.duplicates += records
+
+    def finish_file(self, source, digest):
+        """Adds a completely imported file to the import manifest."""
+        tally = self.files.get(source) or ImportTally()
+        with get_connections().writer() as conn:
+            record_import(conn, digest, "file", source, tally.row())
+
+    def summary(self):
+        return {
+            "records": self.records,
+            "inserted": self.inserted,
+            "duplicates": self.duplicates,
+            "skipped_chunks": self.skipped_chunks,
+            "skipped_files": self.skipped_files,
+            "alerts": self.alerts,
+            "cancelled": self.cancelled,
+        }
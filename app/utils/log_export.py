@@ -0,0 +1,97 @@
+import csv
+import io
+import json
+
+# --- EXPORT ---
+EXPORT_FORMATS = ("jsonl", "csv")
+ZSTD_SUFFIX = ".zst"
+ZSTD_LEVEL = 3
+# columns written to CSV, in EVENT_COLUMNS order; ts_us is derived from timestamp
+CSV_COLUMNS = ("id", "timestamp", "level", "category", "event_type", "source", "message", "stack", "tags", "app_name", "app_version", "user_id", "user_ip", "user_method", "user_endpoint", "user_status", "user_agent")
+
+def export_format(file_path):
+    """(format, compressed) for an export file name such as `logs.jsonl.zst`."""
+    name = str(file_path).lower()
+    compressed = name.endswith(ZSTD_SUFFIX)
+    if compressed:
+        name = name[:-len(ZSTD_SUFFIX)]
+    for fmt in EXPORT_FORMATS:
+        if name.endswith("." + fmt):
+            return fmt, compressed
+    raise ValueError(f"Unsupported export file type: {file_path}")
+
+def record_to_event(record):
+    """Turns an event_logs row (EVENT_COLUMNS order) back into a MongoDB event, the inverse of event_to_record."""
+    (id, timestamp, level, category, event_type, source, message, stack, tags, app_name, app_version,
+     user_id, user_ip, user_method, user_endpoint, user_status, user_agent) = record[:17]
+    try:
+        tags = json.loads(tags) if tags is not None else None
+    except ValueError:
+        pass
+    return {
+        "_id": id,
+        "timestamp": {"$date": timestamp},
+        "level": level,
+        "category": category,
+        "event_type": event_type,
+        "source": source,
+        "message": message,
+        "stack": stack,
+        "tags": tags,
+        "app": {"name": app_name, "version": app_version},
+        "user": {"id": user_id, "ip": user_ip, "method": user_method, "endpoint": user_endpoint, "status": user_status, "user_agent": user_agent},
+    }
+
+class LogFileWriter:
+    """Writes exported events as JSON lines or CSV, zstd-compressed on request.
+
+    Each batch of rows is encoded and passed straight through the
+    (optional) compressor to the file, so memory use does not grow with the
+    export. bytes_written counts the encoded bytes, file_bytes what has
+    reached the file after compression.
+    """
+
+    def __init__(self, file_path, fmt="jsonl", compressed=False):
+        self.fmt = fmt
+        self.raw = open(file_path, "wb")
+        self.stream = self.raw
+        if compressed:
+            import zstandard  # only needed when exporting compressed
+            self.stream = zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(self.raw, closefd=False)
+        self.bytes_written = 0
+        if fmt == "csv":
+            self.write_text(self.csv_text([CSV_COLUMNS]))
+
+    @property
+    def file_bytes(self):
+        return self.raw.tell()
+
+    def csv_text(self, rows):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue()
+
+    def write_text(self, text):
+        data = text.encode("utf-8")
+        self.stream.write(data)
+        self.bytes_written += len(data)
+
+    def write_records(self, records):
+        if self.fmt == "csv":
+            self.write_text(self.csv_text(record[:len(CSV_COLUMNS)] for record in records))
+        else:
+            self.write_text("".join(json.dumps(record_to_event(record), ensure_ascii=False) + "\n" for record in records))
+
+    def close(self):
+        if self.stream is not self.raw:
+            self.stream.close()
+        self.raw.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def open_export_file(file_path):
+    return LogFileWriter(file_path, *export_format(file_path))
@@ -0,0 +1,401 @@
+import bz2
+import codecs
+import gzip
+import hashlib
+import json
+import lzma
+import math
+import os
+import zlib
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from operator import itemgetter
+
+# --- IMPORT ---
+IMPORT_BATCH_SIZE = 5000
+READ_CHUNK_SIZE = 1024 * 1024
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\r\n"
+# largest single event the parser will hold while looking for its end
+MAX_EVENT_SIZE = 64 * 1024 * 1024
+# a decode error this close to the end of the buffer may be a value cut off by the read
+_TRUNCATION_TAIL = 16
+
+def _skip_ws(buf, pos):
+    while pos < len(buf) and buf[pos] in _WHITESPACE:
+        pos += 1
+    return pos
+
+def _truncated(error, buf):
+    """True if a JSONDecodeError may only mean that the document goes on past the end of `buf`."""
+    # an unterminated string is reported where the string starts, however long it is
+    return error.msg.startswith("Unterminated string") or len(buf) - error.pos <= _TRUNCATION_TAIL
+
+def iter_events(stream, chunk_size=READ_CHUNK_SIZE, with_text=False, max_event_size=MAX_EVENT_SIZE):
+    """Yields events one at a time from an open text stream.
+
+    Accepts a MongoDB JSON array export (`[{...}, {...}]`), a single JSON
+    document, or line-delimited / concatenated documents (mongoexport JSONL).
+    Only one read chunk plus the event being decoded is held in memory; an
+    event longer than `max_event_size` raises ValueError. A syntax error
+    raises as soon as it is read, not after the rest of the file.
+    With `with_text`, yields (event, raw JSON text) pairs.
+    """
+    buf = ""
+    pos = 0
+    eof = False
+    # characters dropped from the front of buf, for the offsets in errors
+    dropped = 0
+    in_array = None
+    # in an array: whether the next token must be a value (after "[" or ",")
+    want_value = first = True
+
+    def fill(size=chunk_size):
+        nonlocal buf, pos, eof, dropped
+        if len(buf) - pos > max_event_size:
+            raise ValueError(f"Event at offset {dropped + pos} is larger than {max_event_size} characters")
+        chunk = stream.read(size)
+        if not chunk:
+            eof = True
+            return False
+        dropped += pos
+        buf = buf[pos:] + chunk
+        pos = 0
+        return True
+
+    def fill_more():
+        # an event spanning reads: read at least as much again as is held,
+        # so the copies an event costs add up to a multiple of its size
+        return fill(max(chunk_size, len(buf) - pos))
+
+    while True:
+        pos = _skip_ws(buf, pos)
+        if pos >= len(buf):
+            if eof or not fill():
+                if in_array:
+                    raise ValueError("Unterminated JSON array")
+                break
+            continue
+
+        if in_array is None:
+            in_array = buf[pos] == "["
+            if in_array:
+                pos += 1
+            continue
+
+        if in_array:
+            if buf[pos] == "]":
+                if want_value and not first:
+                    raise ValueError(f"Trailing comma before the end of the JSON array at offset {dropped + pos}")
+                pos = _skip_ws(buf, pos + 1)
+                while pos >= len(buf) and fill():
+                    pos = _skip_ws(buf, pos)
+                if pos < len(buf):
+                    raise ValueError("Unexpected data after the end of the JSON array")
+                break
+            if buf[pos] == ",":
+                if want_value:
+                    raise ValueError(f"Unexpected comma in the JSON array at offset {dropped + pos}")
+                want_value = True
+                pos += 1
+                continue
+            if not want_value:
+                raise ValueError(f"Missing comma between JSON array items at offset {dropped + pos}")
+
+        try:
+            entry, end = _decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError as e:
+            if eof or not _truncated(e, buf) or not fill_more():
+                raise
+            continue
+        if end == len(buf) and not eof and not isinstance(entry, (dict, list)):
+            # a bare scalar may continue in the next chunk
+            fill_more()
+            continue
+        start, pos = pos, end
+        want_value = first = False
+        yield (entry, buf[start:end]) if with_text else entry
+
+class EventChunk:
+    """Up to a batch of consecutive events and the sha256 of their raw text.
+
+    Line-delimited chunks are only parsed when entries() is called, so a
+    chunk that was imported before is skipped without decoding its JSON.
+    """
+    __slots__ = ("digest", "count", "_lines", "_entries")
+
+    def __init__(self, texts, entries=None):
+        self.digest = hashlib.sha256("\n".join(texts).encode("utf-8")).hexdigest()
+        self.count = len(texts)
+        self._lines = texts if entries is None else None
+        self._entries = entries
+
+    def entries(self):
+        if self._entries is None:
+            self._entries = [json.loads(line) for line in self._lines]
+            self._lines = None
+        return self._entries
+
+class _Prefixed:
+    """Text stream that returns `prefix` before the rest of `stream`."""
+
+    def __init__(self, prefix, stream):
+        self.prefix = prefix
+        self.stream = stream
+
+    def read(self, size=-1):
+        if self.prefix:
+            text, self.prefix = self.prefix, ""
+            return text
+        return self.stream.read(size)
+
+def _iter_lines(stream, chunk_size):
+    rest = ""
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        lines = (rest + chunk).split("\n")
+        rest = lines.pop()
+        yield from lines
+    yield rest
+
+def _is_jsonl(head):
+    """True when the first document of `head` is an object alone on its line."""
+    head = head.lstrip(_WHITESPACE)
+    if not head.startswith("{") or "\n" not in head:
+        return False
+    try:
+        return isinstance(json.loads(head[:head.index("\n")]), dict)
+    except ValueError:
+        return False
+
+def iter_content_batches(items, size=IMPORT_BATCH_SIZE, text=None):
+    """Cuts `items` into batches of about `size` at content-defined boundaries.
+
+    A batch ends after an item whose text (`text(item)`, or the item
+    itself) hashes to a boundary, once it holds at least half of `size`
+    items; it never grows past twice `size`. Where a batch ends depends on
+    the items and not on their position in the file, so two overlapping
+    exports cut the events they share into the same chunks a few events
+    into the overlap, whatever offset each export starts at.
+    """
+    min_size = max(1, size // 2)
+    max_size = max(1, size * 2)
+    divisor = max(1, size - min_size)
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= max_size or (len(batch) >= min_size and zlib.crc32((text(item) if text else item).encode("utf-8")) % divisor == 0):
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def iter_event_chunks(stream, size=IMPORT_BATCH_SIZE, chunk_size=READ_CHUNK_SIZE):
+    """Cuts a log file into EventChunks of about `size` events for the import manifest (see iter_content_batches).
+
+    JSONL exports are cut on line boundaries without decoding; JSON arrays
+    and multi-line documents have to be parsed to find where an event ends.
+    """
+    head = stream.read(chunk_size)
+    stream = _Prefixed(head, stream)
+    if _is_jsonl(head):
+        for lines in iter_content_batches((line.rstrip("\r") for line in _iter_lines(stream, chunk_size) if line.strip()), size):
+            yield EventChunk(lines)
+        return
+    for pairs in iter_content_batches(iter_events(stream, chunk_size, with_text=True), size, itemgetter(1)):
+        yield EventChunk([text for _, text in pairs], [entry for entry, _ in pairs])
+
+# a batch of an import file; digest and source are None when not from a file
+ImportChunk = namedtuple("ImportChunk", "items digest source")
+
+def file_digest(file_path, block_size=READ_CHUNK_SIZE):
+    """sha256 of a file's bytes, as stored in the import manifest."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for block in iter(lambda: file.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+# leading bytes of the compressed formats an export may come in
+COMPRESSION_MAGIC = (
+    (b"\x28\xb5\x2f\xfd", "zstd"),
+    (b"\x1f\x8b", "gzip"),
+    (b"BZh", "bz2"),
+    (b"\xfd7zXZ\x00", "xz"),
+)
+
+def detect_compression(file):
+    """Compression of an open binary file from its first bytes, None for plain text."""
+    head = file.read(6)
+    file.seek(0)
+    for magic, compression in COMPRESSION_MAGIC:
+        if head.startswith(magic):
+            return compression
+    return None
+
+def decompressed(file, compression):
+    """Binary stream decompressing `file` as it is read."""
+    if compression is None:
+        return file
+    if compression == "gzip":
+        return gzip.GzipFile(fileobj=file)
+    if compression == "bz2":
+        return bz2.BZ2File(file)
+    if compression == "xz":
+        return lzma.LZMAFile(file)
+    import zstandard  # only needed for .zst files
+    return zstandard.ZstdDecompressor().stream_reader(file, read_across_frames=True)
+
+class LogFileReader:
+    """Text reader over a log file, decompressing zstd/gzip/bz2/xz on the fly.
+
+    bytes_read counts the bytes taken from the file itself, so progress
+    against the file size stays right for compressed files.
+    """
+
+    def __init__(self, file_path, encoding="utf-8-sig"):
+        self.file = open(file_path, "rb")
+        self.compression = detect_compression(self.file)
+        self.raw = decompressed(self.file, self.compression)
+        self._decoder = codecs.getincrementaldecoder(encoding)()
+
+    @property
+    def bytes_read(self):
+        return self.file.tell()
+
+    def read(self, size=-1):
+        while True:
+            data = self.raw.read(size)
+            text = self._decoder.decode(data, final=not data)
+            # keep reading while a multi-byte character is split across reads
+            if text or not data:
+                return text
+
+    def close(self):
+        if self.raw is not self.file:
+            self.raw.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def open_log_file(file_path):
+    return LogFileReader(file_path)
+
+LOG_FILE_SUFFIXES = (".json", ".jsonl", ".ndjson")
+COMPRESSED_SUFFIXES = (".zst", ".gz", ".bz2", ".xz")
+
+def is_log_file(name):
+    name = name.lower()
+    if name.endswith(COMPRESSED_SUFFIXES):
+        name = name[:name.rindex(".")]
+    return name.endswith(LOG_FILE_SUFFIXES)
+
+def find_log_files(directory):
+    """Log export files (plain or compressed) under `directory`, sorted by path."""
+    found = []
+    for root, _, names in os.walk(directory):
+        found.extend(os.path.join(root, name) for name in names if is_log_file(name))
+    return sorted(found)
+
+def iter_batches(iterable, size=IMPORT_BATCH_SIZE):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+# --- TIMESTAMPS ---
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+# the timestamps a datetime can hold, with a day to spare for local time
+_MIN_US = (datetime(1, 1, 2, tzinfo=timezone.utc) - EPOCH) // _MICROSECOND
+_MAX_US = (datetime(9999, 12, 30, tzinfo=timezone.utc) - EPOCH) // _MICROSECOND
+
+def to_epoch_us(value):
+    """Integer microseconds since the epoch (UTC) for a timestamp, None if it cannot be read.
+
+    Takes MongoDB `$date` values (ISO text, `{"$numberLong": ms}` or epoch
+    milliseconds), ISO strings and datetimes. Naive strings are UTC, as in
+    SQLite's date functions; naive datetimes are local time. NaN, infinite
+    and out of range values are None too, so such events go to the undated
+    partition instead of failing the import.
+    """
+    ts_us = _epoch_us(value)
+    if ts_us is None or not _MIN_US <= ts_us <= _MAX_US:
+        return None
+    return ts_us
+
+def _epoch_us(value):
+    if value is None:
+        return None
+    if isinstance(value, dict):
+        if "$date" in value:
+            return _epoch_us(value["$date"])
+        if "$numberLong" in value:
+            try:
+                return int(value["$numberLong"]) * 1000
+            except (TypeError, ValueError):
+                return None
+        return None
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value * 1000
+    if isinstance(value, float):
+        return int(value * 1000) if math.isfinite(value) else None
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.astimezone()
+        return (value - EPOCH) // _MICROSECOND
+    if isinstance(value, str):
+        text = value.strip()
+        if text.endswith(("Z", "z")):
+            text = text[:-1] + "+00:00"
+        try:
+            parsed = datetime.fromisoformat(text)
+        except ValueError:
+            return None
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return (parsed - EPOCH) // _MICROSECOND
+    return None
+
+def format_epoch_us(ts_us):
+    """ISO 8601 UTC text for an epoch microsecond timestamp."""
+    if ts_us is None:
+        return None
+    return datetime.fromtimestamp(ts_us / 1000000, timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+def event_to_record(entry):
+    """Flattens one MongoDB event into an event_logs row, raises KeyError."""
+    raw_timestamp = entry["timestamp"]["$date"]
+    ts_us = to_epoch_us(raw_timestamp)
+    return (
+        entry["_id"],
+        raw_timestamp if isinstance(raw_timestamp, str) else format_epoch_us(ts_us),
+        entry["level"],
+        entry["category"],
+        entry["event_type"],
+        entry["source"],
+        entry["message"],
+        entry["stack"],
+        json.dumps(entry["tags"]),
+        entry["app"]["name"],
+        entry["app"]["version"],
+        entry["user"]["id"],
+        entry["user"]["ip"],
+        entry["user"]["method"],
+        entry["user"]["endpoint"],
+        entry["user"]["status"],
+        entry["user"]["user_agent"],
+        ts_us
+    )
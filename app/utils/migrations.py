@@ -0,0 +1,740 @@
+# Schema migrations, keyed on PRAGMA user_version.
+#
+# Each entry upgrades the database to `version` and runs in its own
+# transaction together with the user_version bump, so an interrupted upgrade
+# leaves the encrypted database at the previous version. A step is either an
+# SQL statement or a callable taking the connection. Append new migrations to
+# the end of the list; never edit one that has already shipped.
+
+SCHEMA_V1 = [
+    """
+    CREATE TABLE IF NOT EXISTS event_logs (
+        id TEXT PRIMARY KEY,
+        timestamp TEXT,
+        level TEXT,
+        category TEXT,
+        event_type TEXT,
+        source TEXT,
+        message TEXT,
+        stack TEXT,
+        tags TEXT,
+        app_name TEXT,
+        app_version TEXT,
+        user_id TEXT,
+        user_ip TEXT,
+        user_method TEXT,
+        user_endpoint TEXT,
+        user_status TEXT,
+        user_agent TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS alert_logs (
+        id TEXT PRIMARY KEY,
+        timestamp TEXT,
+        level TEXT,
+        category TEXT,
+        event_type TEXT,
+        message TEXT,
+        log_id TEXT,
+        status TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS preference_settings (
+        id TEXT PRIMARY KEY,
+        timestamp TEXT,
+        warn TEXT,
+        error TEXT,
+        critical TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS activity_logs (
+        id TEXT PRIMARY KEY,
+        timestamp TEXT,
+        level TEXT,
+        event_type TEXT,
+        source TEXT,
+        message TEXT,
+        stack TEXT,
+        tags TEXT,
+        app_name TEXT,
+        app_version TEXT
+    )
+    """,
+]
+
+LOG_INDEXES_V2 = [
+    "CREATE INDEX IF NOT EXISTS idx_event_logs_timestamp ON event_logs (timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_event_logs_level ON event_logs (level)",
+    "CREATE INDEX IF NOT EXISTS idx_event_logs_category ON event_logs (category)",
+    "CREATE INDEX IF NOT EXISTS idx_event_logs_event_type ON event_logs (event_type)",
+    "CREATE INDEX IF NOT EXISTS idx_event_logs_user_ip ON event_logs (user_ip)",
+    "CREATE INDEX IF NOT EXISTS idx_alert_logs_status ON alert_logs (status)",
+    "CREATE INDEX IF NOT EXISTS idx_alert_logs_timestamp ON alert_logs (timestamp)",
+    "ANALYZE",
+]
+
+# External-content FTS5 indexes: the text lives only in event_logs/alert_logs,
+# the triggers keep the index in step with every insert, update and delete.
+SEARCH_INDEX_V3 = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS event_search USING fts5(
+        message, stack, tags, event_type, category, source,
+        content='event_logs', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS event_logs_search_insert AFTER INSERT ON event_logs BEGIN
+        INSERT INTO event_search (rowid, message, stack, tags, event_type, category, source)
+        VALUES (new.rowid, new.message, new.stack, new.tags, new.event_type, new.category, new.source);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS event_logs_search_delete AFTER DELETE ON event_logs BEGIN
+        INSERT INTO event_search (event_search, rowid, message, stack, tags, event_type, category, source)
+        VALUES ('delete', old.rowid, old.message, old.stack, old.tags, old.event_type, old.category, old.source);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS event_logs_search_update AFTER UPDATE ON event_logs BEGIN
+        INSERT INTO event_search (event_search, rowid, message, stack, tags, event_type, category, source)
+        VALUES ('delete', old.rowid, old.message, old.stack, old.tags, old.event_type, old.category, old.source);
+        INSERT INTO event_search (rowid, message, stack, tags, event_type, category, source)
+        VALUES (new.rowid, new.message, new.stack, new.tags, new.event_type, new.category, new.source);
+    END
+    """,
+    "INSERT INTO event_search (event_search) VALUES ('rebuild')",
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS alert_search USING fts5(
+        message, event_type, category, level,
+        content='alert_logs', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS alert_logs_search_insert AFTER INSERT ON alert_logs BEGIN
+        INSERT INTO alert_search (rowid, message, event_type, category, level)
+        VALUES (new.rowid, new.message, new.event_type, new.category, new.level);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS alert_logs_search_delete AFTER DELETE ON alert_logs BEGIN
+        INSERT INTO alert_search (alert_search, rowid, message, event_type, category, level)
+        VALUES ('delete', old.rowid, old.message, old.event_type, old.category, old.level);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS alert_logs_search_update AFTER UPDATE OF message, event_type, category, level ON alert_logs BEGIN
+        INSERT INTO alert_search (alert_search, rowid, message, event_type, category, level)
+        VALUES ('delete', old.rowid, old.message, old.event_type, old.category, old.level);
+        INSERT INTO alert_search (rowid, message, event_type, category, level)
+        VALUES (new.rowid, new.message, new.event_type, new.category, new.level);
+    END
+    """,
+    "INSERT INTO alert_search (alert_search) VALUES ('rebuild')",
+]
+
+# Summary counters kept by triggers in the same transaction as the write, so
+# the dashboard reads a few hundred buckets instead of counting every event.
+# NULL keys are stored as '' because they are part of the primary key.
+ROLLUPS_V4 = [
+    """
+    CREATE TABLE IF NOT EXISTS event_rollup (
+        day TEXT NOT NULL,
+        level TEXT NOT NULL,
+        category TEXT NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (day, level, category)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS alert_rollup (
+        level TEXT NOT NULL,
+        status TEXT NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (level, status)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS event_logs_rollup_insert AFTER INSERT ON event_logs BEGIN
+        INSERT INTO event_rollup (day, level, category, count)
+        VALUES (IFNULL(date(new.timestamp), ''), IFNULL(new.level, ''), IFNULL(new.category, ''), 1)
+        ON CONFLICT (day, level, category) DO UPDATE SET count = count + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS event_logs_rollup_delete AFTER DELETE ON event_logs BEGIN
+        UPDATE event_rollup SET count = count - 1
+        WHERE day = IFNULL(date(old.timestamp), '') AND level = IFNULL(old.level, '') AND category = IFNULL(old.category, '');
+        DELETE FROM event_rollup
+        WHERE day = IFNULL(date(old.timestamp), '') AND level = IFNULL(old.level, '') AND category = IFNULL(old.category, '') AND count <= 0;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS event_logs_rollup_update AFTER UPDATE OF timestamp, level, category ON event_logs BEGIN
+        UPDATE event_rollup SET count = count - 1
+        WHERE day = IFNULL(date(old.timestamp), '') AND level = IFNULL(old.level, '') AND category = IFNULL(old.category, '');
+        DELETE FROM event_rollup
+        WHERE day = IFNULL(date(old.timestamp), '') AND level = IFNULL(old.level, '') AND category = IFNULL(old.category, '') AND count <= 0;
+        INSERT INTO event_rollup (day, level, category, count)
+        VALUES (IFNULL(date(new.timestamp), ''), IFNULL(new.level, ''), IFNULL(new.category, ''), 1)
+        ON CONFLICT (day, level, category) DO UPDATE SET count = count + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS alert_logs_rollup_insert AFTER INSERT ON alert_logs BEGIN
+        INSERT INTO alert_rollup (level, status, count)
+        VALUES (IFNULL(new.level, ''), IFNULL(new.status, ''), 1)
+        ON CONFLICT (level, status) DO UPDATE SET count = count + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS alert_logs_rollup_delete AFTER DELETE ON alert_logs BEGIN
+        UPDATE alert_rollup SET count = count - 1
+        WHERE level = IFNULL(old.level, '') AND status = IFNULL(old.status, '');
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS alert_logs_rollup_update AFTER UPDATE OF level, status ON alert_logs BEGIN
+        UPDATE alert_rollup SET count = count - 1
+        WHERE level = IFNULL(old.level, '') AND status = IFNULL(old.status, '');
+        INSERT INTO alert_rollup (level, status, count)
+        VALUES (IFNULL(new.level, ''), IFNULL(new.status, ''), 1)
+        ON CONFLICT (level, status) DO UPDATE SET count = count + 1;
+    END
+    """,
+    "DELETE FROM event_rollup",
+    """
+    INSERT INTO event_rollup (day, level, category, count)
+    SELECT IFNULL(date(timestamp), ''), IFNULL(level, ''), IFNULL(category, ''), COUNT(*)
+    FROM event_logs GROUP BY 1, 2, 3
+    """,
+    "DELETE FROM alert_rollup",
+    """
+    INSERT INTO alert_rollup (level, status, count)
+    SELECT IFNULL(level, ''), IFNULL(status, ''), COUNT(*)
+    FROM alert_logs GROUP BY 1, 2
+    """,
+]
+
+# Event counts per minute, hour and day (bucket = epoch seconds at the start
+# of the bucket) for the dashboard timeline. Events whose timestamp SQLite
+# cannot parse are left out.
+TIMELINE_V5 = [
+    """
+    CREATE TABLE IF NOT EXISTS event_timeline (
+        resolution INTEGER NOT NULL,
+        bucket INTEGER NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (resolution, bucket)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS event_logs_timeline_insert AFTER INSERT ON event_logs
+    WHEN strftime('%s', new.timestamp) IS NOT NULL BEGIN
+        INSERT INTO event_timeline (resolution, bucket, count) VALUES (60, CAST(strftime('%s', new.timestamp) AS INTEGER) / 60 * 60, 1)
+        ON CONFLICT (resolution, bucket) DO UPDATE SET count = count + 1;
+        INSERT INTO event_timeline (resolution, bucket, count) VALUES (3600, CAST(strftime('%s', new.timestamp) AS INTEGER) / 3600 * 3600, 1)
+        ON CONFLICT (resolution, bucket) DO UPDATE SET count = count + 1;
+        INSERT INTO event_timeline (resolution, bucket, count) VALUES (86400, CAST(strftime('%s', new.timestamp) AS INTEGER) / 86400 * 86400, 1)
+        ON CONFLICT (resolution, bucket) DO UPDATE SET count = count + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS event_logs_timeline_delete AFTER DELETE ON event_logs
+    WHEN strftime('%s', old.timestamp) IS NOT NULL BEGIN
+        UPDATE event_timeline SET count = count - 1 WHERE resolution = 60 AND bucket = CAST(strftime('%s', old.timestamp) AS INTEGER) / 60 * 60;
+        UPDATE event_timeline SET count = count - 1 WHERE resolution = 3600 AND bucket = CAST(strftime('%s', old.timestamp) AS INTEGER) / 3600 * 3600;
+        UPDATE event_timeline SET count = count - 1 WHERE resolution = 86400 AND bucket = CAST(strftime('%s', old.timestamp) AS INTEGER) / 86400 * 86400;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS event_logs_timeline_update_old AFTER UPDATE OF timestamp ON event_logs
+    WHEN strftime('%s', old.timestamp) IS NOT NULL BEGIN
+        UPDATE event_timeline SET count = count - 1 WHERE resolution = 60 AND bucket = CAST(strftime('%s', old.timestamp) AS INTEGER) / 60 * 60;
+        UPDATE event_timeline SET count = count - 1 WHERE resolution = 3600 AND bucket = CAST(strftime('%s', old.timestamp) AS INTEGER) / 3600 * 3600;
+        UPDATE event_timeline SET count = count - 1 WHERE resolution = 86400 AND bucket = CAST(strftime('%s', old.timestamp) AS INTEGER) / 86400 * 86400;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS event_logs_timeline_update_new AFTER UPDATE OF timestamp ON event_logs
+    WHEN strftime('%s', new.timestamp) IS NOT NULL BEGIN
+        INSERT INTO event_timeline (resolution, bucket, count) VALUES (60, CAST(strftime('%s', new.timestamp) AS INTEGER) / 60 * 60, 1)
+        ON CONFLICT (resolution, bucket) DO UPDATE SET count = count + 1;
+        INSERT INTO event_timeline (resolution, bucket, count) VALUES (3600, CAST(strftime('%s', new.timestamp) AS INTEGER) / 3600 * 3600, 1)
+        ON CONFLICT (resolution, bucket) DO UPDATE SET count = count + 1;
+        INSERT INTO event_timeline (resolution, bucket, count) VALUES (86400, CAST(strftime('%s', new.timestamp) AS INTEGER) / 86400 * 86400, 1)
+        ON CONFLICT (resolution, bucket) DO UPDATE SET count = count + 1;
+    END
+    """,
+    "DELETE FROM event_timeline",
+    """
+    INSERT INTO event_timeline (resolution, bucket, count)
+    SELECT 60, CAST(strftime('%s', timestamp) AS INTEGER) / 60 * 60 AS bucket, COUNT(*)
+    FROM event_logs WHERE strftime('%s', timestamp) IS NOT NULL GROUP BY bucket
+    """,
+    """
+    INSERT INTO event_timeline (resolution, bucket, count)
+    SELECT 3600, CAST(strftime('%s', timestamp) AS INTEGER) / 3600 * 3600 AS bucket, COUNT(*)
+    FROM event_logs WHERE strftime('%s', timestamp) IS NOT NULL GROUP BY bucket
+    """,
+    """
+    INSERT INTO event_timeline (resolution, bucket, count)
+    SELECT 86400, CAST(strftime('%s', timestamp) AS INTEGER) / 86400 * 86400 AS bucket, COUNT(*)
+    FROM event_logs WHERE strftime('%s', timestamp) IS NOT NULL GROUP BY bucket
+    """,
+]
+
+# Typed event time: ts_us holds the timestamp as integer microseconds since
+# the epoch (UTC), the text column keeps what the source sent. Ordering,
+# range deletes, the date interval, the rollups and the timeline all read
+# ts_us, so a time range is an index seek whatever format the source used.
+# Alert timestamps were written as local time (str(datetime.now())), hence
+# the 'utc' modifier in their backfill.
+EPOCH_US_V6 = [
+    # only re-index the search columns, not every UPDATE (the backfill below touches each row)
+    "DROP TRIGGER IF EXISTS event_logs_search_update",
+    """
+    CREATE TRIGGER IF NOT EXISTS event_logs_search_update AFTER UPDATE OF message, stack, tags, event_type, category, source ON event_logs BEGIN
+        INSERT INTO event_search (event_search, rowid, message, stack, tags, event_type, category, source)
+        VALUES ('delete', old.rowid, old.message, old.stack, old.tags, old.event_type, old.category, old.source);
+        INSERT INTO event_search (rowid, message, stack, tags, event_type, category, source)
+        VALUES (new.rowid, new.message, new.stack, new.tags, new.event_type, new.category, new.source);
+    END
+    """,
+    "DROP TRIGGER IF EXISTS event_logs_rollup_insert",
+    "DROP TRIGGER IF EXISTS event_logs_rollup_delete",
+    "DROP TRIGGER IF EXISTS event_logs_rollup_update",
+    "DROP TRIGGER IF EXISTS event_logs_timeline_insert",
+    "DROP TRIGGER IF EXISTS event_logs_timeline_delete",
+    "DROP TRIGGER IF EXISTS event_logs_timeline_update_old",
+    "DROP TRIGGER IF EXISTS event_logs_timeline_update_new",
+    "ALTER TABLE event_logs ADD COLUMN ts_us INTEGER",
+    "ALTER TABLE alert_logs ADD COLUMN ts_us INTEGER",
+    """
+    UPDATE event_logs
+    SET ts_us = CAST(strftime('%s', timestamp) AS INTEGER) * 1000000 + CAST(substr(strftime('%f', timestamp), 4) AS INTEGER) * 1000
+    WHERE strftime('%s', timestamp) IS NOT NULL
+    """,
+    """
+    UPDATE alert_logs
+    SET ts_us = CAST(strftime('%s', timestamp, 'utc') AS INTEGER) * 1000000 + CAST(substr(strftime('%f', timestamp, 'utc'), 4) AS INTEGER) * 1000
+    WHERE strftime('%s', timestamp, 'utc') IS NOT NULL
+    """,
+    "DROP INDEX IF EXISTS idx_event_logs_timestamp",
+    "DROP INDEX IF EXISTS idx_alert_logs_timestamp",
+    "CREATE INDEX IF NOT EXISTS idx_event_logs_ts_us ON event_logs (ts_us)",
+    "CREATE INDEX IF NOT EXISTS idx_alert_logs_ts_us ON alert_logs (ts_us)",
+    """
+    CREATE TRIGGER IF NOT EXISTS event_logs_rollup_insert AFTER INSERT ON event_logs BEGIN
+        INSERT INTO event_rollup (day, level, category, count)
+        VALUES (IFNULL(date(new.ts_us / 1000000, 'unixepoch'), ''), IFNULL(new.level, ''), IFNULL(new.category, ''), 1)
+        ON CONFLICT (day, level, category) DO UPDATE SET count = count + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS event_logs_rollup_delete AFTER DELETE ON event_logs BEGIN
+        UPDATE event_rollup SET count = count - 1
+        WHERE day = IFNULL(date(old.ts_us / 1000000, 'unixepoch'), '') AND level = IFNULL(old.level, '') AND category = IFNULL(old.category, '');
+        DELETE FROM event_rollup
+        WHERE day = IFNULL(date(old.ts_us / 1000000, 'unixepoch'), '') AND level = IFNULL(old.level, '') AND category = IFNULL(old.category, '') AND count <= 0;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS event_logs_rollup_update AFTER UPDATE OF ts_us, level, category ON event_logs BEGIN
+        UPDATE event_rollup SET count = count - 1
+        WHERE day = IFNULL(date(old.ts_us / 1000000, 'unixepoch'), '') AND level = IFNULL(old.level, '') AND category = IFNULL(old.category, '');
+        DELETE FROM event_rollup
+        WHERE day = IFNULL(date(old.ts_us / 1000000, 'unixepoch'), '') AND level = IFNULL(old.level, '') AND category = IFNULL(old.category, '') AND count <= 0;
+        INSERT INTO event_rollup (day, level, category, count)
+        VALUES (IFNULL(date(new.ts_us / 1000000, 'unixepoch'), ''), IFNULL(new.level, ''), IFNULL(new.category, ''), 1)
+        ON CONFLICT (day, level, category) DO UPDATE SET count = count + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS event_logs_timeline_insert AFTER INSERT ON event_logs
+    WHEN new.ts_us IS NOT NULL BEGIN
+        INSERT INTO event_timeline (resolution, bucket, count) VALUES (60, new.ts_us / 60000000 * 60, 1)
+        ON CONFLICT (resolution, bucket) DO UPDATE SET count = count + 1;
+        INSERT INTO event_timeline (resolution, bucket, count) VALUES (3600, new.ts_us / 3600000000 * 3600, 1)
+        ON CONFLICT (resolution, bucket) DO UPDATE SET count = count + 1;
+        INSERT INTO event_timeline (resolution, bucket, count) VALUES (86400, new.ts_us / 86400000000 * 86400, 1)
+        ON CONFLICT (resolution, bucket) DO UPDATE SET count = count + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS event_logs_timeline_delete AFTER DELETE ON event_logs
+    WHEN old.ts_us IS NOT NULL BEGIN
+        UPDATE event_timeline SET count = count - 1 WHERE resolution = 60 AND bucket = old.ts_us / 60000000 * 60;
+        UPDATE event_timeline SET count = count - 1 WHERE resolution = 3600 AND bucket = old.ts_us / 3600000000 * 3600;
+        UPDATE event_timeline SET count = count - 1 WHERE resolution = 86400 AND bucket = old.ts_us / 86400000000 * 86400;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS event_logs_timeline_update_old AFTER UPDATE OF ts_us ON event_logs
+    WHEN old.ts_us IS NOT NULL BEGIN
+        UPDATE event_timeline SET count = count - 1 WHERE resolution = 60 AND bucket = old.ts_us / 60000000 * 60;
+        UPDATE event_timeline SET count = count - 1 WHERE resolution = 3600 AND bucket = old.ts_us / 3600000000 * 3600;
+        UPDATE event_timeline SET count = count - 1 WHERE resolution = 86400 AND bucket = old.ts_us / 86400000000 * 86400;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS event_logs_timeline_update_new AFTER UPDATE OF ts_us ON event_logs
+    WHEN new.ts_us IS NOT NULL BEGIN
+        INSERT INTO event_timeline (resolution, bucket, count) VALUES (60, new.ts_us / 60000000 * 60, 1)
+        ON CONFLICT (resolution, bucket) DO UPDATE SET count = count + 1;
+        INSERT INTO event_timeline (resolution, bucket, count) VALUES (3600, new.ts_us / 3600000000 * 3600, 1)
+        ON CONFLICT (resolution, bucket) DO UPDATE SET count = count + 1;
+        INSERT INTO event_timeline (resolution, bucket, count) VALUES (86400, new.ts_us / 86400000000 * 86400, 1)
+        ON CONFLICT (resolution, bucket) DO UPDATE SET count = count + 1;
+    END
+    """,
+    "DELETE FROM event_rollup",
+    """
+    INSERT INTO event_rollup (day, level, category, count)
+    SELECT IFNULL(date(ts_us / 1000000, 'unixepoch'), ''), IFNULL(level, ''), IFNULL(category, ''), COUNT(*)
+    FROM event_logs GROUP BY 1, 2, 3
+    """,
+    "DELETE FROM event_timeline",
+    """
+    INSERT INTO event_timeline (resolution, bucket, count)
+    SELECT 60, ts_us / 60000000 * 60 AS bucket, COUNT(*) FROM event_logs WHERE ts_us IS NOT NULL GROUP BY bucket
+    """,
+    """
+    INSERT INTO event_timeline (resolution, bucket, count)
+    SELECT 3600, ts_us / 3600000000 * 3600 AS bucket, COUNT(*) FROM event_logs WHERE ts_us IS NOT NULL GROUP BY bucket
+    """,
+    """
+    INSERT INTO event_timeline (resolution, bucket, count)
+    SELECT 86400, ts_us / 86400000000 * 86400 AS bucket, COUNT(*) FROM event_logs WHERE ts_us IS NOT NULL GROUP BY bucket
+    """,
+    "ANALYZE",
+]
+
+# Dictionary encoding: level, category, event_type, source, app_name,
+# app_version, user_method and user_agent repeat a few hundred distinct
+# strings across every event, so event_logs stores an integer id into
+# value_dictionary for each of them instead. event_logs_text decodes the
+# ids again; it is the content table of the search index and what the
+# triggers read the strings from. SQLite cannot change a column's type in
+# place, so event_logs is rebuilt (keeping rowids, which the search index
+# and the GUI's change tracking rely on).
+DICTIONARY_V7 = [
+    """
+    CREATE TABLE IF NOT EXISTS value_dictionary (
+        id INTEGER PRIMARY KEY,
+        field TEXT NOT NULL,
+        value TEXT NOT NULL,
+        UNIQUE (field, value)
+    )
+    """,
+    "INSERT OR IGNORE INTO value_dictionary (field, value) SELECT DISTINCT 'level', level FROM event_logs WHERE level IS NOT NULL",
+    "INSERT OR IGNORE INTO value_dictionary (field, value) SELECT DISTINCT 'category', category FROM event_logs WHERE category IS NOT NULL",
+    "INSERT OR IGNORE INTO value_dictionary (field, value) SELECT DISTINCT 'event_type', event_type FROM event_logs WHERE event_type IS NOT NULL",
+    "INSERT OR IGNORE INTO value_dictionary (field, value) SELECT DISTINCT 'source', source FROM event_logs WHERE source IS NOT NULL",
+    "INSERT OR IGNORE INTO value_dictionary (field, value) SELECT DISTINCT 'app_name', app_name FROM event_logs WHERE app_name IS NOT NULL",
+    "INSERT OR IGNORE INTO value_dictionary (field, value) SELECT DISTINCT 'app_version', app_version FROM event_logs WHERE app_version IS NOT NULL",
+    "INSERT OR IGNORE INTO value_dictionary (field, value) SELECT DISTINCT 'user_method', user_method FROM event_logs WHERE user_method IS NOT NULL",
+    "INSERT OR IGNORE INTO value_dictionary (field, value) SELECT DISTINCT 'user_agent', user_agent FROM event_logs WHERE user_agent IS NOT NULL",
+    "DROP TABLE IF EXISTS event_search",
+    """
+    CREATE TABLE event_logs_encoded (
+        id TEXT PRIMARY KEY,
+        timestamp TEXT,
+        level INTEGER,
+        category INTEGER,
+        event_type INTEGER,
+        source INTEGER,
+        message TEXT,
+        stack TEXT,
+        tags TEXT,
+        app_name INTEGER,
+        app_version INTEGER,
+        user_id TEXT,
+        user_ip TEXT,
+        user_method INTEGER,
+        user_endpoint TEXT,
+        user_status TEXT,
+        user_agent INTEGER,
+        ts_us INTEGER
+    )
+    """,
+    """
+    INSERT INTO event_logs_encoded (rowid, id, timestamp, level, category, event_type, source, message, stack, tags, app_name, app_version, user_id, user_ip, user_method, user_endpoint, user_status, user_agent, ts_us)
+    SELECT e.rowid, e.id, e.timestamp,
+        (SELECT d.id FROM value_dictionary d WHERE d.field = 'level' AND d.value = e.level),
+        (SELECT d.id FROM value_dictionary d WHERE d.field = 'category' AND d.value = e.category),
+        (SELECT d.id FROM value_dictionary d WHERE d.field = 'event_type' AND d.value = e.event_type),
+        (SELECT d.id FROM value_dictionary d WHERE d.field = 'source' AND d.value = e.source),
+        e.message, e.stack, e.tags,
+        (SELECT d.id FROM value_dictionary d WHERE d.field = 'app_name' AND d.value = e.app_name),
+        (SELECT d.id FROM value_dictionary d WHERE d.field = 'app_version' AND d.value = e.app_version),
+        e.user_id, e.user_ip,
+        (SELECT d.id FROM value_dictionary d WHERE d.field = 'user_method' AND d.value = e.user_method),
+        e.user_endpoint, e.user_status,
+        (SELECT d.id FROM value_dictionary d WHERE d.field = 'user_agent' AND d.value = e.user_agent),
+        e.ts_us
+    FROM event_logs e
+    """,
+    "DROP TABLE event_logs",
+    "ALTER TABLE event_logs_encoded RENAME TO event_logs",
+    "CREATE INDEX IF NOT EXISTS idx_event_logs_level ON event_logs (level)",
+    "CREATE INDEX IF NOT EXISTS idx_event_logs_category ON event_logs (category)",
+    "CREATE INDEX IF NOT EXISTS idx_event_logs_event_type ON event_logs (event_type)",
+    "CREATE INDEX IF NOT EXISTS idx_event_logs_user_ip ON event_logs (user_ip)",
+    "CREATE INDEX IF NOT EXISTS idx_event_logs_ts_us ON event_logs (ts_us)",
+    """
+    CREATE VIEW IF NOT EXISTS event_logs_text AS
+    SELECT e.rowid AS rowid, e.id, e.timestamp,
+        (SELECT value FROM value_dictionary WHERE id = e.level) AS level,
+        (SELECT value FROM value_dictionary WHERE id = e.category) AS category,
+        (SELECT value FROM value_dictionary WHERE id = e.event_type) AS event_type,
+        (SELECT value FROM value_dictionary WHERE id = e.source) AS source,
+        e.message, e.stack, e.tags,
+        (SELECT value FROM value_dictionary WHERE id = e.app_name) AS app_name,
+        (SELECT value FROM value_dictionary WHERE id = e.app_version) AS app_version,
+        e.user_id, e.user_ip,
+        (SELECT value FROM value_dictionary WHERE id = e.user_method) AS user_method,
+        e.user_endpoint, e.user_status,
+        (SELECT value FROM value_dictionary WHERE id = e.user_agent) AS user_agent,
+        e.ts_us
+    FROM event_logs e
+    """,
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS event_search USING fts5(
+        message, stack, tags, event_type, category, source,
+        content='event_logs_text', prefix='2 3'
+    )
+    """,
+    "INSERT INTO event_search (event_search) VALUES ('rebuild')",
+    """
+    CREATE TRIGGER IF NOT EXISTS event_logs_search_insert AFTER INSERT ON event_logs BEGIN
+        INSERT INTO event_search (rowid, message, stack, tags, event_type, category, source)
+        VALUES (new.rowid, new.message, new.stack, new.tags,
+            (SELECT value FROM value_dictionary WHERE id = new.event_type),
+            (SELECT value FROM value_dictionary WHERE id = new.category),
+            (SELECT value FROM value_dictionary WHERE id = new.source));
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS event_logs_search_delete AFTER DELETE ON event_logs BEGIN
+        INSERT INTO event_search (event_search, rowid, message, stack, tags, event_type, category, source)
+        VALUES ('delete', old.rowid, old.message, old.stack, old.tags,
+            (SELECT value FROM value_dictionary WHERE id = old.event_type),
+            (SELECT value FROM value_dictionary WHERE id = old.category),
+            (SELECT value FROM value_dictionary WHERE id = old.source));
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS event_logs_search_update AFTER UPDATE OF message, stack, tags, event_type, category, source ON event_logs BEGIN
+        INSERT INTO event_search (event_search, rowid, message, stack, tags, event_type, category, source)
+        VALUES ('delete', old.rowid, old.message, old.stack, old.tags,
+            (SELECT value FROM value_dictionary WHERE id = old.event_type),
+            (SELECT value FROM value_dictionary WHERE id = old.category),
+            (SELECT value FROM value_dictionary WHERE id = old.source));
+        INSERT INTO event_search (rowid, message, stack, tags, event_type, category, source)
+        VALUES (new.rowid, new.message, new.stack, new.tags,
+            (SELECT value FROM value_dictionary WHERE id = new.event_type),
+            (SELECT value FROM value_dictionary WHERE id = new.category),
+            (SELECT value FROM value_dictionary WHERE id = new.source));
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS event_logs_rollup_insert AFTER INSERT ON event_logs BEGIN
+        INSERT INTO event_rollup (day, level, category, count)
+        VALUES (IFNULL(date(new.ts_us / 1000000, 'unixepoch'), ''),
+            IFNULL((SELECT value FROM value_dictionary WHERE id = new.level), ''),
+            IFNULL((SELECT value FROM value_dictionary WHERE id = new.category), ''), 1)
+        ON CONFLICT (day, level, category) DO UPDATE SET count = count + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS event_logs_rollup_delete AFTER DELETE ON event_logs BEGIN
+        UPDATE event_rollup SET count = count - 1
+        WHERE day = IFNULL(date(old.ts_us / 1000000, 'unixepoch'), '')
+            AND level = IFNULL((SELECT value FROM value_dictionary WHERE id = old.level), '')
+            AND category = IFNULL((SELECT value FROM value_dictionary WHERE id = old.category), '');
+        DELETE FROM event_rollup
+        WHERE day = IFNULL(date(old.ts_us / 1000000, 'unixepoch'), '')
+            AND level = IFNULL((SELECT value FROM value_dictionary WHERE id = old.level), '')
+            AND category = IFNULL((SELECT value FROM value_dictionary WHERE id = old.category), '') AND count <= 0;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS event_logs_rollup_update AFTER UPDATE OF ts_us, level, category ON event_logs BEGIN
+        UPDATE event_rollup SET count = count - 1
+        WHERE day = IFNULL(date(old.ts_us / 1000000, 'unixepoch'), '')
+            AND level = IFNULL((SELECT value FROM value_dictionary WHERE id = old.level), '')
+            AND category = IFNULL((SELECT value FROM value_dictionary WHERE id = old.category), '');
+        DELETE FROM event_rollup
+        WHERE day = IFNULL(date(old.ts_us / 1000000, 'unixepoch'), '')
+            AND level = IFNULL((SELECT value FROM value_dictionary WHERE id = old.level), '')
+            AND category = IFNULL((SELECT value FROM value_dictionary WHERE id = old.category), '') AND count <= 0;
+        INSERT INTO event_rollup (day, level, category, count)
+        VALUES (IFNULL(date(new.ts_us / 1000000, 'unixepoch'), ''),
+            IFNULL((SELECT value FROM value_dictionary WHERE id = new.level), ''),
+            IFNULL((SELECT value FROM value_dictionary WHERE id = new.category), ''), 1)
+        ON CONFLICT (day, level, category) DO UPDATE SET count = count + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS event_logs_timeline_insert AFTER INSERT ON event_logs
+    WHEN new.ts_us IS NOT NULL BEGIN
+        INSERT INTO event_timeline (resolution, bucket, count) VALUES (60, new.ts_us / 60000000 * 60, 1)
+        ON CONFLICT (resolution, bucket) DO UPDATE SET count = count + 1;
+        INSERT INTO event_timeline (resolution, bucket, count) VALUES (3600, new.ts_us / 3600000000 * 3600, 1)
+        ON CONFLICT (resolution, bucket) DO UPDATE SET count = count + 1;
+        INSERT INTO event_timeline (resolution, bucket, count) VALUES (86400, new.ts_us / 86400000000 * 86400, 1)
+        ON CONFLICT (resolution, bucket) DO UPDATE SET count = count + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS event_logs_timeline_delete AFTER DELETE ON event_logs
+    WHEN old.ts_us IS NOT NULL BEGIN
+        UPDATE event_timeline SET count = count - 1 WHERE resolution = 60 AND bucket = old.ts_us / 60000000 * 60;
+        UPDATE event_timeline SET count = count - 1 WHERE resolution = 3600 AND bucket = old.ts_us / 3600000000 * 3600;
+        UPDATE event_timeline SET count = count - 1 WHERE resolution = 86400 AND bucket = old.ts_us / 86400000000 * 86400;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS event_logs_timeline_update_old AFTER UPDATE OF ts_us ON event_logs
+    WHEN old.ts_us IS NOT NULL BEGIN
+        UPDATE event_timeline SET count = count - 1 WHERE resolution = 60 AND bucket = old.ts_us / 60000000 * 60;
+        UPDATE event_timeline SET count = count - 1 WHERE resolution = 3600 AND bucket = old.ts_us / 3600000000 * 3600;
+        UPDATE event_timeline SET count = count - 1 WHERE resolution = 86400 AND bucket = old.ts_us / 86400000000 * 86400;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS event_logs_timeline_update_new AFTER UPDATE OF ts_us ON event_logs
+    WHEN new.ts_us IS NOT NULL BEGIN
+        INSERT INTO event_timeline (resolution, bucket, count) VALUES (60, new.ts_us / 60000000 * 60, 1)
+        ON CONFLICT (resolution, bucket) DO UPDATE SET count = count + 1;
+        INSERT INTO event_timeline (resolution, bucket, count) VALUES (3600, new.ts_us / 3600000000 * 3600, 1)
+        ON CONFLICT (resolution, bucket) DO UPDATE SET count = count + 1;
+        INSERT INTO event_timeline (resolution, bucket, count) VALUES (86400, new.ts_us / 86400000000 * 86400, 1)
+        ON CONFLICT (resolution, bucket) DO UPDATE SET count = count + 1;
+    END
+    """,
+    # statistics taken while the tables were still empty (the ANALYZE in v2
+    # and v6 on a new install) make SQLite plan the search index writes
+    # badly; drop them and let PRAGMA optimize collect real ones
+    "DELETE FROM sqlite_stat1",
+    "ANALYZE sqlite_master",
+]
+
+# v8: events move out of the main database into month partition files (see
+# utils.partitions); main keeps the catalog of those files. The rows already
+# stored are moved by db_crud.adopt_legacy_events after the migration, since
+# partitions are ATTACHed and SQLite cannot attach inside a transaction.
+PARTITIONS_V8 = [
+    """
+    CREATE TABLE IF NOT EXISTS event_partitions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        month TEXT NOT NULL UNIQUE,
+        start_us INTEGER,
+        end_us INTEGER
+    )
+    """,
+]
+
+# v9: what has been imported, so a file or chunk seen before is skipped
+# unparsed; hash is the sha256 of the file's bytes or the chunk's raw text
+IMPORT_MANIFEST_V9 = [
+    """
+    CREATE TABLE IF NOT EXISTS import_manifest (
+        hash TEXT PRIMARY KEY,
+        kind TEXT NOT NULL,
+        source TEXT,
+        records INTEGER NOT NULL,
+        inserted INTEGER NOT NULL,
+        first_id TEXT,
+        last_id TEXT,
+        first_us INTEGER,
+        last_us INTEGER,
+        imported_at INTEGER NOT NULL
+    ) WITHOUT ROWID
+    """,
+]
+
+# v10: alert rules evaluated during ingest (see utils.alert_rules); the list
+# columns hold JSON arrays, NULL matches anything. With window_seconds a rule
+# fires when `threshold` matches share a group_by value within the window.
+ALERT_RULES_V10 = [
+    """
+    CREATE TABLE IF NOT EXISTS alert_rules (
+        id TEXT PRIMARY KEY,
+        name TEXT NOT NULL,
+        enabled INTEGER NOT NULL DEFAULT 1,
+        levels TEXT,
+        categories TEXT,
+        event_types TEXT,
+        sources TEXT,
+        tags TEXT,
+        message_regex TEXT,
+        threshold INTEGER NOT NULL DEFAULT 1,
+        window_seconds INTEGER,
+        group_by TEXT,
+        created_at INTEGER NOT NULL
+    )
+    """,
+]
+
+# v11: one alert per event, so backfills and re-imports can INSERT OR IGNORE
+# alerts; alert_backfill is each partition's checkpoint for the rule set
+# (rules_hash) it was last backfilled with
+ALERT_BACKFILL_V11 = [
+    "DELETE FROM alert_logs WHERE log_id IS NOT NULL AND rowid NOT IN (SELECT MIN(rowid) FROM alert_logs WHERE log_id IS NOT NULL GROUP BY log_id)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_alert_logs_log_id ON alert_logs (log_id)",
+    """
+    CREATE TABLE IF NOT EXISTS alert_backfill (
+        partition_id INTEGER PRIMARY KEY,
+        rules_hash TEXT NOT NULL,
+        last_rowid INTEGER NOT NULL
+    )
+    """,
+]
+
+MIGRATIONS = [
+    (1, "base tables", SCHEMA_V1),
+    (2, "event and alert indexes", LOG_INDEXES_V2),
+    (3, "full-text search indexes", SEARCH_INDEX_V3),
+    (4, "summary rollup tables", ROLLUPS_V4),
+    (5, "event timeline buckets", TIMELINE_V5),
+    (6, "epoch microsecond timestamps", EPOCH_US_V6),
+    (7, "dictionary-encoded event columns", DICTIONARY_V7),
+    (8, "month partition catalog", PARTITIONS_V8),
+    (9, "import manifest", IMPORT_MANIFEST_V9),
+    (10, "alert rules", ALERT_RULES_V10),
+    (11, "alert backfill checkpoints", ALERT_BACKFILL_V11),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def migrate(conn):
+    """Applies every pending migration in order, returns (old, new) version."""
+    start = version = schema_version(conn)
+    if version > SCHEMA_VERSION:
+        raise RuntimeError(f"Database schema v{version} is newer than this app (v{SCHEMA_VERSION})")
+    for target, description, steps in MIGRATIONS:
+        if target <= version:
+            continue
+        if conn.in_transaction:
+            conn.commit()
+        conn.execute("BEGIN")
+        try:
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(step)
+            conn.execute(f"PRAGMA user_version = {target}")
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        version = target
+    return start, version
@@ -0,0 +1,284 @@
+from collections import namedtuple
+from datetime import datetime, timezone
+
+# Month partitions for the event store.
+#
+# Events live in one encrypted file per calendar month (UTC), plus one file
+# for events without a usable timestamp. The main database keeps the
+# event_partitions catalog, the alerts, the settings and value_dictionary;
+# a partition is ATTACHed to a connection when a query needs it. Each file
+# carries the full event schema: table, indexes, search index, rollups,
+# timeline and a mirror of the value_dictionary rows its triggers decode.
+#
+# Rows are addressed outside the partition by a global rowid: the catalog
+# id of the partition in the high bits, the partition's own rowid in the low
+# PARTITION_ROWID_BITS bits. Catalog ids are never reused, so a global rowid
+# never points into a different file after its partition is dropped.
+
+PARTITION_ROWID_BITS = 40
+LOCAL_ROWID_MASK = (1 << PARTITION_ROWID_BITS) - 1
+# SQLite allows 10 attached databases by default; leave room for ad hoc ones
+MAX_ATTACHED_PARTITIONS = 8
+PARTITION_SCHEMA_VERSION = 1
+PARTITION_FILE_GLOB = "events-*.db"
+UNDATED = "undated"
+# local rowid bounds used when translating a keyset position into another partition
+_BEFORE_ALL, _AFTER_ALL = 0, 1 << 62
+
+class Partition(namedtuple("Partition", "id month start_us end_us")):
+    """One catalog row; start_us/end_us are None for the undated partition."""
+    __slots__ = ()
+
+    @property
+    def schema(self):
+        return f"p{self.id}"
+
+    @property
+    def file(self):
+        # the id keeps a file left behind by a dropped partition from being reused
+        return f"events-{self.month}-{self.id}.db"
+
+    @property
+    def dated(self):
+        return self.start_us is not None
+
+    def global_rowid(self, rowid):
+        return (self.id << PARTITION_ROWID_BITS) | rowid
+
+    def overlaps(self, start_us=None, end_us=None):
+        """True if the partition may hold events between start_us and end_us (inclusive, None = open)."""
+        if not self.dated:
+            return start_us is None and end_us is None
+        return (start_us is None or self.end_us > start_us) and (end_us is None or self.start_us <= end_us)
+
+    def within(self, start_us, end_us):
+        """True if every event the partition can hold is between start_us and end_us (inclusive)."""
+        return self.dated and start_us <= self.start_us and self.end_us - 1 <= end_us
+
+    def local_after(self, after):
+        """The keyset position `after` ((value, global rowid)) as seen from inside this partition.
+
+        Rows are ordered by (value, global rowid). Within the partition the
+        value is compared as is; a tie on the value sorts before or after the
+        position depending on whether this partition's id is lower or higher.
+        """
+        if after is None:
+            return None
+        value, rowid = after
+        partition_id = rowid >> PARTITION_ROWID_BITS
+        if partition_id == self.id:
+            return (value, rowid & LOCAL_ROWID_MASK)
+        return (value, _BEFORE_ALL if self.id > partition_id else _AFTER_ALL)
+
+def split_rowid(rowid):
+    """(partition id, local rowid) of a global rowid."""
+    return rowid >> PARTITION_ROWID_BITS, rowid & LOCAL_ROWID_MASK
+
+def month_of(ts_us):
+    if ts_us is None:
+        return UNDATED
+    return datetime.fromtimestamp(ts_us // 1000000, timezone.utc).strftime("%Y-%m")
+
+def month_range(month):
+    """[start, end) of a month in epoch microseconds, (None, None) for the undated partition."""
+    if month == UNDATED:
+        return None, None
+    year, mon = map(int, month.split("-"))
+    start = datetime(year, mon, 1, tzinfo=timezone.utc)
+    end = datetime(year + mon // 12, mon % 12 + 1, 1, tzinfo=timezone.utc)
+    return int(start.timestamp()) * 1000000, int(end.timestamp()) * 1000000
+
+def time_order(partitions, descending=False):
+    """Partitions in ts_us order; NULL timestamps sort first, like in SQLite."""
+    dated = sorted((p for p in partitions if p.dated), key=lambda p: p.start_us, reverse=descending)
+    undated = [p for p in partitions if not p.dated]
+    return dated + undated if descending else undated + dated
+
+# Created in every partition file; {schema} is the name it is attached as.
+# Statements are the event part of migrations v3-v7 with schema-qualified
+# names; the triggers decode through the partition's value_dictionary mirror.
+PARTITION_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS {schema}.value_dictionary (
+        id INTEGER PRIMARY KEY,
+        field TEXT NOT NULL,
+        value TEXT NOT NULL,
+        UNIQUE (field, value)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS {schema}.event_logs (
+        id TEXT PRIMARY KEY,
+        timestamp TEXT,
+        level INTEGER,
+        category INTEGER,
+        event_type INTEGER,
+        source INTEGER,
+        message TEXT,
+        stack TEXT,
+        tags TEXT,
+        app_name INTEGER,
+        app_version INTEGER,
+        user_id TEXT,
+        user_ip TEXT,
+        user_method INTEGER,
+        user_endpoint TEXT,
+        user_status TEXT,
+        user_agent INTEGER,
+        ts_us INTEGER
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS {schema}.idx_event_logs_level ON event_logs (level)",
+    "CREATE INDEX IF NOT EXISTS {schema}.idx_event_logs_category ON event_logs (category)",
+    "CREATE INDEX IF NOT EXISTS {schema}.idx_event_logs_event_type ON event_logs (event_type)",
+    "CREATE INDEX IF NOT EXISTS {schema}.idx_event_logs_user_ip ON event_logs (user_ip)",
+    "CREATE INDEX IF NOT EXISTS {schema}.idx_event_logs_ts_us ON event_logs (ts_us)",
+    """
+    CREATE VIEW IF NOT EXISTS {schema}.event_logs_text AS
+    SELECT e.rowid AS rowid, e.id, e.timestamp,
+        (SELECT value FROM value_dictionary WHERE id = e.level) AS level,
+        (SELECT value FROM value_dictionary WHERE id = e.category) AS category,
+        (SELECT value FROM value_dictionary WHERE id = e.event_type) AS event_type,
+        (SELECT value FROM value_dictionary WHERE id = e.source) AS source,
+        e.message, e.stack, e.tags,
+        (SELECT value FROM value_dictionary WHERE id = e.app_name) AS app_name,
+        (SELECT value FROM value_dictionary WHERE id = e.app_version) AS app_version,
+        e.user_id, e.user_ip,
+        (SELECT value FROM value_dictionary WHERE id = e.user_method) AS user_method,
+        e.user_endpoint, e.user_status,
+        (SELECT value FROM value_dictionary WHERE id = e.user_agent) AS user_agent,
+        e.ts_us
+    FROM event_logs e
+    """,
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS {schema}.event_search USING fts5(
+        message, stack, tags, event_type, category, source,
+        content='event_logs_text', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS {schema}.event_logs_search_insert AFTER INSERT ON event_logs BEGIN
+        INSERT INTO event_search (rowid, message, stack, tags, event_type, category, source)
+        VALUES (new.rowid, new.message, new.stack, new.tags,
+            (SELECT value FROM value_dictionary WHERE id = new.event_type),
+            (SELECT value FROM value_dictionary WHERE id = new.category),
+            (SELECT value FROM value_dictionary WHERE id = new.source));
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS {schema}.event_logs_search_delete AFTER DELETE ON event_logs BEGIN
+        INSERT INTO event_search (event_search, rowid, message, stack, tags, event_type, category, source)
+        VALUES ('delete', old.rowid, old.message, old.stack, old.tags,
+            (SELECT value FROM value_dictionary WHERE id = old.event_type),
+            (SELECT value FROM value_dictionary WHERE id = old.category),
+            (SELECT value FROM value_dictionary WHERE id = old.source));
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS {schema}.event_logs_search_update AFTER UPDATE OF message, stack, tags, event_type, category, source ON event_logs BEGIN
+        INSERT INTO event_search (event_search, rowid, message, stack, tags, event_type, category, source)
+        VALUES ('delete', old.rowid, old.message, old.stack, old.tags,
+            (SELECT value FROM value_dictionary WHERE id = old.event_type),
+            (SELECT value FROM value_dictionary WHERE id = old.category),
+            (SELECT value FROM value_dictionary WHERE id = old.source));
+        INSERT INTO event_search (rowid, message, stack, tags, event_type, category, source)
+        VALUES (new.rowid, new.message, new.stack, new.tags,
+            (SELECT value FROM value_dictionary WHERE id = new.event_type),
+            (SELECT value FROM value_dictionary WHERE id = new.category),
+            (SELECT value FROM value_dictionary WHERE id = new.source));
+    END
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS {schema}.event_rollup (
+        day TEXT NOT NULL,
+        level TEXT NOT NULL,
+        category TEXT NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (day, level, category)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS {schema}.event_logs_rollup_insert AFTER INSERT ON event_logs BEGIN
+        INSERT INTO event_rollup (day, level, category, count)
+        VALUES (IFNULL(date(new.ts_us / 1000000, 'unixepoch'), ''),
+            IFNULL((SELECT value FROM value_dictionary WHERE id = new.level), ''),
+            IFNULL((SELECT value FROM value_dictionary WHERE id = new.category), ''), 1)
+        ON CONFLICT (day, level, category) DO UPDATE SET count = count + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS {schema}.event_logs_rollup_delete AFTER DELETE ON event_logs BEGIN
+        UPDATE event_rollup SET count = count - 1
+        WHERE day = IFNULL(date(old.ts_us / 1000000, 'unixepoch'), '')
+            AND level = IFNULL((SELECT value FROM value_dictionary WHERE id = old.level), '')
+            AND category = IFNULL((SELECT value FROM value_dictionary WHERE id = old.category), '');
+        DELETE FROM event_rollup
+        WHERE day = IFNULL(date(old.ts_us / 1000000, 'unixepoch'), '')
+            AND level = IFNULL((SELECT value FROM value_dictionary WHERE id = old.level), '')
+            AND category = IFNULL((SELECT value FROM value_dictionary WHERE id = old.category), '') AND count <= 0;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS {schema}.event_logs_rollup_update AFTER UPDATE OF ts_us, level, category ON event_logs BEGIN
+        UPDATE event_rollup SET count = count - 1
+        WHERE day = IFNULL(date(old.ts_us / 1000000, 'unixepoch'), '')
+            AND level = IFNULL((SELECT value FROM value_dictionary WHERE id = old.level), '')
+            AND category = IFNULL((SELECT value FROM value_dictionary WHERE id = old.category), '');
+        DELETE FROM event_rollup
+        WHERE day = IFNULL(date(old.ts_us / 1000000, 'unixepoch'), '')
+            AND level = IFNULL((SELECT value FROM value_dictionary WHERE id = old.level), '')
+            AND category = IFNULL((SELECT value FROM value_dictionary WHERE id = old.category), '') AND count <= 0;
+        INSERT INTO event_rollup (day, level, category, count)
+        VALUES (IFNULL(date(new.ts_us / 1000000, 'unixepoch'), ''),
+            IFNULL((SELECT value FROM value_dictionary WHERE id = new.level), ''),
+            IFNULL((SELECT value FROM value_dictionary WHERE id = new.category), ''), 1)
+        ON CONFLICT (day, level, category) DO UPDATE SET count = count + 1;
+    END
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS {schema}.event_timeline (
+        resolution INTEGER NOT NULL,
+        bucket INTEGER NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (resolution, bucket)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS {schema}.event_logs_timeline_insert AFTER INSERT ON event_logs
+    WHEN new.ts_us IS NOT NULL BEGIN
+        INSERT INTO event_timeline (resolution, bucket, count) VALUES (60, new.ts_us / 60000000 * 60, 1)
+        ON CONFLICT (resolution, bucket) DO UPDATE SET count = count + 1;
+        INSERT INTO event_timeline (resolution, bucket, count) VALUES (3600, new.ts_us / 3600000000 * 3600, 1)
+        ON CONFLICT (resolution, bucket) DO UPDATE SET count = count + 1;
+        INSERT INTO event_timeline (resolution, bucket, count) VALUES (86400, new.ts_us / 86400000000 * 86400, 1)
+        ON CONFLICT (resolution, bucket) DO UPDATE SET count = count + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS {schema}.event_logs_timeline_delete AFTER DELETE ON event_logs
+    WHEN old.ts_us IS NOT NULL BEGIN
+        UPDATE event_timeline SET count = count - 1 WHERE resolution = 60 AND bucket = old.ts_us / 60000000 * 60;
+        UPDATE event_timeline SET count = count - 1 WHERE resolution = 3600 AND bucket = old.ts_us / 3600000000 * 3600;
+        UPDATE event_timeline SET count = count - 1 WHERE resolution = 86400 AND bucket = old.ts_us / 86400000000 * 86400;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS {schema}.event_logs_timeline_update_old AFTER UPDATE OF ts_us ON event_logs
+    WHEN old.ts_us IS NOT NULL BEGIN
+        UPDATE event_timeline SET count = count - 1 WHERE resolution = 60 AND bucket = old.ts_us / 60000000 * 60;
+        UPDATE event_timeline SET count = count - 1 WHERE resolution = 3600 AND bucket = old.ts_us / 3600000000 * 3600;
+        UPDATE event_timeline SET count = count - 1 WHERE resolution = 86400 AND bucket = old.ts_us / 86400000000 * 86400;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS {schema}.event_logs_timeline_update_new AFTER UPDATE OF ts_us ON event_logs
+    WHEN new.ts_us IS NOT NULL BEGIN
+        INSERT INTO event_timeline (resolution, bucket, count) VALUES (60, new.ts_us / 60000000 * 60, 1)
+        ON CONFLICT (resolution, bucket) DO UPDATE SET count = count + 1;
+        INSERT INTO event_timeline (resolution, bucket, count) VALUES (3600, new.ts_us / 3600000000 * 3600, 1)
+        ON CONFLICT (resolution, bucket) DO UPDATE SET count = count + 1;
+        INSERT INTO event_timeline (resolution, bucket, count) VALUES (86400, new.ts_us / 86400000000 * 86400, 1)
+        ON CONFLICT (resolution, bucket) DO UPDATE SET count = count + 1;
+    END
+    """,
+]
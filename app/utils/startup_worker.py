@@ -0,0 +1,48 @@
+import time
+import traceback
+from PySide6.QtCore import QRunnable, QObject, Signal
+from utils.db_crud import (
+    log_activity, init_db, verify_sql_version, fetch_log_stats, fetch_alert_stats,
+    fetch_prefs_settings, fetch_alert_rules, fetch_first_page
+)
+
+source_dir = "startup"
+
+class StartupSignals(QObject):
+    loaded = Signal(dict)
+    error = Signal(str)
+
+class StartupWorker(QRunnable):
+    """Opens the database and reads what the pages show first, off the GUI thread.
+
+    The first connection looks the key up in the keyring, re-encrypts the
+    files if the cipher profile changed and migrates the schema, all of
+    which can take a while on a large database; the window is already up
+    with placeholders by then. `loaded` carries the stats, the preferences
+    and the first page of each table, plus `warning` for a problem that
+    should be shown but does not stop the app.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.signals = StartupSignals()
+
+    def run(self):
+        started = time.perf_counter()
+        try:
+            error = init_db()
+            sql_version = verify_sql_version()
+            data = {
+                "warning": error or (sql_version if isinstance(sql_version, str) else None),
+                "event_stats": fetch_log_stats(),
+                "alert_stats": fetch_alert_stats(),
+                "prefs_sets": fetch_prefs_settings(),
+                "rules": fetch_alert_rules(),
+                "event_page": fetch_first_page("event_logs"),
+                "alert_page": fetch_first_page("alert_logs"),
+                "seconds": time.perf_counter() - started,
+            }
+            self.signals.loaded.emit(data)
+        except Exception as e:
+            log_activity("error", type(e).__name__, source_dir, str(e), traceback.format_exc(), "StartupWorker run")
+            self.signals.error.emit(str(e))
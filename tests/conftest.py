@@ -0,0 +1,24 @@
+import secrets
+import sys
+from pathlib import Path
+
+import pytest
+
+# the app imports its packages from app/, the way main.py is run
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "app"))
+
+from utils import db_crud
+
+
+@pytest.fixture
+def database(tmp_path):
+    """A throwaway keyed database in place of the app's, closed after the test."""
+    db_crud.data_dir = tmp_path
+    db_crud.STORAGE = tmp_path / db_crud.DB_NAME
+    db_crud._db_key = secrets.token_hex(32)
+    db_crud._reset_partitions()
+    db_crud._value_dictionary.clear()
+    error = db_crud.init_db()
+    assert not error, error
+    yield tmp_path
+    db_crud.close_db()
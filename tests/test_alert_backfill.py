@@ -0,0 +1,105 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from utils import db_crud
+from utils.ingest import IngestPipeline, alert_engine, default_stages
+from utils.log_parser import format_epoch_us
+
+BRUTE_FORCE = {"name": "brute force", "event_types": ["login_failed"], "threshold": 20, "window_seconds": 300, "group_by": "user_ip"}
+EVERY_SEVENTH = {"name": "every seventh", "event_types": ["login_failed"], "threshold": 7, "group_by": "user_ip"}
+
+
+def epoch_us(*args):
+    return int(datetime(*args, tzinfo=timezone.utc).timestamp()) * 1000000
+
+
+def login_failures(start_us, count, step_s=5, ip="10.0.0.7", prefix="e"):
+    """event_logs records (EVENT_COLUMNS order), `step_s` seconds apart."""
+    records = []
+    for i in range(count):
+        ts_us = start_us + i * step_s * 1000000
+        records.append((
+            f"{prefix}-{i}", format_epoch_us(ts_us), "warn", "auth", "login_failed", "api-gateway",
+            f"login failed for user-{i % 3}", None, '["auth"]', "shop", "2.4.1", f"user-{i % 3}", ip, "POST",
+            "/api/v1/login", "401", "Mozilla/5.0", ts_us,
+        ))
+    return records
+
+
+def alerted_ids():
+    return sorted(row[0] for row in db_crud.execute_query("SELECT log_id FROM alert_logs", (), False, True))
+
+
+def ingest(records, rules, batch_size=1000):
+    pipeline = IngestPipeline(default_stages(alert_engine([], rules)), batch_size)
+    batches = [records[i:i + batch_size] for i in range(0, len(records), batch_size)]
+    return pipeline.run_batches(batches, validated=True)
+
+
+def backfill(records, rules):
+    db_crud.store_event_rows(records)
+    return db_crud.backfill_alerts(rules)
+
+
+# name: (records, alerts of BRUTE_FORCE, alerts of EVERY_SEVENTH)
+FIXTURES = {
+    "one burst": (login_failures(epoch_us(2026, 3, 10, 12), 100), 1, 14),
+    # the 20th failure falls in February, the first twelve in January
+    "burst across months": (login_failures(epoch_us(2026, 1, 31, 23, 59), 100), 1, 14),
+    "bursts apart": (login_failures(epoch_us(2026, 1, 31, 23, 50), 60) + login_failures(epoch_us(2026, 2, 1, 1), 60, prefix="f"), 2, 17),
+    "slow trickle": (login_failures(epoch_us(2026, 1, 31, 23, 30), 40, step_s=60), 0, 5),
+}
+
+
+@pytest.mark.parametrize("name", list(FIXTURES))
+@pytest.mark.parametrize("rule", [BRUTE_FORCE, EVERY_SEVENTH], ids=["window", "no window"])
+def test_ingest_and_backfill_raise_the_same_alerts(tmp_path, rule, name, database):
+    records, *expected = FIXTURES[name]
+    ingest(records, [rule])
+    ingested = alerted_ids()
+    db_crud.close_db()
+
+    fresh = tmp_path / "backfill"
+    fresh.mkdir()
+    db_crud.data_dir = fresh
+    db_crud.STORAGE = fresh / db_crud.DB_NAME
+    db_crud._reset_partitions()
+    db_crud._value_dictionary.clear()
+    assert not db_crud.init_db()
+    backfill(records, [rule])
+
+    assert alerted_ids() == ingested
+    assert len(ingested) == expected[rule is EVERY_SEVENTH]
+
+
+def test_window_rule_fires_once_per_burst(database):
+    ingest(FIXTURES["one burst"][0], [BRUTE_FORCE])
+    assert alerted_ids() == ["e-19"]
+
+
+def test_window_counts_reach_into_the_month_before(database):
+    backfill(FIXTURES["burst across months"][0], [BRUTE_FORCE])
+    assert alerted_ids() == ["e-19"]
+
+
+def test_reimported_events_raise_no_alerts(database):
+    records = FIXTURES["one burst"][0]
+    ingest(records[:30], [EVERY_SEVENTH])
+    summary = ingest(records[:30] + records[:30], [EVERY_SEVENTH])
+    assert summary["inserted"] == 0
+    assert alerted_ids() == ["e-13", "e-20", "e-27", "e-6"]
+
+
+def test_backfill_slices_count_like_one_pass(monkeypatch, database):
+    records = FIXTURES["bursts apart"][0]
+    rules = [BRUTE_FORCE, EVERY_SEVENTH]
+    backfill(records, rules)
+    whole = alerted_ids()
+    db_crud.execute_query("DELETE FROM alert_logs")
+    db_crud.execute_query("DELETE FROM alert_backfill")
+    monkeypatch.setattr(db_crud, "BACKFILL_SLICE", 13)
+    summary = db_crud.backfill_alerts(rules)
+    assert summary["events"] == len(records)
+    assert alerted_ids() == whole
+    assert len(whole) == 2 + 17
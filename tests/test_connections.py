@@ -0,0 +1,58 @@
+import secrets
+import threading
+
+from PySide6.QtCore import QRunnable, QThreadPool
+
+from utils.db_crud import ConnectionManager
+
+
+class Task(QRunnable):
+    def __init__(self, run):
+        super().__init__()
+        self.run = run
+
+
+def test_pool_threads_keep_their_readers(tmp_path):
+    connections = ConnectionManager(tmp_path / "readers.db", secrets.token_hex(32))
+    with connections.writer() as conn:
+        conn.execute("CREATE TABLE t (x)")
+    first_read, second_read = threading.Event(), threading.Event()
+    results = []
+
+    def first():
+        with connections.reader() as conn:
+            conn.execute("SELECT 1").fetchone()
+        first_read.set()
+        second_read.wait(5)
+        # still this thread's reader, though another pool thread opened one since
+        with connections.reader() as conn:
+            results.append(conn.execute("SELECT count(*) FROM t").fetchone()[0])
+
+    def second():
+        first_read.wait(5)
+        with connections.reader() as conn:
+            conn.execute("SELECT 1").fetchone()
+        second_read.set()
+
+    pool = QThreadPool()
+    pool.setMaxThreadCount(2)
+    pool.start(Task(first))
+    pool.start(Task(second))
+    pool.waitForDone()
+    connections.close()
+    assert results == [0]
+
+
+def test_readers_close_with_their_threads(tmp_path):
+    connections = ConnectionManager(tmp_path / "readers.db", secrets.token_hex(32))
+
+    def read():
+        with connections.reader() as conn:
+            conn.execute("SELECT 1").fetchone()
+
+    for _ in range(10):
+        thread = threading.Thread(target=read)
+        thread.start()
+        thread.join()
+    assert not connections._readers
+    connections.close()
@@ -0,0 +1,41 @@
+import pytest
+
+from utils.ingest import entry_month, record_month, split_by_partition
+from utils.log_parser import event_to_record, to_epoch_us
+from utils.partitions import UNDATED
+
+UNREADABLE_DATES = [10**20, float("nan"), float("inf"), {"$numberLong": "soon"}, "0001-01-01T00:00:00+14:00"]
+
+
+def entry(date, id="e-1"):
+    return {
+        "_id": id, "timestamp": {"$date": date}, "level": "info", "category": "auth", "event_type": "login",
+        "source": "api-gateway", "message": "signed in", "stack": None, "tags": ["auth"],
+        "app": {"name": "shop", "version": "2.4.1"},
+        "user": {"id": "user-1", "ip": "10.0.0.7", "method": "POST", "endpoint": "/api/v1/login", "status": "200", "user_agent": "Mozilla/5.0"},
+    }
+
+
+@pytest.mark.parametrize("date", UNREADABLE_DATES)
+def test_unreadable_dates_have_no_timestamp(date):
+    assert to_epoch_us({"$date": date}) is None
+
+
+@pytest.mark.parametrize("date", UNREADABLE_DATES)
+def test_unreadable_dates_go_to_the_undated_partition(date):
+    record = event_to_record(entry(date))
+    assert record[-1] is None
+    assert entry_month(entry(date)) == record_month(record) == UNDATED
+
+
+def test_an_unreadable_date_does_not_fail_the_batch():
+    entries = [entry("2026-03-10T12:00:00Z", "dated"), entry(10**20, "huge"), entry(float("nan"), "nan")]
+    parts = list(split_by_partition(entries))
+    assert sorted(e["_id"] for part in parts for e in part) == ["dated", "huge", "nan"]
+    assert {entry_month(e) for e in entries} == {"2026-03", UNDATED}
+
+
+def test_readable_dates_keep_their_timestamp():
+    assert to_epoch_us({"$date": 1767225600000}) == 1767225600 * 1000000
+    assert to_epoch_us({"$date": {"$numberLong": "1767225600000"}}) == 1767225600 * 1000000
+    assert to_epoch_us({"$date": "2026-01-01T00:00:00Z"}) == 1767225600 * 1000000